@@ -1,9 +1,19 @@
-from typing import List, Dict, Any, Optional
-from fastapi import APIRouter, HTTPException, Depends
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from app.deps import get_agent_service
-from app.service.agent_service import AgentService
+
+if TYPE_CHECKING:
+    # AgentService는 openai/langchain_upstage를 끌고 옴 → 타입 표시용으로만 (인스턴스는 container가 첫 요청 때 생성)
+    from app.service.agent_service import AgentService
 
 router = APIRouter(prefix="/agent", tags=["agent"])
 
@@ -24,6 +34,7 @@ class QueryResponse(BaseModel):
     retrieved_documents: List[str]
     document_distances: List[float]
     context_used: str
+    cached: bool = False  # 의미 유사 답변 캐시에서 반환했는지
 
 
 class KnowledgeResponse(BaseModel):
@@ -41,7 +52,7 @@ class StatsResponse(BaseModel):
 @router.post("/query", response_model=QueryResponse)
 async def process_query(
     request: QueryRequest,
-    agent_service: AgentService = Depends(get_agent_service)
+    agent_service: "AgentService" = Depends(get_agent_service)
 ):
     try:
         result = agent_service.process_query(
@@ -53,10 +64,40 @@ async def process_query(
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
 
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/query/stream")
+def stream_query(
+    request: QueryRequest,
+    agent_service: "AgentService" = Depends(get_agent_service)
+):
+    """
+    /query의 SSE 스트리밍 버전
+    event 순서: retrieval(출처 먼저) -> token(여러 번) -> done | error
+    """
+    def _events():
+        try:
+            for event, data in agent_service.stream_query(
+                query=request.query,
+                context_limit=request.context_limit
+            ):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"message": f"Query processing failed: {str(e)}"})
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/knowledge", response_model=KnowledgeResponse)
 async def add_knowledge(
     request: AddKnowledgeRequest,
-    agent_service: AgentService = Depends(get_agent_service)
+    agent_service: "AgentService" = Depends(get_agent_service)
 ):
     try:
         result = agent_service.add_knowledge(
@@ -68,9 +109,32 @@ async def add_knowledge(
         raise HTTPException(status_code=500, detail=f"Adding knowledge failed: {str(e)}")
 
 
+@router.post("/knowledge/bulk")
+def bulk_add_knowledge(
+    file: UploadFile = File(...),
+    resume: bool = True,
+    agent_service: "AgentService" = Depends(get_agent_service)
+):
+    """
+    JSONL(.jsonl) 또는 {"documents", "metadatas"}(.json) 파일 대량 적재
+    같은 파일을 다시 올리면 체크포인트에서 이어서 진행 (ID는 본문 해시라 중복 없음)
+    """
+    suffix = os.path.splitext(file.filename or "")[1].lower() or ".jsonl"
+    fd, tmp_path = tempfile.mkstemp(suffix=suffix)
+    try:
+        # 업로드 본문을 메모리에 올리지 않고 디스크로 흘려보냄
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(file.file, out, length=1 << 20)
+        return {"status": "success", **agent_service.ingest_knowledge_file(tmp_path, resume=resume)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Bulk ingestion failed: {str(e)}")
+    finally:
+        os.remove(tmp_path)
+
+
 @router.get("/stats", response_model=StatsResponse)
 async def get_knowledge_stats(
-    agent_service: AgentService = Depends(get_agent_service)
+    agent_service: "AgentService" = Depends(get_agent_service)
 ):
     try:
         stats = agent_service.get_knowledge_stats()
@@ -82,7 +146,7 @@ async def get_knowledge_stats(
 @router.delete("/knowledge/{doc_id}")
 async def delete_knowledge(
     doc_id: str,
-    agent_service: AgentService = Depends(get_agent_service)
+    agent_service: "AgentService" = Depends(get_agent_service)
 ):
     try:
         agent_service.vector_service.delete_document(doc_id)
@@ -91,6 +155,13 @@ async def delete_knowledge(
         raise HTTPException(status_code=500, detail=f"Deletion failed: {str(e)}")
 
 
+@router.get("/cache")
+async def get_answer_cache_stats(
+    agent_service: "AgentService" = Depends(get_agent_service)
+):
+    return agent_service.answer_cache.stats()
+
+
 @router.get("/health")
 async def health_check():
     return {"status": "healthy", "message": "Agent service is running"}
\ No newline at end of file
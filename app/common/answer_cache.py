@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# 유사 질문으로 볼 코사인 유사도 하한 / 최대 보관 개수 / 유효 시간
+DEFAULT_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))
+DEFAULT_TTL_S = float(os.getenv("ANSWER_CACHE_TTL_S", "1800"))
+
+
+class SemanticAnswerCache:
+    """
+    질의 임베딩 기준 답변 캐시 (/agent/query)
+
+    hit 조건 (모두 만족)
+    - 저장된 질의 벡터와 코사인 유사도 >= threshold
+    - 이번 검색으로 가져온 문서 ID 목록이 저장 당시와 같음 (근거 문서가 같아야 같은 답)
+    - 저장 이후 컬렉션이 바뀌지 않음 (collection_version 비교, 바뀌면 전체 비움)
+    - TTL 이내
+
+    크기를 넘으면 가장 오래 안 쓴 항목부터 제거 (LRU)
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_s: float = DEFAULT_TTL_S,
+    ):
+        self.threshold = threshold
+        self.max_entries = max(0, max_entries)
+        self.ttl_s = ttl_s
+
+        self._lock = threading.Lock()
+        # key -> (stored_at, unit_vector, doc_ids, result)
+        self._entries: "OrderedDict[int, Tuple[float, np.ndarray, Tuple[str, ...], Dict[str, Any]]]" = OrderedDict()
+        self._next_key = 0
+        self._version: Any = None
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> Optional[np.ndarray]:
+        v = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(v))
+        return v / norm if norm else None
+
+    def _sync_version(self, version: Any) -> None:
+        # 컬렉션이 바뀌었으면 (문서 추가/삭제) 모든 답변이 낡았을 수 있으므로 전체 무효화
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+                self._entries.clear()
+            self._version = version
+
+    def lookup(self, vector: List[float], doc_ids: List[str], version: Any = None) -> Optional[Dict[str, Any]]:
+        if not self.max_entries:
+            return None
+        unit = self._unit(vector)
+        if unit is None:
+            return None
+
+        with self._lock:
+            self._sync_version(version)
+            now = time.monotonic()
+
+            expired = [k for k, e in self._entries.items() if self.ttl_s and now - e[0] > self.ttl_s]
+            for k in expired:
+                del self._entries[k]
+
+            ids = tuple(doc_ids)
+            best_key, best_sim = None, self.threshold
+            for key, (_, vec, entry_ids, _) in self._entries.items():
+                if entry_ids != ids:
+                    continue
+                sim = float(vec @ unit)
+                if sim >= best_sim:
+                    best_key, best_sim = key, sim
+
+            if best_key is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return dict(self._entries[best_key][3])
+
+    def store(self, vector: List[float], doc_ids: List[str], result: Dict[str, Any], version: Any = None) -> None:
+        if not self.max_entries:
+            return
+        unit = self._unit(vector)
+        if unit is None:
+            return
+
+        with self._lock:
+            self._sync_version(version)
+            self._entries[self._next_key] = (time.monotonic(), unit, tuple(doc_ids), dict(result))
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.common.history.storage import ensure_parent_dir
+
+# 변경 로그가 다루는 저장소 종류
+STORES = ("history", "material", "character", "plot", "episode")
+
+# 로그가 이만큼 쌓이면 압축 (키별 최신 항목만 남김)
+COMPACT_THRESHOLD = 2000
+# 압축 후에도 삭제 표시(tombstone)를 유지할 최근 버전 구간
+TOMBSTONE_KEEP = 500
+
+
+def _project_root() -> Path:
+    # app/common/changelog.py -> 프로젝트 루트
+    return Path(__file__).resolve().parents[2]
+
+
+DEFAULT_LOG_PATH = str(_project_root() / "app" / "data" / "changelog.jsonl")
+
+
+class ChangeLog:
+    """
+    단조 증가 버전을 가진 변경 로그 (JSONL, append-only)
+
+    각 줄: {"version": 12, "ts": 1700000000.0, "store": "history", "op": "upsert", "key": "hist_0001", "data": {...}}
+    - op: "upsert"(data = 변경 후 전체 값) | "delete"(data = None)
+    - 압축 시 첫 줄에 {"_meta": {"floor": n}} 기록
+      floor보다 오래된 since로 요청하면 삭제 이력이 빠졌을 수 있으므로 reset=True (전체 재동기화 필요)
+    """
+
+    def __init__(self, path: str = DEFAULT_LOG_PATH, compact_threshold: int = COMPACT_THRESHOLD):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self._lock = threading.Lock()
+        self._entries: Optional[List[Dict[str, Any]]] = None
+        self._version = 0
+        self._floor = 0
+        self._compacted_len = 0  # 직전 압축 후 남은 항목 수 (키가 많을 때 매번 압축하지 않도록)
+
+    # ---------------------------------------------------------
+    # 로드
+    # ---------------------------------------------------------
+    def _ensure_loaded(self) -> None:
+        if self._entries is not None:
+            return
+
+        entries: List[Dict[str, Any]] = []
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        obj = json.loads(line)
+                    except json.JSONDecodeError:
+                        # 비정상 종료로 마지막 줄이 잘린 경우 등은 건너뜀
+                        continue
+                    if "_meta" in obj:
+                        self._floor = int(obj["_meta"].get("floor", 0))
+                        self._version = max(self._version, int(obj["_meta"].get("version", 0)))
+                        continue
+                    entries.append(obj)
+
+        self._entries = entries
+        if entries:
+            self._version = max(self._version, entries[-1]["version"])
+
+    # ---------------------------------------------------------
+    # 기록
+    # ---------------------------------------------------------
+    def record_many(self, changes: Iterable[Tuple[str, str, str, Any]]) -> int:
+        """
+        changes: (store, op, key, data) 묶음을 한 번에 기록하고 마지막 버전을 반환
+        """
+        with self._lock:
+            self._ensure_loaded()
+            now = time.time()
+            new_entries = []
+            for store, op, key, data in changes:
+                if store not in STORES:
+                    raise ValueError(f"unknown store: {store}")
+                self._version += 1
+                new_entries.append({
+                    "version": self._version,
+                    "ts": now,
+                    "store": store,
+                    "op": op,
+                    "key": str(key),
+                    "data": data if op != "delete" else None,
+                })
+
+            if not new_entries:
+                return self._version
+
+            ensure_parent_dir(self.path)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for e in new_entries:
+                    f.write(json.dumps(e, ensure_ascii=False) + "\n")
+
+            self._entries.extend(new_entries)
+            if len(self._entries) > max(self.compact_threshold, 2 * self._compacted_len):
+                self._compact_locked()
+            return self._version
+
+    def record(self, store: str, op: str, key: str, data: Any = None) -> int:
+        return self.record_many([(store, op, key, data)])
+
+    # ---------------------------------------------------------
+    # 조회
+    # ---------------------------------------------------------
+    @property
+    def version(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return self._version
+
+    def since(self, version: int, limit: int = 1000, stores: Optional[List[str]] = None) -> Dict[str, Any]:
+        with self._lock:
+            self._ensure_loaded()
+            reset = version < self._floor
+            start = 0 if reset else version
+
+            changes = []
+            has_more = False
+            for e in self._entries:
+                if e["version"] <= start:
+                    continue
+                if stores and e["store"] not in stores:
+                    continue
+                if len(changes) >= limit:
+                    has_more = True
+                    break
+                changes.append(e)
+
+            # 다음 요청의 since: 이번에 받은 마지막 버전 (더 없으면 현재 버전)
+            next_since = changes[-1]["version"] if has_more else self._version
+            return {
+                "version": self._version,
+                "floor": self._floor,
+                "reset": reset,
+                "next_since": next_since,
+                "has_more": has_more,
+                "changes": changes,
+            }
+
+    # ---------------------------------------------------------
+    # 압축
+    # ---------------------------------------------------------
+    def compact(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for e in self._entries:
+            latest[(e["store"], e["key"])] = e
+
+        tombstone_horizon = self._version - TOMBSTONE_KEEP
+        kept = []
+        floor = self._floor
+        for e in sorted(latest.values(), key=lambda x: x["version"]):
+            if e["op"] == "delete" and e["version"] <= tombstone_horizon:
+                floor = max(floor, e["version"])
+                continue
+            kept.append(e)
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"_meta": {"floor": floor, "version": self._version}}) + "\n")
+            for e in kept:
+                f.write(json.dumps(e, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+
+        print(f"🧹 [ChangeLog] 압축: {len(self._entries)} -> {len(kept)}건 (floor={floor})")
+        self._entries = kept
+        self._floor = floor
+        self._compacted_len = len(kept)
+
+
+# 싱글톤 인스턴스 (파일은 첫 사용 시 로드)
+changelog = ChangeLog()
+
+
+def record_change(store: str, op: str, key: str, data: Any = None) -> None:
+    """쓰기 경로용 헬퍼: 로그 기록 실패가 본 작업을 실패시키지 않도록 예외를 삼킴"""
+    try:
+        changelog.record(store, op, key, data)
+    except Exception as e:
+        print(f"⚠️ [ChangeLog] 기록 실패 ({store}/{key}): {e}")
+
+
+def record_changes(changes: Iterable[Tuple[str, str, str, Any]]) -> None:
+    try:
+        changelog.record_many(changes)
+    except Exception as e:
+        print(f"⚠️ [ChangeLog] 일괄 기록 실패: {e}")
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# 요청 단위 마감 시각 (time.monotonic 기준 절대값). contextvar라서 StageGraph/hedging/cascade가
+# copy_context로 작업 스레드에 넘기면 그 안의 LLM/임베딩/Chroma 호출까지 같은 마감이 적용됨
+_DEADLINE: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("request_deadline", default=None)
+# 요청 취소 신호 (같은 문서 새 제출로 대체 / 클라이언트 연결 끊김). 마감과 같은 경로로 전달됨
+_CANCEL: contextvars.ContextVar[Optional["CancelToken"]] = contextvars.ContextVar("request_cancel", default=None)
+
+# 취소 토큰이 있을 때 대기를 이 간격으로 나눠서 취소 여부 확인
+CANCEL_POLL_S = float(os.getenv("CANCEL_POLL_S", "0.25"))
+
+_STATS_LOCK = threading.Lock()
+_EXCEEDED: Dict[str, int] = {}
+_CANCELLED_CALLS: Dict[str, int] = {}
+_CANCELS: Dict[str, int] = {}
+_SCOPES = {"started": 0, "expired": 0}
+
+
+class DeadlineExceeded(TimeoutError):
+    """요청 마감이 지나 호출을 시작하지 않았거나 결과를 기다리지 않고 끊음"""
+
+    def __init__(self, what: str = ""):
+        super().__init__(f"request deadline exceeded{f' ({what})' if what else ''}")
+        self.what = what
+
+
+class Cancelled(DeadlineExceeded):
+    """요청이 취소됨. DeadlineExceeded 처리 경로(결과 버리고 중단)를 그대로 타도록 하위 클래스로 둠"""
+
+    def __init__(self, what: str = "", reason: str = ""):
+        TimeoutError.__init__(self, f"request cancelled ({reason or 'cancelled'}{f', {what}' if what else ''})")
+        self.what = what
+        self.reason = reason
+
+
+class CancelToken:
+    """요청 하나의 취소 신호. cancel()은 어느 스레드에서 불러도 됨"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason: Optional[str] = None
+        self._children: List[Tuple["CancelToken", Tuple[str, ...]]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> bool:
+        """처음 취소할 때만 True (사유별로 /health에 집계)"""
+        if not self._set(reason):
+            return False
+        with _STATS_LOCK:
+            _CANCELS[reason] = _CANCELS.get(reason, 0) + 1
+        return True
+
+    def child(self, reasons: Iterable[str]) -> "CancelToken":
+        """이 토큰이 reasons 중 하나의 사유로 취소될 때만 같이 취소되는 토큰"""
+        child = CancelToken()
+        reasons = tuple(reasons)
+        with _STATS_LOCK:
+            if not self._event.is_set():
+                self._children.append((child, reasons))
+                return child
+        if self.reason in reasons:
+            child._set(self.reason)
+        return child
+
+    def _set(self, reason: str) -> bool:
+        with _STATS_LOCK:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            children, self._children = self._children, []
+        for child, reasons in children:
+            if reason in reasons:
+                child._set(reason)
+        return True
+
+
+@contextmanager
+def deadline_scope(ms: Optional[float]) -> Iterator[None]:
+    """
+    이 블록 안의 호출에 마감(ms) 적용. 바깥 마감이 더 이르면 바깥 것을 유지, None/0이면 그대로
+
+        with deadline_scope(deadline_ms):
+            run = STORY_KEEPER_GRAPH.run(...)
+    """
+    if not ms or ms <= 0:
+        yield
+        return
+    at = time.monotonic() + ms / 1000.0
+    outer = _DEADLINE.get()
+    token = _DEADLINE.set(at if outer is None else min(outer, at))
+    with _STATS_LOCK:
+        _SCOPES["started"] += 1
+    try:
+        yield
+    finally:
+        if time.monotonic() >= _DEADLINE.get():
+            with _STATS_LOCK:
+                _SCOPES["expired"] += 1
+        _DEADLINE.reset(token)
+
+
+@contextmanager
+def detached(cancel_on: Optional[Iterable[str]] = None) -> Iterator[None]:
+    """
+    요청 마감과 무관하게 끝까지 가야 하는 작업 (예: 요약 저장은 응답이 끊겨도 완료)
+    cancel_on을 주면 요청 취소는 그 사유일 때만 따름 (None이면 취소는 그대로 적용)
+
+        with detached(cancel_on=("superseded",)):  # 연결이 끊겨도 저장, 새 원고로 대체되면 중단
+            ...
+    """
+    token = _DEADLINE.set(None)
+    parent = _CANCEL.get()
+    cancel_reset = _CANCEL.set(parent.child(cancel_on)) if parent is not None and cancel_on is not None else None
+    try:
+        yield
+    finally:
+        if cancel_reset is not None:
+            _CANCEL.reset(cancel_reset)
+        _DEADLINE.reset(token)
+
+
+@contextmanager
+def cancel_scope(token: Optional[CancelToken]) -> Iterator[None]:
+    """이 블록 안의 호출을 token으로 취소할 수 있게 함 (None이면 그대로)"""
+    if token is None:
+        yield
+        return
+    reset = _CANCEL.set(token)
+    try:
+        yield
+    finally:
+        _CANCEL.reset(reset)
+
+
+def current_cancel_token() -> Optional[CancelToken]:
+    return _CANCEL.get()
+
+
+def cancelled() -> bool:
+    token = _CANCEL.get()
+    return token is not None and token.cancelled
+
+
+def poll_timeout(timeout: Optional[float]) -> Optional[float]:
+    """취소 토큰이 있으면 대기를 CANCEL_POLL_S 단위로 나눔 (깨어날 때마다 check_deadline으로 확인)"""
+    if _CANCEL.get() is None:
+        return timeout
+    return CANCEL_POLL_S if timeout is None else min(timeout, CANCEL_POLL_S)
+
+
+def remaining() -> Optional[float]:
+    """남은 시간(초). 마감이 없으면 None, 지났거나 취소됐으면 0"""
+    if cancelled():
+        return 0.0
+    at = _DEADLINE.get()
+    if at is None:
+        return None
+    return max(0.0, at - time.monotonic())
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check_deadline(what: str = "") -> None:
+    if expired():
+        raise cut_error(what)
+
+
+def clamp_timeout(timeout: Optional[float], what: str = "") -> Optional[float]:
+    """호출별 timeout을 남은 시간 이하로 (마감이 지났으면 DeadlineExceeded)"""
+    check_deadline(what)
+    left = remaining()
+    if left is None:
+        return timeout
+    return left if timeout is None else min(timeout, left)
+
+
+def cut_error(what: str = "") -> DeadlineExceeded:
+    """
+    마감/취소로 끊을 때 던질 예외 (호출 지점별로 집계)
+    결과를 기다리다 끊은 경우처럼 check_deadline 밖에서 중단할 때도 이걸로 만듦
+    """
+    token = _CANCEL.get()
+    is_cancel = token is not None and token.cancelled
+    with _STATS_LOCK:
+        counts = _CANCELLED_CALLS if is_cancel else _EXCEEDED
+        key = what or "other"
+        counts[key] = counts.get(key, 0) + 1
+    if is_cancel:
+        return Cancelled(what, token.reason or "")
+    return DeadlineExceeded(what)
+
+
+def deadline_stats() -> Dict[str, Dict[str, int]]:
+    with _STATS_LOCK:
+        return {
+            "scopes": dict(_SCOPES),
+            "exceeded": dict(_EXCEEDED),
+            "cancelled": dict(_CANCELS),
+            "cancelled_calls": dict(_CANCELLED_CALLS),
+        }
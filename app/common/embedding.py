@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import queue
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.common.deadline import check_deadline, clamp_timeout, poll_timeout
+
+# 질의 임베딩 마이크로배칭 기본값 (환경변수로 조정)
+DEFAULT_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))     # 마지막 요청 이후 이만큼 더 기다려 모음
+DEFAULT_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", "20"))  # 첫 요청 기준 최대 대기
+DEFAULT_MAX_BATCH = int(os.getenv("EMBED_BATCH_MAX_SIZE", "64"))        # Upstage 임베딩 API 한 번에 최대 100개
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("EMBED_BATCH_MAX_IN_FLIGHT", "4"))  # 동시에 나가는 배치 호출 수
+
+# 질의 임베딩 LRU 캐시 (같은 검색어 반복 시 임베딩 API 생략)
+DEFAULT_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "2048"))
+DEFAULT_CACHE_TTL_S = float(os.getenv("QUERY_EMBED_CACHE_TTL_S", "3600"))
+
+BatchFn = Callable[[List[str]], List[List[float]]]
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_query(text: str) -> str:
+    """캐시 키용 정규화: 유니코드 NFC + 공백 압축 + 양끝 공백 제거"""
+    return _WS_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+class QueryEmbeddingCache:
+    """
+    질의 문자열 -> 임베딩 벡터 LRU (크기 + TTL 상한)
+    - 문서 임베딩 저장소가 아니라 검색어 재사용용 (메모리: 4096차원 float 기준 1건 ≈ 수십 KB)
+    """
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, ttl_s: float = DEFAULT_CACHE_TTL_S):
+        self.max_size = max(0, max_size)
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[List[float]]:
+        if not self.max_size:
+            return None
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, vector = item
+            if self.ttl_s and time.monotonic() - stored_at > self.ttl_s:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, key: str, vector: List[float]) -> None:
+        if not self.max_size:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic(), vector)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "ttl_s": self.ttl_s,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class MicroBatchEmbedder:
+    """
+    동시에 들어온 질의 임베딩 요청을 짧은 창(window) 동안 모아 한 번의 배치 호출로 보냅니다.
+
+    - embed_query(text): 호출 스레드는 결과가 나올 때까지 대기 (기존 embed_query와 같은 동기 인터페이스)
+    - 수집 스레드 1개가 큐에서 요청을 모으고, 배치 호출은 max_in_flight 크기 풀에서 실행
+    - 배치 안의 같은 문자열은 한 번만 보냄
+    - 배치 호출이 실패하면 그 배치의 모든 호출자에게 같은 예외 전달
+    - cache가 있으면 (정규화한) 같은 질의는 큐에 넣지 않고 바로 반환
+    """
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        window_ms: float = DEFAULT_WINDOW_MS,
+        max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        name: str = "embed",
+        cache: Optional[QueryEmbeddingCache] = None,
+    ):
+        self.batch_fn = batch_fn
+        self.cache = cache
+        self.window = max(0.0, window_ms) / 1000.0
+        self.max_wait = max(self.window, max_wait_ms / 1000.0)
+        self.max_batch = max(1, max_batch)
+        self.name = name
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix=f"{name}-batch")
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._requests = 0
+        self._batches = 0
+        self._sent_texts = 0
+        self._largest_batch = 0
+
+    # ---------------------------------------------------------
+    # 호출 측
+    # ---------------------------------------------------------
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        if self.cache is not None:
+            text = normalize_query(text)
+            cached = self.cache.get(text)
+            if cached is not None:
+                fut.set_result(cached)
+                return fut
+
+        self._ensure_worker()
+        self._queue.put((text, fut))
+        return fut
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._result(self.submit(text))
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        futures = [self.submit(t) for t in texts]
+        return [self._result(f) for f in futures]
+
+    @staticmethod
+    def _result(fut: Future) -> List[float]:
+        # 요청 마감/취소까지만 기다림 (배치는 다른 요청과 공유하므로 취소하지 않고 결과만 버림)
+        while True:
+            try:
+                return fut.result(timeout=poll_timeout(clamp_timeout(None, "embedding")))
+            except FutureTimeoutError:
+                continue  # 다음 clamp_timeout에서 마감/취소 확인 후 DeadlineExceeded
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await asyncio.wrap_future(self.submit(text))
+
+    # ---------------------------------------------------------
+    # 수집 / 배치 실행
+    # ---------------------------------------------------------
+    def _ensure_worker(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._collect_loop, name=f"{self.name}-collector", daemon=True)
+                self._thread.start()
+
+    def _collect_loop(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = min(self.window, deadline - time.monotonic())
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self._pool.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: List[Tuple[str, Future]]) -> None:
+        unique = list(dict.fromkeys(text for text, _ in batch))
+        try:
+            vectors = self.batch_fn(unique)
+            if len(vectors) != len(unique):
+                raise RuntimeError(f"batch embed returned {len(vectors)} vectors for {len(unique)} texts")
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        by_text = dict(zip(unique, vectors))
+        if self.cache is not None:
+            for text, vector in by_text.items():
+                self.cache.put(text, vector)
+        for text, fut in batch:
+            fut.set_result(by_text[text])
+
+        with self._stats_lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._sent_texts += len(unique)
+            self._largest_batch = max(self._largest_batch, len(batch))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "sent_texts": self._sent_texts,
+                "avg_batch": round(self._requests / self._batches, 2) if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "pending": self._queue.qsize(),
+                "cache": self.cache.stats() if self.cache is not None else None,
+            }
+
+
+class BatchedEmbeddings:
+    """
+    LangChain Embeddings 호환 래퍼 (Chroma(embedding_function=...) 등에 그대로 주입)
+    - embed_documents: 원래 임베딩 객체(passage 모델)로 위임 — 이미 배치 호출
+    - embed_query:     MicroBatchEmbedder(query 모델)로 모아서 호출
+    """
+
+    def __init__(self, documents_backend: Any, query_embedder: MicroBatchEmbedder):
+        self.documents_backend = documents_backend
+        self.query_embedder = query_embedder
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        check_deadline("embedding")
+        return self.documents_backend.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.query_embedder.embed_query(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await self.query_embedder.aembed_query(text)
+
+
+# ---------------------------------------------------------
+# Upstage 질의 임베딩 (모델별 공유 인스턴스)
+# ---------------------------------------------------------
+_QUERY_EMBEDDERS: Dict[str, MicroBatchEmbedder] = {}
+_QUERY_EMBEDDERS_LOCK = threading.Lock()
+
+
+def _query_model_name(model: str) -> str:
+    # langchain_upstage의 embed_query와 같은 질의용 모델 (solar-embedding-1-large -> ...-query)
+    if model.endswith("-query") or model.startswith("embedding-query"):
+        return model
+    if model.endswith("-passage"):
+        model = model[: -len("-passage")]
+    return f"{model}-query"
+
+
+def _upstage_batch_fn(model: str) -> BatchFn:
+    from openai import OpenAI
+
+    client = OpenAI(
+        api_key=os.getenv("UPSTAGE_API_KEY"),
+        base_url=os.getenv("UPSTAGE_BASE_URL", "https://api.upstage.ai/v1"),
+    )
+    query_model = _query_model_name(model)
+
+    def _embed(texts: List[str]) -> List[List[float]]:
+        res = client.embeddings.create(model=query_model, input=texts)
+        return [d.embedding for d in sorted(res.data, key=lambda d: d.index)]
+
+    return _embed
+
+
+def get_query_embedder(model: str = "solar-embedding-1-large") -> MicroBatchEmbedder:
+    """같은 모델을 쓰는 모든 검색 경로(/history/search, Clio 로컬 검색, /agent/query)가 배치/캐시를 공유"""
+    embedder = _QUERY_EMBEDDERS.get(model)
+    if embedder is not None:
+        return embedder
+    with _QUERY_EMBEDDERS_LOCK:
+        if model not in _QUERY_EMBEDDERS:
+            _QUERY_EMBEDDERS[model] = MicroBatchEmbedder(
+                _upstage_batch_fn(model),
+                name=f"embed-{model}",
+                cache=QueryEmbeddingCache(),
+            )
+        return _QUERY_EMBEDDERS[model]
+
+
+def embedder_stats() -> Dict[str, Dict[str, Any]]:
+    return {model: e.stats() for model, e in _QUERY_EMBEDDERS.items()}
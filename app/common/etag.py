@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+
+def file_version(path: str) -> str:
+    """
+    JSON 저장소 파일의 버전 문자열 (stat만 사용하므로 파일을 읽거나 파싱하지 않음)
+    파일이 없으면 "missing"
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return "missing"
+    return f"{st.st_mtime_ns}-{st.st_size}-{st.st_ino}"
+
+
+def make_etag(versions: Iterable[str], variant: str = "") -> str:
+    """
+    저장소 버전(들) + 요청 변형(쿼리스트링 등)으로 weak ETag 생성
+    (gzip 여부와 무관하게 같은 내용이면 같은 태그가 되도록 weak로 둠)
+    """
+    h = hashlib.sha1()
+    for v in versions:
+        h.update(v.encode("utf-8"))
+        h.update(b"|")
+    h.update(variant.encode("utf-8"))
+    return f'W/"{h.hexdigest()[:20]}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # 비교는 weak 비교 (W/ 접두어 무시)
+    target = etag[2:] if etag.startswith("W/") else etag
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == target:
+            return True
+    return False
+
+
+def not_modified(request: Request, response: Response, *paths: str) -> Optional[Response]:
+    """
+    저장소 파일 버전으로 ETag를 계산해 response 헤더에 싣고,
+    클라이언트의 If-None-Match와 같으면 304 응답을 반환합니다. (다르면 None → 정상 처리)
+
+    사용 예:
+        cached = not_modified(request, response, _data_path("plot.json"))
+        if cached:
+            return cached
+    """
+    etag = make_etag((file_version(p) for p in paths), variant=request.url.query)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Optional, TypeVar
+
+from app.common.deadline import check_deadline, current_cancel_token, expired, poll_timeout, remaining
+from app.common.llm_limiter import solar_limiter
+
+T = TypeVar("T")
+
+# 멱등 LLM 호출의 꼬리 지연 줄이기: p95가 지나도 안 끝나면 같은 요청을 한 번 더 보내고 먼저 끝난 쪽 사용
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "on").strip().lower() not in ("0", "off", "false", "no")
+DEFAULT_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))          # 호출 대비 추가 요청 비율 상한 (5%)
+DEFAULT_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+DEFAULT_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))     # 이만큼 지연 표본이 쌓이기 전엔 hedge 안 함
+DEFAULT_MIN_DELAY_MS = float(os.getenv("LLM_HEDGE_MIN_DELAY_MS", "500"))
+DEFAULT_MAX_WORKERS = int(os.getenv("LLM_HEDGE_MAX_WORKERS", "32"))
+
+
+class _KeyStats:
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_denied = 0
+        self.saturated_skips = 0
+
+
+class HedgedCaller:
+    """
+    호출 지점(key)별 최근 지연 분포로 hedge 시점을 정하는 실행기
+
+    - 1차 요청이 key의 최근 p95 안에 끝나면 그대로 반환
+    - 안 끝났으면 (예산 + 동시 한도 여유가 있을 때만) 같은 호출을 한 번 더 보내고 먼저 성공한 결과 사용
+    - 예산: 호출마다 budget 만큼 토큰 적립, hedge 1번에 1 소모 (장기적으로 hedge 비율 <= budget)
+    - 진 쪽 요청은 취소할 수 없으므로 끝날 때까지 돌고, 그 지연도 분포에 반영 (잘린 표본 방지)
+    - 각 시도는 solar_limiter 슬롯을 따로 잡음 → 한도가 꽉 찼으면 hedge 생략 (과부하 때 부하를 키우지 않음)
+    - 요청 마감(deadline_scope)이 있으면 그때까지만 기다리고 DeadlineExceeded (요청이 취소되면 Cancelled)
+
+    부작용이 없는(같은 입력이면 다시 보내도 되는) 호출에만 사용
+    """
+
+    def __init__(
+        self,
+        enabled: bool = HEDGE_ENABLED,
+        budget: float = DEFAULT_BUDGET,
+        percentile: float = DEFAULT_PERCENTILE,
+        min_samples: int = DEFAULT_MIN_SAMPLES,
+        min_delay_ms: float = DEFAULT_MIN_DELAY_MS,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        window: int = 200,
+        limiter: Any = solar_limiter,
+    ):
+        self.enabled = enabled
+        self.budget = budget
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay_ms / 1000.0
+        self.window = window
+        self.limiter = limiter
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self._keys: Dict[str, _KeyStats] = {}
+        self._tokens = 1.0
+        self._max_tokens = 10.0
+
+    def _key(self, key: str) -> _KeyStats:
+        ks = self._keys.get(key)
+        if ks is None:
+            ks = self._keys.setdefault(key, _KeyStats(self.window))
+        return ks
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._key(key).latencies)
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_delay, samples[int(self.percentile * (len(samples) - 1))])
+
+    def _attempt(self, key: str, fn: Callable[[], T]) -> T:
+        t0 = time.monotonic()
+        with self.limiter.slot():
+            result = fn()
+        with self._lock:
+            self._key(key).latencies.append(time.monotonic() - t0)
+        return result
+
+    def _take_budget(self, ks: _KeyStats) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            ks.budget_denied += 1
+            return False
+
+    def _submit(self, key: str, fn: Callable[[], T]) -> Future:
+        # 우선순위/요청 마감 등 contextvar를 작업 스레드로 넘김
+        return self._pool.submit(contextvars.copy_context().run, self._attempt, key, fn)
+
+    def _should_hedge(self, ks: _KeyStats) -> bool:
+        if expired():
+            return False
+        if self.limiter.saturated():
+            with self._lock:
+                ks.saturated_skips += 1
+            return False
+        return self._take_budget(ks)
+
+    def call(self, key: str, fn: Callable[[], T]) -> T:
+        check_deadline("llm")
+        with self._lock:
+            ks = self._key(key)
+            ks.calls += 1
+            self._tokens = min(self._max_tokens, self._tokens + self.budget)
+
+        delay = self.hedge_delay(key) if self.enabled else None
+        if delay is None and remaining() is None and current_cancel_token() is None:
+            return self._attempt(key, fn)
+
+        primary = self._submit(key, fn)
+        pending = {primary}
+        hedge: Optional[Future] = None
+        if delay is not None:
+            left = remaining()
+            done, _ = wait(pending, timeout=delay if left is None else min(delay, left))
+            if done:
+                return primary.result()
+            check_deadline("llm")
+            if self._should_hedge(ks):
+                with self._lock:
+                    ks.hedged += 1
+                hedge = self._submit(key, fn)
+                pending.add(hedge)
+
+        first_error: Optional[BaseException] = None
+        while pending:
+            # 요청 마감/취소: 진행 중인 호출은 결과만 버림 (끝나면 지연 표본으로는 반영됨)
+            check_deadline("llm")
+            done, pending = wait(pending, timeout=poll_timeout(remaining()), return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    if fut is hedge:
+                        with self._lock:
+                            ks.hedge_wins += 1
+                    return fut.result()
+                first_error = first_error or fut.exception()
+        raise first_error  # 모든 시도 실패
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = {}
+            total_calls = total_hedged = 0
+            for key, ks in self._keys.items():
+                samples = sorted(ks.latencies)
+                p95 = samples[int(self.percentile * (len(samples) - 1))] if samples else None
+                keys[key] = {
+                    "calls": ks.calls,
+                    "hedged": ks.hedged,
+                    "hedge_wins": ks.hedge_wins,
+                    "budget_denied": ks.budget_denied,
+                    "saturated_skips": ks.saturated_skips,
+                    "hedge_rate": round(ks.hedged / ks.calls, 4) if ks.calls else 0.0,
+                    "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                    "samples": len(samples),
+                }
+                total_calls += ks.calls
+                total_hedged += ks.hedged
+            return {
+                "enabled": self.enabled,
+                "budget": self.budget,
+                "budget_tokens": round(self._tokens, 2),
+                "hedge_rate": round(total_hedged / total_calls, 4) if total_calls else 0.0,
+                "keys": keys,
+            }
+
+
+# 멱등 Solar 호출 공용 인스턴스
+hedger = HedgedCaller()
+
+
+def hedged_call(key: str, fn: Callable[[], T]) -> T:
+    """hedger.call 단축형: res = hedged_call("world_rules", lambda: chain.invoke(inputs))"""
+    return hedger.call(key, fn)
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# 필터/집계 대상 필드 (tags는 리스트 필드)
+FACET_FIELDS = ("entity_type", "era", "tags")
+
+
+class FacetIndex:
+    """
+    역사 엔티티 facet 역색인
+    - postings: {field: {value: {entity_id, ...}}}
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, Set[str]]] = {f: {} for f in FACET_FIELDS}
+        self.all_ids: Set[str] = set()
+
+    @classmethod
+    def build(cls, entities: Iterable[Dict[str, Any]]) -> "FacetIndex":
+        idx = cls()
+        for e in entities:
+            idx.add(e)
+        return idx
+
+    @staticmethod
+    def _values(entity: Dict[str, Any], field: str) -> List[str]:
+        v = entity.get(field)
+        if isinstance(v, list):
+            return [str(x).strip() for x in v if str(x).strip()]
+        v = str(v or "").strip()
+        return [v] if v else []
+
+    def add(self, entity: Dict[str, Any]) -> None:
+        eid = entity.get("id")
+        if not eid:
+            return
+        self.all_ids.add(eid)
+        for field in FACET_FIELDS:
+            for value in self._values(entity, field):
+                self.postings[field].setdefault(value, set()).add(eid)
+
+    def filter(
+        self,
+        entity_type: Optional[str] = None,
+        era: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Set[str]:
+        """조건을 모두 만족하는(AND) 엔티티 ID 집합. 조건이 없으면 전체"""
+        conditions = []
+        if entity_type:
+            conditions.append(self.postings["entity_type"].get(entity_type, set()))
+        if era:
+            conditions.append(self.postings["era"].get(era, set()))
+        for tag in tags or []:
+            conditions.append(self.postings["tags"].get(tag, set()))
+
+        if not conditions:
+            return set(self.all_ids)
+
+        conditions.sort(key=len)
+        result = set(conditions[0])
+        for c in conditions[1:]:
+            result &= c
+            if not result:
+                break
+        return result
+
+    def counts(self, ids: Optional[Set[str]] = None) -> Dict[str, Dict[str, int]]:
+        """facet별 값 -> 개수 (ids가 주어지면 해당 집합 안에서만 집계)"""
+        out: Dict[str, Dict[str, int]] = {}
+        for field, values in self.postings.items():
+            field_counts = {}
+            for value, members in values.items():
+                n = len(members) if ids is None else len(members & ids)
+                if n:
+                    field_counts[value] = n
+            out[field] = dict(sorted(field_counts.items(), key=lambda x: (-x[1], x[0])))
+        return out
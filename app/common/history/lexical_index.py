@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .storage import write_json_atomic
+
+# 한글은 띄어쓰기/조사 때문에 단어 단위 매칭이 잘 안 되므로 글자 bigram을 색인 단위로 씁니다.
+# (예: "홍릉·유릉" -> ["홍릉", "유릉"], "임진왜란" -> ["임진", "진왜", "왜란"])
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# 필드별 가중치 (이름/태그에 걸리면 설명에 걸린 것보다 점수를 더 줌)
+FIELD_WEIGHTS = {
+    "name": 3,
+    "tags": 2,
+    "era": 1,
+    "summary": 1,
+    "description": 1,
+}
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60
+
+
+def tokenize(text: str) -> List[str]:
+    """글자 bigram 토큰화 (한 글자 단어는 그대로 1개 토큰)"""
+    tokens: List[str] = []
+    for word in _WORD_RE.findall((text or "").lower()):
+        if len(word) == 1:
+            tokens.append(word)
+            continue
+        tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+def _entity_field_text(entity: Dict[str, Any], field: str) -> str:
+    v = entity.get(field)
+    if isinstance(v, list):
+        return " ".join(str(x) for x in v)
+    return str(v or "")
+
+
+class LexicalIndex:
+    """
+    역사 엔티티용 역색인 (BM25)
+    - postings: {token: {entity_id: 가중 tf}}
+    - doc_len:  {entity_id: 가중 토큰 수}
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, int]] = {}
+        self.doc_len: Dict[str, int] = {}
+        self.signature: Optional[List[int]] = None  # 색인을 만든 시점의 history_db.json 시그니처
+
+    # ---------------------------------------------------------
+    # 색인 구성
+    # ---------------------------------------------------------
+    @classmethod
+    def build(cls, entities: Iterable[Dict[str, Any]]) -> "LexicalIndex":
+        idx = cls()
+        for e in entities:
+            idx.add(e)
+        return idx
+
+    def add(self, entity: Dict[str, Any]) -> None:
+        eid = entity.get("id")
+        if not eid:
+            return
+        if eid in self.doc_len:
+            self.remove(eid)
+
+        tf: Dict[str, int] = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for tok in tokenize(_entity_field_text(entity, field)):
+                tf[tok] = tf.get(tok, 0) + weight
+
+        for tok, cnt in tf.items():
+            self.postings.setdefault(tok, {})[eid] = cnt
+        self.doc_len[eid] = sum(tf.values())
+
+    def remove(self, entity_id: str) -> None:
+        if self.doc_len.pop(entity_id, None) is None:
+            return
+        for tok in [t for t, docs in self.postings.items() if entity_id in docs]:
+            docs = self.postings[tok]
+            docs.pop(entity_id, None)
+            if not docs:
+                del self.postings[tok]
+
+    # ---------------------------------------------------------
+    # 검색
+    # ---------------------------------------------------------
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        allowed_ids: Optional[set] = None,
+    ) -> List[Tuple[str, float]]:
+        """BM25 점수 순으로 (entity_id, score) 리스트 반환. allowed_ids가 있으면 그 안에서만"""
+        n_docs = len(self.doc_len)
+        q_tokens = tokenize(query)
+        if not n_docs or not q_tokens:
+            return []
+
+        avgdl = (sum(self.doc_len.values()) / n_docs) or 1.0
+        scores: Dict[str, float] = {}
+
+        for tok in set(q_tokens):
+            docs = self.postings.get(tok)
+            if not docs:
+                continue
+            df = len(docs)
+            idf = math.log((n_docs - df + 0.5) / (df + 0.5) + 1.0)
+            for eid, tf in docs.items():
+                if allowed_ids is not None and eid not in allowed_ids:
+                    continue
+                dl = self.doc_len.get(eid, 0)
+                denom = tf + BM25_K1 * (1 - BM25_B + BM25_B * dl / avgdl)
+                scores[eid] = scores.get(eid, 0.0) + idf * (tf * (BM25_K1 + 1)) / denom
+
+        ranked = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        return ranked[:top_k]
+
+    def candidates(self, query: str) -> Optional[set]:
+        """
+        query의 모든 bigram을 포함하는 엔티티 ID 집합 (부분 문자열 매칭 후보).
+        bigram을 만들 수 없는 짧은 query면 None (호출 측에서 전체 스캔)
+        """
+        q_tokens = [t for t in tokenize(query) if len(t) == 2]
+        if not q_tokens:
+            return None
+
+        result: Optional[set] = None
+        for tok in sorted(set(q_tokens), key=lambda t: len(self.postings.get(t, ()))):
+            docs = self.postings.get(tok)
+            if not docs:
+                return set()
+            result = set(docs) if result is None else (result & docs.keys())
+            if not result:
+                return set()
+        return result
+
+    # ---------------------------------------------------------
+    # 저장 / 로드
+    # ---------------------------------------------------------
+    def save(self, path: str) -> None:
+        write_json_atomic(path, {
+            "signature": self.signature,
+            "doc_len": self.doc_len,
+            "postings": self.postings,
+        })
+
+    @classmethod
+    def load(cls, path: str) -> Optional["LexicalIndex"]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        idx = cls()
+        idx.signature = data.get("signature")
+        idx.doc_len = data.get("doc_len", {})
+        idx.postings = data.get("postings", {})
+        return idx
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[str]:
+    """
+    여러 순위 리스트(ID 순서)를 RRF로 합칩니다.
+    score(d) = Σ 1 / (k + rank_i(d))   (rank는 1부터)
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, eid in enumerate(ranking, start=1):
+            scores[eid] = scores.get(eid, 0.0) + 1.0 / (k + rank)
+    return [eid for eid, _ in sorted(scores.items(), key=lambda x: x[1], reverse=True)]
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+import copy
 import difflib  # <--- [중요] 이 줄이 꼭 추가되어야 합니다!
 import json
 import os
 
+from .facet_index import FacetIndex
+from .lexical_index import LexicalIndex
 from .schema import HistoricalEntity, RelatedEntity
 from .storage import read_json, write_json_atomic
+from app.common.changelog import record_change, record_changes
+from app.common.pagination import paginate_keys
 from app.common.history.vector_store import vector_store
 
 # 한국 시간(KST) 설정
@@ -49,6 +54,90 @@ def _load(db_path: str) -> Dict[str, Any]:
 def _save(db_path: str, data: Dict[str, Any]) -> None:
     data["meta"]["updated_at"] = _now_iso()
     write_json_atomic(db_path, data)
+    # 색인은 여기서 다시 만들지 않음 → 파일 시그니처가 바뀌었으므로 다음 조회 때 한 번만 재구축
+    # (HistoryBatch 밖에서 엔티티를 하나씩 저장해도 저장마다 O(N) 재색인이 생기지 않도록)
+    _ENTITY_MAP_CACHE.pop(db_path, None)
+    _LEXICAL_CACHE.pop(db_path, None)
+    _FACET_CACHE.pop(db_path, None)
+
+# ---------------------------------------------------------
+# [Index] ID -> 엔티티 맵 (파일이 바뀌지 않았으면 재파싱하지 않음)
+# ---------------------------------------------------------
+# db_path -> (파일 시그니처, {id: entity})
+_ENTITY_MAP_CACHE: Dict[str, Tuple[Tuple[int, int, int], Dict[str, Dict[str, Any]]]] = {}
+
+def _file_signature(db_path: str) -> Optional[Tuple[int, int, int]]:
+    try:
+        st = os.stat(db_path)
+    except OSError:
+        return None
+    # write_json_atomic은 os.replace를 쓰므로 저장할 때마다 inode가 바뀜
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+def _entity_map(db_path: str) -> Dict[str, Dict[str, Any]]:
+    sig = _file_signature(db_path)
+    cached = _ENTITY_MAP_CACHE.get(db_path)
+    if sig is not None and cached and cached[0] == sig:
+        return cached[1]
+
+    data = _load(db_path)
+    id_map = {e["id"]: e for e in data["entities"] if e.get("id")}
+    sig = _file_signature(db_path)
+    if sig is not None:
+        _ENTITY_MAP_CACHE[db_path] = (sig, id_map)
+    return id_map
+
+# ---------------------------------------------------------
+# [Index] facet 역색인 (entity_type / era / tags)
+# - 저장(_save) 후 첫 조회 때 재구축, 메모리에만 유지
+# ---------------------------------------------------------
+_FACET_CACHE: Dict[str, Tuple[Optional[Tuple[int, int, int]], FacetIndex]] = {}
+
+def _facet_index(db_path: str) -> FacetIndex:
+    sig = _file_signature(db_path)
+    cached = _FACET_CACHE.get(db_path)
+    if cached and sig is not None and cached[0] == sig:
+        return cached[1]
+
+    idx = FacetIndex.build(_entity_map(db_path).values())
+    _FACET_CACHE[db_path] = (sig, idx)
+    return idx
+
+# ---------------------------------------------------------
+# [Index] 어휘(bigram/BM25) 역색인
+# - 저장(_save) 후 첫 조회 때 재구축하고 history_db.lexical.json으로 영속화
+# - 서버 재시작 시에는 파일 시그니처가 같으면 그대로 로드 (재색인 없음)
+# ---------------------------------------------------------
+_LEXICAL_CACHE: Dict[str, LexicalIndex] = {}
+
+def _lexical_index_path(db_path: str) -> str:
+    return os.path.splitext(db_path)[0] + ".lexical.json"
+
+def _rebuild_lexical_index(db_path: str, entities: List[Dict[str, Any]]) -> LexicalIndex:
+    idx = LexicalIndex.build(entities)
+    sig = _file_signature(db_path)
+    idx.signature = list(sig) if sig else None
+    _LEXICAL_CACHE[db_path] = idx
+    try:
+        idx.save(_lexical_index_path(db_path))
+    except OSError as e:
+        print(f"⚠️ [Repo] 어휘 색인 저장 실패 (메모리 색인은 유지): {e}")
+    return idx
+
+def _lexical_index(db_path: str) -> LexicalIndex:
+    sig = _file_signature(db_path)
+    sig_list = list(sig) if sig else None
+
+    idx = _LEXICAL_CACHE.get(db_path)
+    if idx is not None and idx.signature == sig_list:
+        return idx
+
+    idx = LexicalIndex.load(_lexical_index_path(db_path))
+    if idx is not None and sig_list is not None and idx.signature == sig_list:
+        _LEXICAL_CACHE[db_path] = idx
+        return idx
+
+    return _rebuild_lexical_index(db_path, list(_entity_map(db_path).values()))
 
 # ---------------------------------------------------------
 # [Helper] 벡터 DB 동기화
@@ -76,12 +165,38 @@ def list_entities(db_path: str) -> List[Dict[str, Any]]:
     data = _load(db_path)
     return list(data["entities"])
 
+def list_entities_page(
+    db_path: str,
+    after_id: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    ID 순 keyset 페이지네이션. (items, next_cursor) 반환, 마지막 페이지면 next_cursor=None
+    """
+    id_map = _entity_map(db_path)
+    page_ids, next_cursor = paginate_keys(sorted(id_map), after_id, limit)
+    return [dict(id_map[eid]) for eid in page_ids], next_cursor
+
 def get_entity(db_path: str, entity_id: str) -> Optional[Dict[str, Any]]:
-    data = _load(db_path)
-    for e in data["entities"]:
-        if e.get("id") == entity_id:
-            return e
-    return None
+    e = _entity_map(db_path).get(entity_id)
+    return dict(e) if e is not None else None
+
+def get_entities(db_path: str, entity_ids: List[str]) -> List[Dict[str, Any]]:
+    """
+    여러 ID를 한 번에 조회합니다. (입력 순서 유지, 없는 ID/중복 ID는 건너뜀)
+    파일은 최대 1회만 읽고, 이후에는 ID 맵에서 O(1)로 찾습니다.
+    """
+    id_map = _entity_map(db_path)
+    out = []
+    seen = set()
+    for eid in entity_ids:
+        if eid in seen:
+            continue
+        seen.add(eid)
+        e = id_map.get(eid)
+        if e is not None:
+            out.append(dict(e))
+    return out
 
 def normalize_string(s: str) -> str:
     """비교를 위해 특수문자와 공백을 제거하는 헬퍼 함수"""
@@ -91,18 +206,12 @@ def normalize_string(s: str) -> str:
         result = result.replace(char, "")
     return result
 
-def find_id_by_name(db_path: str, name: str) -> Optional[str]:
-    """
-    이름으로 ID 찾기 (4단계 매칭 알고리즘)
-    1. 정확 일치 -> 2. 정규화 일치 -> 3. 포함 관계 -> 4. 순서 포함(Subsequence) -> 5. 유사도
-    """
+def _find_id_in(entities: List[Dict[str, Any]], name: str) -> Optional[str]:
+    """이미 로드된 엔티티 리스트에서 이름으로 ID 찾기 (find_id_by_name / HistoryBatch 공용)"""
     target_raw = (name or "").strip()
     if not target_raw:
         return None
 
-    data = _load(db_path)
-    entities = data["entities"]
-
     # 1. [100%] 정확한 일치
     for e in entities:
         if e.get("name") == target_raw:
@@ -140,29 +249,89 @@ def find_id_by_name(db_path: str, name: str) -> Optional[str]:
 
     return None
 
-def search_by_keyword(db_path: str, keyword: str) -> List[Dict[str, Any]]:
+def find_id_by_name(db_path: str, name: str) -> Optional[str]:
+    """
+    이름으로 ID 찾기 (4단계 매칭 알고리즘)
+    1. 정확 일치 -> 2. 정규화 일치 -> 3. 포함 관계 -> 4. 순서 포함(Subsequence) -> 5. 유사도
+    """
+    if not (name or "").strip():
+        return None
     data = _load(db_path)
+    return _find_id_in(data["entities"], name)
+
+def search_by_keyword(db_path: str, keyword: str) -> List[Dict[str, Any]]:
     results = []
     keyword = keyword.lower().strip()
 
-    for e in data["entities"]:
+    # bigram 역색인으로 후보를 먼저 좁힌 뒤, 후보에 대해서만 부분 문자열 검사
+    id_map = _entity_map(db_path)
+    candidate_ids = _lexical_index(db_path).candidates(keyword)
+    if candidate_ids is None:
+        pool = list(id_map.values())
+    else:
+        pool = [e for eid, e in id_map.items() if eid in candidate_ids]
+
+    for e in pool:
         searchable_text = f"{e.get('name')} {' '.join(e.get('tags', []))} {e.get('summary')} {e.get('era')}".lower()
         if keyword in searchable_text:
-            results.append(e)
+            results.append(dict(e))
     return results
 
 
+def search_lexical(
+    db_path: str,
+    query: str,
+    top_k: int = 10,
+    allowed_ids: Optional[set] = None,
+) -> List[Tuple[str, float]]:
+    """bigram BM25 검색 결과 (entity_id, score) 리스트. allowed_ids가 있으면 그 안에서만"""
+    return _lexical_index(db_path).search(query, top_k=top_k, allowed_ids=allowed_ids)
+
+def filter_entity_ids(
+    db_path: str,
+    entity_type: Optional[str] = None,
+    era: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+) -> set:
+    """facet 조건(AND)을 만족하는 엔티티 ID 집합"""
+    return _facet_index(db_path).filter(entity_type=entity_type, era=era, tags=tags)
+
+def filter_entities(
+    db_path: str,
+    entity_type: Optional[str] = None,
+    era: Optional[str] = None,
+    tags: Optional[List[str]] = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> Dict[str, Any]:
+    """
+    facet 필터 + 페이지네이션 + facet별 개수
+    items는 DB 저장 순서를 유지합니다.
+    """
+    idx = _facet_index(db_path)
+    ids = idx.filter(entity_type=entity_type, era=era, tags=tags)
+    id_map = _entity_map(db_path)
+    ordered = [eid for eid in id_map if eid in ids]
+
+    return {
+        "total": len(ordered),
+        "offset": offset,
+        "limit": limit,
+        "items": [dict(id_map[eid]) for eid in ordered[offset:offset + limit]],
+        "facets": idx.counts(ids),
+    }
+
+
 # ---------------------------------------------------------
-# [Write] 변경 기능 (Create, Update, Delete)
+# [Write] 메모리 내 변경 (파일 I/O 없음)
 # ---------------------------------------------------------
 
-def create_entity(db_path: str, payload: Dict[str, Any], auto_sync: bool = True) -> Dict[str, Any]:
-    data = _load(db_path)
+def _apply_create(data: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
     existing_ids = [e.get("id", "") for e in data["entities"]]
 
     # ID 생성
     eid = payload.get("id") or _next_id(existing_ids)
-    if any(e.get("id") == eid for e in data["entities"]):
+    if eid in existing_ids:
         raise ValueError(f"Entity ID already exists: {eid}")
 
     now = _now_iso()
@@ -178,18 +347,10 @@ def create_entity(db_path: str, payload: Dict[str, Any], auto_sync: bool = True)
     except Exception as e:
         raise ValueError(f"Invalid entity data: {e}")
 
-    # 1. JSON DB 저장
     data["entities"].append(final_data)
-    _save(db_path, data)
-
-    # 👇 auto_sync가 True일 때만 동기화 수행
-    if auto_sync:
-        _sync_vector_db(db_path)
-
     return final_data
 
-def update_entity(db_path: str, entity_id: str, patch: Dict[str, Any], auto_sync: bool = True) -> Dict[str, Any]:
-    data = _load(db_path)
+def _apply_update(data: Dict[str, Any], entity_id: str, patch: Dict[str, Any]) -> Dict[str, Any]:
     for i, e in enumerate(data["entities"]):
         if e.get("id") == entity_id:
             updated = dict(e)
@@ -204,29 +365,26 @@ def update_entity(db_path: str, entity_id: str, patch: Dict[str, Any], auto_sync
                     for r in rels
                 ]
 
-            # 1. JSON DB 저장
             data["entities"][i] = updated
-            _save(db_path, data)
-
-            # 👇 auto_sync가 True일 때만 동기화 수행
-            if auto_sync:
-                _sync_vector_db(db_path)
-
             return updated
 
     raise KeyError(f"Entity not found: {entity_id}")
 
-def delete_entity(db_path: str, entity_id: str, auto_sync: bool = True) -> bool:
-    data = _load(db_path)
+def _apply_delete(data: Dict[str, Any], entity_id: str) -> List[str]:
+    """
+    엔티티를 삭제하고, 관계 정리(Cascade)로 함께 수정된 엔티티 ID 목록을 반환합니다.
+    삭제할 대상이 없으면 KeyError.
+    """
     before_count = len(data["entities"])
 
     # 본체 삭제
     data["entities"] = [e for e in data["entities"] if e.get("id") != entity_id]
 
     if len(data["entities"]) == before_count:
-        return False # 삭제된 게 없음
+        raise KeyError(f"Entity not found: {entity_id}")
 
     # 관계 데이터 정리 (Cascade 유사 효과)
+    touched = []
     for e in data["entities"]:
         rels = e.get("related_entities", [])
         if not rels:
@@ -235,9 +393,56 @@ def delete_entity(db_path: str, entity_id: str, auto_sync: bool = True) -> bool:
         if len(new_rels) != len(rels):
             e["related_entities"] = new_rels
             e["updated_at"] = _now_iso()
+            touched.append(e.get("id"))
+    return touched
+
+
+# ---------------------------------------------------------
+# [Write] 변경 기능 (Create, Update, Delete)
+# ---------------------------------------------------------
+
+def create_entity(db_path: str, payload: Dict[str, Any], auto_sync: bool = True) -> Dict[str, Any]:
+    data = _load(db_path)
+    final_data = _apply_create(data, payload)
+
+    # 1. JSON DB 저장
+    _save(db_path, data)
+    record_change("history", "upsert", final_data["id"], final_data)
+
+    # 👇 auto_sync가 True일 때만 동기화 수행
+    if auto_sync:
+        _sync_vector_db(db_path)
+
+    return final_data
+
+def update_entity(db_path: str, entity_id: str, patch: Dict[str, Any], auto_sync: bool = True) -> Dict[str, Any]:
+    data = _load(db_path)
+    updated = _apply_update(data, entity_id, patch)
+
+    # 1. JSON DB 저장
+    _save(db_path, data)
+    record_change("history", "upsert", entity_id, updated)
+
+    # 👇 auto_sync가 True일 때만 동기화 수행
+    if auto_sync:
+        _sync_vector_db(db_path)
+
+    return updated
+
+def delete_entity(db_path: str, entity_id: str, auto_sync: bool = True) -> bool:
+    data = _load(db_path)
+    try:
+        touched = _apply_delete(data, entity_id)
+    except KeyError:
+        return False # 삭제된 게 없음
 
     # 1. JSON DB 저장
     _save(db_path, data)
+    id_map = {e.get("id"): e for e in data["entities"]}
+    record_changes(
+        [("history", "delete", entity_id, None)]
+        + [("history", "upsert", tid, id_map[tid]) for tid in touched if tid in id_map]
+    )
 
     # 👇 auto_sync가 True일 때만 동기화 수행
     if auto_sync:
@@ -245,6 +450,105 @@ def delete_entity(db_path: str, entity_id: str, auto_sync: bool = True) -> bool:
 
     return True
 
+
+# ---------------------------------------------------------
+# [Write] 일괄 처리 (Unit of Work)
+# ---------------------------------------------------------
+
+class HistoryBatch:
+    """
+    history_db.json을 한 번만 읽고, 모든 Create/Update/Delete를 메모리에서 적용한 뒤
+    commit 시 한 번만 저장 + 변경분만 벡터 DB에 반영합니다.
+
+    사용 예:
+        with history_repo.batch(HISTORY_DB_PATH) as b:
+            eid = b.find_id_by_name("홍릉")
+            b.update_entity(eid, {...})
+            b.create_entity({...})
+        # with 블록이 예외 없이 끝나면 자동 commit, 예외 시 아무것도 저장하지 않음
+    """
+
+    def __init__(self, db_path: str, auto_sync: bool = True):
+        self.db_path = db_path
+        self.auto_sync = auto_sync
+        self._data = _load(db_path)
+        self._dirty_ids: set = set()     # 생성/수정된 ID (벡터 upsert 대상)
+        self._deleted_ids: set = set()   # 삭제된 ID (벡터 delete 대상)
+        self._committed = False
+
+    def __enter__(self) -> "HistoryBatch":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None and not self._committed:
+            self.commit()
+        return False
+
+    # --- Read (메모리) ---
+    def list_entities(self) -> List[Dict[str, Any]]:
+        return list(self._data["entities"])
+
+    def get_entity(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        # 복사본 반환 (고쳐도 배치에 반영되지 않음 → 변경은 update_entity로)
+        for e in self._data["entities"]:
+            if e.get("id") == entity_id:
+                return copy.deepcopy(e)
+        return None
+
+    def find_id_by_name(self, name: str) -> Optional[str]:
+        return _find_id_in(self._data["entities"], name)
+
+    # --- Write (메모리) ---
+    def create_entity(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        created = _apply_create(self._data, payload)
+        self._dirty_ids.add(created["id"])
+        self._deleted_ids.discard(created["id"])
+        return created
+
+    def update_entity(self, entity_id: str, patch: Dict[str, Any]) -> Dict[str, Any]:
+        updated = _apply_update(self._data, entity_id, patch)
+        self._dirty_ids.add(entity_id)
+        return updated
+
+    def delete_entity(self, entity_id: str) -> bool:
+        try:
+            touched = _apply_delete(self._data, entity_id)
+        except KeyError:
+            return False
+        self._dirty_ids.discard(entity_id)
+        self._deleted_ids.add(entity_id)
+        self._dirty_ids.update(touched)
+        return True
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self._dirty_ids or self._deleted_ids)
+
+    def commit(self) -> None:
+        """변경 사항이 있으면 JSON 1회 저장 + 벡터 DB 증분 반영 1회"""
+        self._committed = True
+        if not self.has_changes:
+            return
+
+        _save(self.db_path, self._data)
+
+        changed = [e for e in self._data["entities"] if e.get("id") in self._dirty_ids]
+        record_changes(
+            [("history", "delete", eid, None) for eid in sorted(self._deleted_ids)]
+            + [("history", "upsert", e["id"], e) for e in changed]
+        )
+
+        if self.auto_sync:
+            try:
+                vector_store.apply_changes(upserts=changed, delete_ids=list(self._deleted_ids))
+                print(f"✅ [Repo] 벡터 DB 증분 반영 (upsert {len(changed)}건, delete {len(self._deleted_ids)}건)")
+            except Exception as e:
+                print(f"⚠️ [Repo] 벡터 DB 증분 반영 실패: {e}")
+
+
+def batch(db_path: str, auto_sync: bool = True) -> HistoryBatch:
+    return HistoryBatch(db_path, auto_sync=auto_sync)
+
 def upsert_material(db_path: str, new_material_data: dict):
     """
     ID를 기준으로 기존 데이터가 있으면 교체(Update), 없으면 추가(Insert)
@@ -299,6 +603,7 @@ def upsert_material(db_path: str, new_material_data: dict):
         json.dump(all_materials, f, ensure_ascii=False, indent=4)
 
     print(f"💾 Material {action}: {new_material_data.get('title', 'No Title')}")
+    record_change("material", "upsert", new_material_data["id"], new_material_data)
     return new_material_data
 
 def get_material(db_path: str, material_id: str) -> Optional[Dict[str, Any]]:
@@ -355,6 +660,7 @@ def delete_material(db_path: str, material_id: str) -> bool:
             json.dump(new_materials, f, ensure_ascii=False, indent=4)
 
         print(f"🗑️ Material 삭제 완료: {material_id}")
+        record_change("material", "delete", material_id)
         return True
 
     except Exception as e:
@@ -1,38 +1,68 @@
 # app/common/history/vector_store.py
-from typing import List, Dict, Any
+from __future__ import annotations
+
+import threading
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 
-import os
 from dotenv import load_dotenv
 load_dotenv()
 
-import chromadb
-from langchain_chroma import Chroma
-from langchain_upstage import UpstageEmbeddings
-from langchain_core.documents import Document
+# chromadb / LangChain은 import만으로도 무겁고, 클라이언트 생성은 네트워크를 탑니다.
+# 모듈 import 시점이 아니라 벡터 DB를 처음 쓰는 시점에 로드/연결합니다.
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
 # 벡터 DB가 저장될 로컬 폴더 경로
 #PERSIST_DIRECTORY = "app/data/chroma_db"
 
+COLLECTION_NAME = "history_collection"
+
+
 class HistoryVectorStore:
     def __init__(self):
-        # 1. 임베딩 모델 설정 (Upstage Solar)
-        self.embedding_model = UpstageEmbeddings(model="solar-embedding-1-large")
-
-        # [변경 3] 환경변수에서 ChromaDB 접속 정보 가져오기
-        # Kubernetes Service 이름이 'chromadb'라면 host 기본값을 'chromadb'로 설정
-        chroma_host = os.getenv("CHROMA_HOST", "chromadb")
-        chroma_port = os.getenv("CHROMA_PORT", "8000")
-
-        # [변경 4] HttpClient 생성 (서버 접속용)
-        # 로컬 파일에 쓰는 것이 아니라, http://chromadb:8000 으로 접속합니다.
-        self.client = chromadb.HttpClient(host=chroma_host, port=int(chroma_port))
-
-        # [변경 5] Chroma 초기화 시 client 주입
-        self.vector_db = Chroma(
-            client=self.client,
-            collection_name="history_collection",
+        self._lock = threading.Lock()
+        self.embedding_model = None
+        self._vector_db = None
+        self._generation = None  # 래퍼를 만든 시점의 연결 generation (재연결되면 다시 만듦)
+
+    @property
+    def client(self):
+        # 공용 연결 매니저의 클라이언트 (app.core.db) — 별도 HttpClient를 만들지 않음
+        from app.core.db import get_chroma_client
+        return get_chroma_client()
+
+    @property
+    def vector_db(self):
+        from app.core.db import get_connection_manager
+        manager = get_connection_manager()
+        if self._vector_db is None or self._generation != manager.generation:
+            with self._lock:
+                if self._vector_db is None or self._generation != manager.generation:
+                    self._connect()
+        return self._vector_db
+
+    def _connect(self):
+        from app.core.db import get_connection_manager
+        from langchain_chroma import Chroma
+
+        # 1. 임베딩 모델 설정 (Upstage Solar) — 재연결 시에도 재사용
+        #    검색 질의 임베딩은 동시 요청끼리 모아 배치 호출 (app.common.embedding)
+        if self.embedding_model is None:
+            from langchain_upstage import UpstageEmbeddings
+            from app.common.embedding import BatchedEmbeddings, get_query_embedder
+            self.embedding_model = BatchedEmbeddings(
+                UpstageEmbeddings(model="solar-embedding-1-large"),
+                get_query_embedder("solar-embedding-1-large"),
+            )
+
+        # 2. 공용 연결(HttpClient + 컬렉션 캐시)을 주입
+        manager = get_connection_manager()
+        self._vector_db = Chroma(
+            client=manager.client,
+            collection_name=COLLECTION_NAME,
             embedding_function=self.embedding_model,
         )
+        self._generation = manager.generation
 
     def sync_from_json(self, entities: List[Dict[str, Any]]):
         """
@@ -41,6 +71,8 @@ class HistoryVectorStore:
         """
         print(f"🔄 벡터 DB 동기화 시작... ({len(entities)}건)")
 
+        from app.core.db import get_connection_manager
+
         try:
             self.vector_db.delete_collection()
         except Exception:
@@ -48,49 +80,84 @@ class HistoryVectorStore:
             pass
 
         # 컬렉션 삭제 후 객체 재연결 (LangChain Chroma 특성상 안전하게 재할당)
-        self.vector_db = Chroma(
-            client=self.client,
-            collection_name="history_collection",
-            embedding_function=self.embedding_model,
-        )
+        # 다른 소비자(ManuscriptRepository)가 캐시한 옛 컬렉션 핸들도 버림
+        get_connection_manager().invalidate_collection(COLLECTION_NAME)
+        with self._lock:
+            self._connect()
 
         # 2. Document 객체 리스트 생성
-        documents = []
-        for item in entities:
-            # [중요] 검색에 걸리게 하고 싶은 텍스트를 하나로 합칩니다.
-            # 이름, 시대, 요약, 설명, 태그를 모두 포함해야 검색이 잘 됩니다.
-            content_text = (
-                f"이름: {item['name']}\n"
-                f"시대: {item.get('era', '')}\n"
-                f"유형: {item.get('entity_type', '')}\n"
-                f"요약: {item.get('summary', '')}\n"
-                f"설명: {item.get('description', '')}\n"
-                f"태그: {', '.join(item.get('tags', []))}"
-            )
-
-            # 메타데이터에는 원본 ID와 이름 등을 넣어두어 나중에 매칭하기 쉽게 함
-            doc = Document(
-                page_content=content_text,
-                metadata={
-                    "id": item["id"],
-                    "name": item["name"],
-                    "entity_type": item.get("entity_type", "Unknown")
-                }
-            )
-            documents.append(doc)
+        documents = [self._to_document(item) for item in entities]
 
         # 3. 벡터 DB에 삽입 (자동으로 임베딩 변환됨)
         if documents:
-            self.vector_db.add_documents(documents)
+            self.vector_db.add_documents(documents, ids=[d.metadata["id"] for d in documents])
             print("✅ 벡터 DB 동기화 완료!")
 
-    def search(self, query: str, top_k: int = 3):
+    def apply_changes(self, upserts: List[Dict[str, Any]], delete_ids: List[str]):
+        """
+        변경된 엔티티만 증분 반영합니다. (HistoryBatch.commit에서 1회 호출)
+        - upserts: 생성/수정된 엔티티 → 같은 ID로 덮어쓰기
+        - delete_ids: 삭제된 엔티티 ID
+        """
+        if delete_ids:
+            self.vector_db.delete(ids=list(delete_ids))
+
+        if upserts:
+            documents = [self._to_document(item) for item in upserts]
+            self.vector_db.add_documents(documents, ids=[d.metadata["id"] for d in documents])
+
+    @staticmethod
+    def _to_document(item: Dict[str, Any]) -> "Document":
+        from langchain_core.documents import Document
+
+        # [중요] 검색에 걸리게 하고 싶은 텍스트를 하나로 합칩니다.
+        # 이름, 시대, 요약, 설명, 태그를 모두 포함해야 검색이 잘 됩니다.
+        content_text = (
+            f"이름: {item['name']}\n"
+            f"시대: {item.get('era', '')}\n"
+            f"유형: {item.get('entity_type', '')}\n"
+            f"요약: {item.get('summary', '')}\n"
+            f"설명: {item.get('description', '')}\n"
+            f"태그: {', '.join(item.get('tags', []))}"
+        )
+
+        # 메타데이터에는 원본 ID와 이름 등을 넣어두어 나중에 매칭하기 쉽게 함
+        return Document(
+            page_content=content_text,
+            metadata={
+                "id": item["id"],
+                "name": item["name"],
+                "entity_type": item.get("entity_type", "Unknown"),
+                "era": item.get("era", ""),
+            }
+        )
+
+    def search(self, query: str, top_k: int = 3, where: Optional[Dict[str, Any]] = None):
         """
         유사도 검색 수행
+        - where: Chroma 메타데이터 필터 (build_where()로 생성). 주어지면 해당 유형/시대만 검색
         """
         # 유사도 점수와 함께 반환 (score가 낮을수록 유사함 - 거리 기반일 경우)
-        results = self.vector_db.similarity_search_with_score(query, k=top_k)
+        results = self.vector_db.similarity_search_with_score(query, k=top_k, filter=where)
         return results
 
-# 싱글톤 인스턴스
-vector_store = HistoryVectorStore()
\ No newline at end of file
+
+def build_where(entity_type: Optional[str] = None, era: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    facet 필터를 Chroma where 절로 변환합니다.
+    (tags는 리스트라 Chroma 메타데이터에 넣지 않으므로 호출 측에서 후처리)
+    """
+    conditions = []
+    if entity_type:
+        conditions.append({"entity_type": entity_type})
+    if era:
+        conditions.append({"era": era})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+# 싱글톤 인스턴스 (생성은 가볍고, Chroma 연결/임베딩 모델은 첫 사용 시)
+vector_store = HistoryVectorStore()
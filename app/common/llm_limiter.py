@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import contextvars
+import heapq
+import itertools
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from app.common.deadline import DeadlineExceeded, check_deadline, clamp_timeout, cut_error, poll_timeout
+
+# Solar 동시 호출 한도 (AIMD로 이 범위 안에서 자동 조절)
+DEFAULT_INITIAL = int(os.getenv("LLM_LIMIT_INITIAL", "8"))
+DEFAULT_MIN = int(os.getenv("LLM_LIMIT_MIN", "1"))
+DEFAULT_MAX = int(os.getenv("LLM_LIMIT_MAX", "32"))
+DEFAULT_LATENCY_TARGET_MS = float(os.getenv("LLM_LATENCY_TARGET_MS", "30000"))  # 이보다 느리면 혼잡으로 봄
+DEFAULT_BACKOFF = float(os.getenv("LLM_LIMIT_BACKOFF", "0.7"))                    # 혼잡 시 한도 *= backoff
+DEFAULT_BACKGROUND_SHARE = float(os.getenv("LLM_LIMIT_BACKGROUND_SHARE", "0.5"))  # 백그라운드 작업이 쓸 수 있는 한도 비율
+DEFAULT_ACQUIRE_TIMEOUT_S = float(os.getenv("LLM_LIMIT_ACQUIRE_TIMEOUT_S", "300"))
+
+# 작은 값이 먼저 (대화형 피드백 > 대량 적재)
+PRIORITIES = {"interactive": 0, "background": 1}
+
+_PRIORITY: contextvars.ContextVar[str] = contextvars.ContextVar("llm_priority", default="interactive")
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """
+    이 블록 안의 LLM 호출 우선순위 지정 (기본 interactive)
+
+        with llm_priority("background"):
+            manager.summarize_and_save(...)
+
+    contextvar라서 같은 스레드/코루틴 안에서만 적용됨 (스레드 풀로 넘기면 기본값)
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"unknown llm priority: {priority}")
+    token = _PRIORITY.set(priority)
+    try:
+        yield
+    finally:
+        _PRIORITY.reset(token)
+
+
+def _is_throttled(exc: BaseException) -> bool:
+    # status_code(openai.APIStatusError / requests·httpx 응답) 또는 예외 타입(openai.RateLimitError)으로 판단
+    # LangChain 등이 감싼 예외는 __cause__/__context__까지 확인
+    # 메시지 속 "429"(토큰 수, ID 등)는 보지 않음 → 문구는 rate limit / too many requests만
+    seen = set()
+    e: Optional[BaseException] = exc
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        if type(e).__name__ == "RateLimitError":
+            return True
+        for obj in (e, getattr(e, "response", None)):
+            if getattr(obj, "status_code", None) == 429:
+                return True
+        text = str(e).lower()
+        if "rate limit" in text or "too many requests" in text:
+            return True
+        e = e.__cause__ or e.__context__
+    return False
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    return isinstance(exc, TimeoutError) or "timeout" in type(exc).__name__.lower() or "timed out" in str(exc).lower()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    프로세스 전역 LLM 동시 호출 제한기 (AIMD)
+
+    - 한도가 찬 상태에서 성공 & 지연 목표 이내: 한도 += 1/한도 (한도만큼 성공하면 +1, additive increase)
+    - 429 / 타임아웃 / 지연 목표 초과: 한도 *= backoff (multiplicative decrease, cooldown 동안 1번만)
+    - 자리가 나면 우선순위 높은(interactive) 대기자부터 통과
+    - background는 한도의 background_share까지만 점유 → 대화형 요청 몫을 항상 남겨 둠
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: int = DEFAULT_INITIAL,
+        min_limit: int = DEFAULT_MIN,
+        max_limit: int = DEFAULT_MAX,
+        latency_target_ms: float = DEFAULT_LATENCY_TARGET_MS,
+        backoff: float = DEFAULT_BACKOFF,
+        background_share: float = DEFAULT_BACKGROUND_SHARE,
+        cooldown_s: float = 2.0,
+        window: int = 200,
+    ):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.latency_target = latency_target_ms / 1000.0
+        self.backoff = backoff
+        self.background_share = background_share
+        self.cooldown = cooldown_s
+
+        self._cond = threading.Condition()
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._in_flight = {p: 0 for p in PRIORITIES}
+        self._last_decrease = 0.0
+
+        self._recent: Deque[Tuple[float, str]] = deque(maxlen=window)  # (latency_s, outcome)
+        self._counts = {"ok": 0, "throttled": 0, "timeout": 0, "error": 0, "cancelled": 0}
+        self._decreases = 0
+        self._max_queue_wait = 0.0
+
+    # ---------------------------------------------------------
+    # 획득 / 반납
+    # ---------------------------------------------------------
+    def _can_start(self, priority: str) -> bool:
+        total = sum(self._in_flight.values())
+        if total >= int(self.limit):
+            return False
+        if priority == "background":
+            cap = max(1, int(self.limit * self.background_share))
+            return self._in_flight["background"] < cap
+        return True
+
+    def acquire(self, priority: Optional[str] = None, timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT_S) -> Tuple[str, float]:
+        priority = priority or _PRIORITY.get()
+        entry = (PRIORITIES.get(priority, 0), next(self._seq))
+        t0 = time.monotonic()
+        # 요청 마감(deadline_scope)이 더 이르면 그때까지만 대기, 요청이 취소되면 대기열에서 빠짐
+        wait_for = clamp_timeout(timeout, "llm")
+        deadline = t0 + wait_for if wait_for else None
+        cut_by_request = wait_for is not None and (not timeout or wait_for < timeout)
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while not (self._waiters[0] == entry and self._can_start(priority)):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        if cut_by_request:
+                            raise cut_error("llm")
+                        raise TimeoutError(f"{self.name} LLM 동시 호출 대기 시간 초과 ({timeout}s)")
+                    check_deadline("llm")
+                    self._cond.wait(poll_timeout(remaining))
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+            self._in_flight[priority] += 1
+            started = time.monotonic()
+            self._max_queue_wait = max(self._max_queue_wait, started - t0)
+        return priority, started
+
+    def release(self, token: Tuple[str, float], outcome: str = "ok") -> None:
+        priority, started = token
+        latency = time.monotonic() - started
+
+        with self._cond:
+            # 한도가 실제로 병목이었을 때만 늘림 (한가할 때 한도만 부풀어 오르는 것 방지)
+            saturated = bool(self._waiters) or sum(self._in_flight.values()) >= int(self.limit)
+            self._in_flight[priority] -= 1
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+            if outcome != "cancelled":
+                self._recent.append((latency, outcome))
+
+            congested = outcome in ("throttled", "timeout") or (outcome == "ok" and latency > self.latency_target)
+            now = time.monotonic()
+            if congested:
+                if now - self._last_decrease >= self.cooldown:
+                    self.limit = max(float(self.min_limit), self.limit * self.backoff)
+                    self._last_decrease = now
+                    self._decreases += 1
+                    print(f"🚦 [{self.name}] 혼잡 감지({outcome}, {latency * 1000:.0f}ms) → 동시 한도 {self.limit:.1f}")
+            elif outcome == "ok" and saturated:
+                self.limit = min(float(self.max_limit), self.limit + 1.0 / self.limit)
+
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None) -> Iterator[None]:
+        """LLM 호출 1건을 감싸는 구간. 예외 종류(429/타임아웃)로 혼잡 여부를 판단"""
+        token = self.acquire(priority)
+        outcome = "ok"
+        try:
+            yield
+        except GeneratorExit:
+            outcome = "cancelled"
+            raise
+        except DeadlineExceeded:
+            # 요청 마감/취소로 끊은 건 서버 혼잡이 아님 (한도를 줄이지 않음)
+            outcome = "cancelled"
+            raise
+        except BaseException as e:
+            outcome = "throttled" if _is_throttled(e) else "timeout" if _is_timeout(e) else "error"
+            raise
+        finally:
+            self.release(token, outcome)
+
+    def saturated(self) -> bool:
+        """대기자가 있거나 한도가 꽉 찼는지 (hedge 등 부가 요청을 보내도 되는지 판단용)"""
+        with self._cond:
+            return bool(self._waiters) or sum(self._in_flight.values()) >= int(self.limit)
+
+    # ---------------------------------------------------------
+    # 지표
+    # ---------------------------------------------------------
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            recent = list(self._recent)
+            waiting = {p: 0 for p in PRIORITIES}
+            by_rank = {v: k for k, v in PRIORITIES.items()}
+            for rank, _ in self._waiters:
+                waiting[by_rank.get(rank, "interactive")] += 1
+            out = {
+                "limit": round(self.limit, 2),
+                "effective_limit": int(self.limit),
+                "in_flight": dict(self._in_flight),
+                "waiting": waiting,
+                "counts": dict(self._counts),
+                "decreases": self._decreases,
+                "max_queue_wait_ms": round(self._max_queue_wait * 1000, 1),
+            }
+
+        latencies = sorted(l for l, o in recent if o == "ok")
+        out["recent_p50_ms"] = round(statistics.median(latencies) * 1000, 1) if latencies else None
+        out["recent_p95_ms"] = round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None
+        out["recent_throttle_rate"] = round(sum(1 for _, o in recent if o == "throttled") / len(recent), 4) if recent else 0.0
+        return out
+
+
+# Upstage Solar chat 호출 공용 제한기 (모든 호출 지점이 이 인스턴스를 거침)
+solar_limiter = AdaptiveConcurrencyLimiter("solar")
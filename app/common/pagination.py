@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import base64
+import bisect
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# ---------------------------------------------------------
+# 커서 (opaque 문자열: "마지막으로 받은 키"를 base64url로 감쌈)
+# ---------------------------------------------------------
+def encode_cursor(last_key: Any) -> str:
+    raw = str(last_key).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    """잘못된 커서는 ValueError"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+    except Exception:
+        raise ValueError(f"invalid cursor: {cursor}")
+
+
+def paginate_keys(
+    sorted_keys: List[Any],
+    after: Optional[Any],
+    limit: int,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    정렬된 키 목록에서 after 다음부터 limit개를 잘라 (page_keys, next_cursor) 반환.
+    after가 삭제된 키여도 정렬 위치 기준으로 이어서 줍니다 (keyset pagination).
+    """
+    start = bisect.bisect_right(sorted_keys, after) if after is not None else 0
+    page = sorted_keys[start:start + limit]
+    has_more = start + limit < len(sorted_keys)
+    next_cursor = encode_cursor(page[-1]) if (page and has_more) else None
+    return page, next_cursor
+
+
+# ---------------------------------------------------------
+# 필드 projection (?fields=id,name,summary)
+# ---------------------------------------------------------
+def parse_fields(fields: Optional[str], always: Iterable[str] = ()) -> Optional[List[str]]:
+    """콤마 구분 문자열 -> 필드 목록 (없으면 None = 전체)"""
+    if not fields or not fields.strip():
+        return None
+    out: List[str] = []
+    for f in list(always) + fields.split(","):
+        f = f.strip()
+        if f and f not in out:
+            out.append(f)
+    return out
+
+
+def project(item: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if fields is None:
+        return item
+    return {k: item[k] for k in fields if k in item}
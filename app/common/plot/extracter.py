@@ -4,6 +4,7 @@ from langchain_upstage import ChatUpstage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from dotenv import load_dotenv
+from app.common.llm_limiter import solar_limiter
 
 load_dotenv()
 
@@ -48,10 +49,11 @@ class PlotManager:
         ])
 
         chain = prompt | self.llm | self.parser
-        updated_result = chain.invoke({
-            "existing_data": json.dumps(existing_data, ensure_ascii=False),
-            "new_input": new_input_text
-        })
+        with solar_limiter.slot():
+            updated_result = chain.invoke({
+                "existing_data": json.dumps(existing_data, ensure_ascii=False),
+                "new_input": new_input_text
+            })
 
         # 결과 저장
         with open(self.output_file, 'w', encoding='utf-8') as f:
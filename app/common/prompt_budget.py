@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+# Solar 컨텍스트 창 / 답변용 예약 토큰 (모델을 바꾸면 환경변수로 조정)
+DEFAULT_CONTEXT_TOKENS = int(os.getenv("PROMPT_CONTEXT_TOKENS", "32768"))
+DEFAULT_OUTPUT_RESERVE = int(os.getenv("PROMPT_OUTPUT_RESERVE_TOKENS", "4096"))
+# tiktoken(cl100k)은 Solar 토크나이저와 다르므로 예산의 일부만 사용
+DEFAULT_SAFETY = float(os.getenv("PROMPT_TOKEN_SAFETY", "0.9"))
+TIKTOKEN_ENCODING = os.getenv("TIKTOKEN_ENCODING", "cl100k_base")
+
+_ENCODER: Any = None
+_ENCODER_LOCK = threading.Lock()
+
+
+def _encoder():
+    """tiktoken 인코더 (처음 쓸 때 로드, 없거나 BPE 파일을 못 받으면 False → 추정치 사용)"""
+    global _ENCODER
+    if _ENCODER is None:
+        with _ENCODER_LOCK:
+            if _ENCODER is None:
+                try:
+                    import tiktoken
+                    _ENCODER = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+                except Exception as e:
+                    print(f"⚠️ tiktoken 사용 불가, 문자 수 기반 추정으로 대체: {e}")
+                    _ENCODER = False
+    return _ENCODER
+
+
+def _estimate_tokens(text: str) -> int:
+    # 한글 등 비ASCII는 글자당 1토큰, ASCII는 4글자당 1토큰 (cl100k 한글 평균보다 약간 보수적)
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + math.ceil((len(text) - non_ascii) / 4)
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _encoder()
+    if enc:
+        return len(enc.encode(text, disallowed_special=()))
+    return _estimate_tokens(text)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """앞에서부터 max_tokens 이내로 자름 (글자가 중간에 깨지지 않게)"""
+    if not text or max_tokens <= 0:
+        return ""
+    enc = _encoder()
+    if enc:
+        tokens = enc.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return enc.decode(tokens[:max_tokens], errors="ignore")
+
+    if _estimate_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if _estimate_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+@dataclass
+class Section:
+    """
+    프롬프트에 들어갈 가변 구역 하나
+
+    - text:  통째로 들어가는 본문 (넘치면 뒤를 자름)
+    - items: 앵커/근거처럼 항목 단위로 넣는 목록 (앞 항목이 우선, 항목 단위로 잘림)
+    - priority: 작을수록 먼저 예산을 받음
+    - min_share: 우선순위와 상관없이 먼저 떼어 두는 예산 비율 (앵커가 원고에 밀려 0개가 되지 않도록)
+    - max_tokens: 이 구역의 상한
+    - item_max_tokens: 항목 하나의 상한 (검색 결과 스니펫 등)
+    - fair: True면 항목을 앞에서부터 채우지 않고 모든 항목에 고르게 나눠 자름 (배치 검증 근거)
+    """
+    name: str
+    text: Optional[str] = None
+    items: Optional[Sequence[str]] = None
+    priority: int = 0
+    min_share: float = 0.0
+    max_tokens: Optional[int] = None
+    item_max_tokens: Optional[int] = None
+    fair: bool = False
+
+    def _item_costs(self) -> List[int]:
+        # JSON 배열로 직렬화했을 때의 비용 (따옴표/쉼표 포함)
+        costs = []
+        for it in self.items or []:
+            c = count_tokens(json.dumps(it, ensure_ascii=False)) + 1
+            if self.item_max_tokens:
+                c = min(c, self.item_max_tokens + 2)
+            costs.append(c)
+        return costs
+
+    def need(self) -> int:
+        need = count_tokens(self.text or "") if self.items is None else sum(self._item_costs()) + 2
+        return min(need, self.max_tokens) if self.max_tokens else need
+
+
+@dataclass
+class PackedPrompt:
+    sections: Dict[str, Any]
+    usage: Dict[str, int]
+    budget: int
+    truncated: List[str] = field(default_factory=list)
+
+    def __getitem__(self, name: str) -> Any:
+        return self.sections[name]
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(self.usage.values())
+
+
+def _fit_items_in_order(items: Sequence[str], budget: int, item_max: Optional[int]) -> List[str]:
+    out: List[str] = []
+    used = 2
+    for it in items:
+        if item_max:
+            it = truncate_to_tokens(it, item_max)
+        cost = count_tokens(json.dumps(it, ensure_ascii=False)) + 1
+        if used + cost > budget:
+            break
+        out.append(it)
+        used += cost
+    return out
+
+
+def _fit_items_fair(items: Sequence[str], budget: int, item_max: Optional[int]) -> List[str]:
+    # water-filling: 짧은 항목은 다 넣고 남은 예산을 긴 항목끼리 똑같이 나눔
+    n = len(items)
+    if not n:
+        return []
+    needs = [min(count_tokens(it), item_max) if item_max else count_tokens(it) for it in items]
+    overhead = 4  # 항목별 구분자/라벨 여유
+    remaining = max(0, budget - overhead * n)
+    caps = [0] * n
+    pending = sorted(range(n), key=lambda i: needs[i])
+    while pending:
+        share = remaining // len(pending)
+        i = pending[0]
+        if needs[i] <= share:
+            caps[i] = needs[i]
+            remaining -= needs[i]
+            pending.pop(0)
+        else:
+            for j in pending:
+                caps[j] = share
+            break
+    return [truncate_to_tokens(it, caps[i]) for i, it in enumerate(items)]
+
+
+class PromptPacker:
+    """
+    고정 템플릿 + 가변 구역들을 컨텍스트 창 안에 맞춰 넣는 패커
+
+        packed = PromptPacker("world_summary").pack(template, [Section("manuscript", text=text)])
+        prompt = template.replace("{manuscript}", packed["manuscript"])
+
+    예산 = (context_tokens - output_reserve) * safety - 템플릿 토큰
+    1) min_share 만큼 먼저 떼어 둠  2) 남은 예산을 priority 순서로 필요한 만큼 배분
+    배분 결과와 실제 사용 토큰은 prompt_usage_stats()로 확인
+    """
+
+    def __init__(
+        self,
+        name: str,
+        context_tokens: int = DEFAULT_CONTEXT_TOKENS,
+        output_reserve: int = DEFAULT_OUTPUT_RESERVE,
+        safety: float = DEFAULT_SAFETY,
+    ):
+        self.name = name
+        self.context_tokens = context_tokens
+        self.output_reserve = output_reserve
+        self.safety = safety
+
+    def budget_for(self, template: str) -> int:
+        usable = int((self.context_tokens - self.output_reserve) * self.safety)
+        return max(0, usable - count_tokens(template))
+
+    def pack(self, template: str, sections: List[Section]) -> PackedPrompt:
+        budget = self.budget_for(template)
+        needs = {s.name: s.need() for s in sections}
+        alloc = {s.name: 0 for s in sections}
+
+        remaining = budget
+        for s in sections:
+            if s.min_share > 0:
+                give = min(needs[s.name], int(budget * s.min_share))
+                alloc[s.name] = give
+                remaining -= give
+
+        for s in sorted(sections, key=lambda x: x.priority):
+            give = max(0, min(needs[s.name] - alloc[s.name], remaining))
+            alloc[s.name] += give
+            remaining -= give
+
+        packed: Dict[str, Any] = {}
+        usage: Dict[str, int] = {"template": count_tokens(template)}
+        truncated: List[str] = []
+        for s in sections:
+            limit = alloc[s.name]
+            if s.items is None:
+                value = truncate_to_tokens(s.text or "", limit)
+                used = count_tokens(value)
+                if value != (s.text or ""):
+                    truncated.append(s.name)
+            else:
+                fit = _fit_items_fair if s.fair else _fit_items_in_order
+                value = fit(list(s.items), limit, s.item_max_tokens)
+                used = sum(count_tokens(json.dumps(v, ensure_ascii=False)) + 1 for v in value) + 2 if value else 0
+                if len(value) < len(s.items) or any(a != b for a, b in zip(value, s.items)):
+                    truncated.append(s.name)
+            packed[s.name] = value
+            usage[s.name] = used
+
+        result = PackedPrompt(sections=packed, usage=usage, budget=budget + usage["template"], truncated=truncated)
+        _record_usage(self.name, result)
+        return result
+
+
+# 룰 검사 프롬프트에서 앵커(설정 근거)에 최소로 떼어 주는 예산 비율
+ANCHOR_MIN_SHARE = float(os.getenv("PROMPT_ANCHOR_MIN_SHARE", "0.2"))
+
+
+def pack_manuscript_with_anchors(name: str, template: str, manuscript: str, anchors: Sequence[str]) -> PackedPrompt:
+    """
+    룰 검사(world/character/plot) 공용 배분: 앵커 개수 상한 대신 토큰 예산으로 나눔
+
+    원고를 먼저 넣고 앵커는 남은 예산 (앞쪽 앵커 우선). 원고가 길어도 앵커가 0개가 되지 않도록
+    ANCHOR_MIN_SHARE만큼은 먼저 떼어 둠. 결과는 packed["manuscript"], packed["anchors"]
+    """
+    return PromptPacker(name).pack(template, [
+        Section("manuscript", text=manuscript, priority=0),
+        Section("anchors", items=anchors, priority=1, min_share=ANCHOR_MIN_SHARE),
+    ])
+
+
+# ---------------------------------------------------------
+# 사용량 집계 (/health)
+# ---------------------------------------------------------
+_USAGE: Dict[str, Dict[str, Any]] = {}
+_USAGE_LOCK = threading.Lock()
+
+
+def _record_usage(name: str, packed: PackedPrompt) -> None:
+    with _USAGE_LOCK:
+        u = _USAGE.setdefault(name, {"calls": 0, "tokens": 0, "max_tokens": 0, "truncated_calls": 0})
+        u["calls"] += 1
+        u["tokens"] += packed.total_tokens
+        u["max_tokens"] = max(u["max_tokens"], packed.total_tokens)
+        u["truncated_calls"] += 1 if packed.truncated else 0
+        u["budget"] = packed.budget
+        u["last"] = dict(packed.usage)
+
+
+def prompt_usage_stats() -> Dict[str, Dict[str, Any]]:
+    with _USAGE_LOCK:
+        return {
+            name: {**u, "avg_tokens": round(u["tokens"] / u["calls"], 1) if u["calls"] else 0.0}
+            for name, u in _USAGE.items()
+        }
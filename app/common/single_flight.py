@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from app.common.deadline import check_deadline, poll_timeout
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    같은 요청 합치기 + 완료 결과 캐시
+
+    - 같은 (key, version)이 계산 중이면 새로 돌리지 않고 그 결과를 같이 기다림 (더블 클릭 등)
+    - 완료 결과는 key별로 version과 함께 보관 → 조회 시 version이 다르면(저장소 변경) 버리고 다시 계산
+    - cacheable(value)가 False인 결과(부분 결과 등)와 예외는 기다리던 요청에만 전달하고 보관하지 않음
+    - 합류한 요청이 취소(cancel_scope)되면 그 요청만 기다리기를 그만둠 (계산은 주인 요청 것이라 계속)
+    - 크기를 넘으면 가장 오래 안 쓴 항목부터 제거 (LRU), ttl_s가 지나도 제거
+    """
+
+    def __init__(self, name: str, max_entries: int = 64, ttl_s: float = 3600.0):
+        self.name = name
+        self.max_entries = max(0, max_entries)
+        self.ttl_s = ttl_s
+
+        self._lock = threading.Lock()
+        self._flights: Dict[Tuple[Hashable, Hashable], _Flight] = {}
+        # key -> (version, stored_at, value)
+        self._entries: "OrderedDict[Hashable, Tuple[Hashable, float, Any]]" = OrderedDict()
+
+        self._counts = {"computed": 0, "shared": 0, "cache_hits": 0, "errors": 0}
+        self.invalidations = 0
+        self.evictions = 0
+
+    def _lookup_locked(self, key: Hashable, version: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        stored_version, stored_at, value = entry
+        if stored_version != version or (self.ttl_s and time.monotonic() - stored_at > self.ttl_s):
+            del self._entries[key]
+            self.invalidations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def do(
+        self,
+        key: Hashable,
+        version: Hashable,
+        fn: Callable[[], Any],
+        cacheable: Optional[Callable[[Any], bool]] = None,
+    ) -> Tuple[Any, str]:
+        """
+        (결과, 출처) 반환. 출처: "computed"(직접 계산) | "shared"(진행 중 계산 합류) | "cache"
+        """
+        with self._lock:
+            hit, value = self._lookup_locked(key, version)
+            if hit:
+                self._counts["cache_hits"] += 1
+                return value, "cache"
+
+            flight = self._flights.get((key, version))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, version)] = _Flight()
+            else:
+                flight.waiters += 1
+                self._counts["shared"] += 1
+
+        if not leader:
+            while not flight.done.wait(poll_timeout(None)):
+                check_deadline(self.name)
+            if flight.error is not None:
+                raise flight.error
+            return flight.value, "shared"
+
+        try:
+            flight.value = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop((key, version), None)
+                if flight.error is not None:
+                    self._counts["errors"] += 1
+                else:
+                    self._counts["computed"] += 1
+                    if self.max_entries and (cacheable is None or cacheable(flight.value)):
+                        self._entries[key] = (version, time.monotonic(), flight.value)
+                        self._entries.move_to_end(key)
+                        while len(self._entries) > self.max_entries:
+                            self._entries.popitem(last=False)
+                            self.evictions += 1
+            flight.done.set()
+
+        return flight.value, "computed"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = sum(self._counts.values())
+            saved = self._counts["shared"] + self._counts["cache_hits"]
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "in_flight": len(self._flights),
+                **self._counts,
+                "dedup_rate": round(saved / requests, 4) if requests else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
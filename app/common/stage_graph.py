@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import contextvars
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.common.deadline import Cancelled, DeadlineExceeded, cancelled, deadline_scope, poll_timeout, remaining
+
+# 모든 StageGraph가 공유하는 작업 스레드 수 (단계 안의 LLM 호출은 solar_limiter가 따로 제한)
+DEFAULT_MAX_WORKERS = int(os.getenv("STAGE_GRAPH_MAX_WORKERS", "16"))
+
+_POOL: Optional[ThreadPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                _POOL = ThreadPoolExecutor(max_workers=DEFAULT_MAX_WORKERS, thread_name_prefix="stage")
+    return _POOL
+
+
+class StageGraphError(ValueError):
+    pass
+
+
+class _Cut:
+    def __repr__(self) -> str:
+        return "CUT"
+
+
+# 요청 마감/취소로 결과 없이 끝난 선택(required=False) 단계의 값 (실패 시 default와 구분)
+CUT = _Cut()
+
+
+def _call_stage(fn: Callable[..., Any], kwargs: Dict[str, Any], budget_ms: Optional[float]) -> Any:
+    # deadline_share로 앞당긴 마감을 단계 안의 LLM/임베딩/Chroma 호출에도 적용
+    with deadline_scope(budget_ms):
+        return fn(**kwargs)
+
+
+@dataclass
+class Stage:
+    """
+    파이프라인 단계 하나
+
+    - inputs: 앞 단계 이름 또는 run(params)의 키. fn(**{이름: 값})으로 전달
+    - timeout_s: 시도 1번의 제한 시간 (스레드는 강제 종료가 안 되므로 결과만 버리고 다음 시도/실패로 넘어감)
+    - retries: 예외/타임아웃 시 재시도 횟수 (멱등 단계에만 지정)
+    - required: False면 실패해도 default 값으로 후속 단계를 계속 실행
+    - after_deadline: 요청 마감이 지나도 실행 (이미 나온 결과로 부분 응답을 정리하는 단계)
+    - deadline_share: 요청 예산 중 이 비율이 지나면 마감 처리 (뒤 단계 몫을 남겨 둠, 단계 안 호출에도 적용)
+    """
+    name: str
+    fn: Callable[..., Any]
+    inputs: Sequence[str] = ()
+    timeout_s: Optional[float] = None
+    retries: int = 0
+    retry_backoff_s: float = 0.5
+    required: bool = True
+    default: Any = None
+    after_deadline: bool = False
+    deadline_share: Optional[float] = None
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str = "pending"       # ok / failed / timeout / skipped / deadline / cancelled
+    attempts: int = 0
+    elapsed_ms: float = 0.0       # 첫 시도 시작 ~ 종료 (재시도 포함)
+    error: Optional[str] = None
+
+
+@dataclass
+class GraphRun:
+    values: Dict[str, Any]
+    results: Dict[str, StageResult]
+    elapsed_ms: float
+    failed: List[str] = field(default_factory=list)   # 실패한 required 단계 (마감으로 끊긴 단계는 partial)
+
+    @property
+    def ok(self) -> bool:
+        return not self.failed
+
+    @property
+    def cancelled(self) -> bool:
+        """요청 취소(cancel_scope)로 중간에 멈춤 — 결과를 쓰면 안 됨"""
+        return any(r.status == "cancelled" for r in self.results.values())
+
+    @property
+    def partial(self) -> bool:
+        """요청 마감 때문에 건너뛰거나 중간에 끊은 단계가 있음"""
+        return any(r.status == "deadline" for r in self.results.values())
+
+    def cut_by_deadline(self) -> List[str]:
+        return [n for n, r in self.results.items() if r.status == "deadline"]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        return self.values.get(name, default)
+
+    def timings(self) -> Dict[str, Any]:
+        return {
+            "total_ms": round(self.elapsed_ms, 1),
+            "stages": {
+                n: {"status": r.status, "ms": round(r.elapsed_ms, 1), "attempts": r.attempts,
+                    **({"error": r.error} if r.error else {})}
+                for n, r in self.results.items()
+            },
+        }
+
+
+class StageGraph:
+    """
+    선언형 단계 그래프 실행기
+
+        graph = StageGraph("story_keeper", [
+            Stage("chunks", split, inputs=("raw_text",)),
+            Stage("summary", summarize, inputs=("full_text",), required=False),
+            Stage("issues", check, inputs=("full_text", "state"), timeout_s=300, retries=1),
+        ])
+        run = graph.run({"raw_text": text}, targets=["issues", "summary"])
+
+    - 입력이 모두 준비된 단계는 공용 스레드 풀에서 동시에 실행
+    - targets를 주면 그 단계들과 선행 단계만 실행
+    - required 단계가 최종 실패하면 그 뒤 단계는 skipped
+    - 요청 마감(deadline_scope)이 지나면 진행 중/대기 중 단계는 deadline 처리, after_deadline 단계만 실행
+    - 요청이 취소(cancel_scope)되면 남은 단계를 모두 cancelled로 끝내고 바로 반환
+    - 단계별 지연/실패/재시도는 stats()로 누적 (/health)
+    """
+
+    def __init__(self, name: str, stages: Iterable[Stage], window: int = 200):
+        self.name = name
+        self.stages: Dict[str, Stage] = {}
+        for s in stages:
+            if s.name in self.stages:
+                raise StageGraphError(f"duplicate stage: {s.name}")
+            self.stages[s.name] = s
+        self._order = self._toposort()
+
+        self._lock = threading.Lock()
+        self._runs = 0
+        self._failed_runs = 0
+        self._cancelled_runs = 0
+        self._cancelled_ms = 0.0  # 취소된 실행이 취소 전까지 쓴 시간 합
+        self._recent: Dict[str, Deque[float]] = {n: deque(maxlen=window) for n in self.stages}
+        self._counts: Dict[str, Dict[str, int]] = {
+            n: {"ok": 0, "failed": 0, "timeout": 0, "skipped": 0, "deadline": 0, "cancelled": 0, "retries": 0}
+            for n in self.stages
+        }
+        self._recent_total: Deque[float] = deque(maxlen=window)
+
+    def _toposort(self) -> List[str]:
+        order: List[str] = []
+        state: Dict[str, int] = {}  # 1=방문 중, 2=완료
+
+        def visit(n: str, path: Tuple[str, ...]) -> None:
+            if state.get(n) == 2:
+                return
+            if state.get(n) == 1:
+                raise StageGraphError(f"cycle: {' -> '.join(path + (n,))}")
+            state[n] = 1
+            for dep in self.stages[n].inputs:
+                if dep in self.stages:
+                    visit(dep, path + (n,))
+            state[n] = 2
+            order.append(n)
+
+        for n in self.stages:
+            visit(n, ())
+        return order
+
+    def _needed(self, targets: Optional[Iterable[str]]) -> List[str]:
+        if targets is None:
+            return list(self._order)
+        need: Set[str] = set()
+        stack = list(targets)
+        while stack:
+            n = stack.pop()
+            if n not in self.stages:
+                raise StageGraphError(f"unknown stage: {n}")
+            if n in need:
+                continue
+            need.add(n)
+            stack.extend(d for d in self.stages[n].inputs if d in self.stages)
+        return [n for n in self._order if n in need]
+
+    # ---------------------------------------------------------
+    # 실행
+    # ---------------------------------------------------------
+    def run(self, params: Optional[Dict[str, Any]] = None, targets: Optional[Iterable[str]] = None) -> GraphRun:
+        params = dict(params or {})
+        order = self._needed(targets)
+        for n in order:
+            missing = [d for d in self.stages[n].inputs if d not in self.stages and d not in params]
+            if missing:
+                raise StageGraphError(f"stage {n}: missing inputs {missing}")
+
+        values: Dict[str, Any] = dict(params)
+        results = {n: StageResult(n) for n in order}
+        waiting = list(order)
+        running: Dict[Future, Tuple[str, float]] = {}   # future -> (stage, deadline)
+        not_before: Dict[str, float] = {}                # 재시도 대기
+        started: Dict[str, float] = {}
+        t0 = time.perf_counter()
+        left = remaining()
+        run_deadline = t0 + left if left is not None else float("inf")
+
+        def stage_cutoff(stage: Stage) -> float:
+            if stage.after_deadline:
+                return float("inf")
+            if stage.deadline_share and left is not None:
+                return min(run_deadline, t0 + left * stage.deadline_share)
+            return run_deadline
+
+        def finish(n: str, status: str, error: Optional[str] = None) -> None:
+            r = results[n]
+            r.status = status
+            r.error = error
+            r.elapsed_ms = (time.perf_counter() - started.get(n, time.perf_counter())) * 1000
+            if status != "ok":
+                stage = self.stages[n]
+                if status == "cancelled":
+                    values[n] = CUT
+                elif stage.required:
+                    print(f"❌ [{self.name}] {n} {status}: {error}")
+                else:
+                    values[n] = CUT if status == "deadline" else stage.default
+                    print(f"⚠️ [{self.name}] {n} {status} (continue): {error}")
+
+        def fail_or_retry(n: str, status: str, error: str) -> None:
+            stage = self.stages[n]
+            if results[n].attempts <= stage.retries:
+                not_before[n] = time.perf_counter() + stage.retry_backoff_s * results[n].attempts
+                waiting.append(n)
+                with self._lock:
+                    self._counts[n]["retries"] += 1
+                print(f"🔁 [{self.name}] {n} {status} → 재시도 {results[n].attempts}/{stage.retries}: {error}")
+            else:
+                finish(n, status, error)
+
+        while waiting or running:
+            if cancelled():
+                # 실행 중인 단계는 안의 LLM/임베딩 대기가 취소를 보고 멈춤, 여기서는 결과를 기다리지 않음
+                print(f"🛑 [{self.name}] 요청 취소 → 남은 단계 {len(running) + len(waiting)}개 중단")
+                for fut, (n, _) in running.items():
+                    fut.cancel()
+                    finish(n, "cancelled", "요청 취소")
+                for n in waiting:
+                    finish(n, "cancelled", "요청 취소")
+                running.clear()
+                waiting.clear()
+                break
+
+            now = time.perf_counter()
+            for n in list(waiting):
+                stage = self.stages[n]
+                deps = [d for d in stage.inputs if d in self.stages]
+                blocked = [d for d in deps
+                           if results[d].status in ("failed", "timeout", "skipped", "deadline", "cancelled")
+                           and self.stages[d].required]
+                if blocked:
+                    waiting.remove(n)
+                    # 앞 단계가 마감/취소로 끊겼으면 이 단계도 같은 상태 (실패가 아니라 부분 결과/취소)
+                    up = results[blocked[0]].status
+                    finish(n, up if up in ("deadline", "cancelled") else "skipped", f"upstream {blocked[0]} {up}")
+                    continue
+                cutoff = stage_cutoff(stage)
+                if now >= cutoff:
+                    waiting.remove(n)
+                    finish(n, "deadline", "요청 마감 전에 시작하지 못함")
+                    continue
+                if any(results[d].status == "pending" for d in deps) or not_before.get(n, 0) > now:
+                    continue
+                waiting.remove(n)
+                kwargs = {d: values[d] for d in stage.inputs}
+                started.setdefault(n, now)
+                results[n].attempts += 1
+                # LLM 우선순위/요청 마감 등 호출자의 contextvar를 작업 스레드로 넘김
+                budget_ms = None if cutoff == float("inf") or cutoff >= run_deadline else (cutoff - now) * 1000
+                fut = _pool().submit(contextvars.copy_context().run, _call_stage, stage.fn, kwargs, budget_ms)
+                deadline = now + stage.timeout_s if stage.timeout_s else float("inf")
+                running[fut] = (n, min(deadline, cutoff))
+
+            if not running:
+                if waiting:
+                    # 재시도 대기 중인 단계만 남음
+                    time.sleep(max(0.0, min(not_before[n] for n in waiting if n in not_before) - time.perf_counter()))
+                continue
+
+            next_wake = min([d for _, d in running.values()] + [not_before[n] for n in waiting if n in not_before])
+            timeout = None if next_wake == float("inf") else max(0.0, next_wake - time.perf_counter())
+            done, _ = wait(list(running), timeout=poll_timeout(timeout), return_when=FIRST_COMPLETED)
+
+            for fut in done:
+                n, _ = running.pop(fut)
+                err = fut.exception()
+                if err is None:
+                    values[n] = fut.result()
+                    finish(n, "ok")
+                elif isinstance(err, Cancelled):
+                    finish(n, "cancelled", repr(err))
+                elif isinstance(err, DeadlineExceeded):
+                    finish(n, "deadline", repr(err))
+                else:
+                    fail_or_retry(n, "failed", repr(err))
+
+            now = time.perf_counter()
+            for fut, (n, deadline) in list(running.items()):
+                if deadline <= now:
+                    running.pop(fut)
+                    fut.cancel()  # 이미 실행 중이면 결과만 버림
+                    if now >= stage_cutoff(self.stages[n]):
+                        finish(n, "deadline", "요청 마감으로 중단")
+                    else:
+                        fail_or_retry(n, "timeout", f"{self.stages[n].timeout_s}s 초과")
+
+        elapsed = (time.perf_counter() - t0) * 1000
+        failed = [n for n in order
+                  if results[n].status not in ("ok", "deadline", "cancelled") and self.stages[n].required]
+        self._record(results, elapsed, bool(failed))
+        return GraphRun(values=values, results=results, elapsed_ms=elapsed, failed=failed)
+
+    # ---------------------------------------------------------
+    # 지표
+    # ---------------------------------------------------------
+    def _record(self, results: Dict[str, StageResult], elapsed_ms: float, failed: bool) -> None:
+        with self._lock:
+            self._runs += 1
+            self._failed_runs += 1 if failed else 0
+            if any(r.status == "cancelled" for r in results.values()):
+                self._cancelled_runs += 1
+                self._cancelled_ms += elapsed_ms
+            self._recent_total.append(elapsed_ms)
+            for n, r in results.items():
+                self._counts[n][r.status] = self._counts[n].get(r.status, 0) + 1
+                if r.status == "ok":
+                    self._recent[n].append(r.elapsed_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        def _summary(values: List[float]) -> Dict[str, Any]:
+            s = sorted(values)
+            return {
+                "p50_ms": round(statistics.median(s), 1) if s else None,
+                "p95_ms": round(s[int(0.95 * (len(s) - 1))], 1) if s else None,
+            }
+
+        with self._lock:
+            return {
+                "runs": self._runs,
+                "failed_runs": self._failed_runs,
+                "cancelled_runs": self._cancelled_runs,
+                "cancelled_work_ms": round(self._cancelled_ms, 1),
+                "total": _summary(list(self._recent_total)),
+                "stages": {
+                    n: {**self._counts[n], **_summary(list(self._recent[n])),
+                        "inputs": list(self.stages[n].inputs)}
+                    for n in self._order
+                },
+            }
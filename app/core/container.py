@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+def _project_root() -> Path:
+    # app/core/container.py -> 프로젝트 루트
+    return Path(__file__).resolve().parents[2]
+
+
+DATA_DIR = _project_root() / "app" / "data"
+PLOT_DB_PATH = str(DATA_DIR / "plot.json")
+CHARACTER_DB_PATH = str(DATA_DIR / "characters.json")
+
+
+class ServiceContainer:
+    """
+    앱 수명 동안 한 번만 만드는 서비스 묶음 (요청마다 LLM/Chroma/Serper 클라이언트를 새로 만들지 않도록)
+
+    - lifespan에서 warm_up()으로 미리 생성 → 첫 요청 지연 제거
+    - 각 서비스는 처음 꺼낼 때 생성 (warm_up 실패/미호출이어도 요청 시점에 생성됨)
+    - ManuscriptAnalyzer는 plot.json / characters.json 이 바뀌면 설정만 다시 읽음 (LLM 등은 재사용)
+    """
+
+    # lifespan에서 미리 만들어 둘 서비스 (이름 = 메서드명)
+    WARM_SERVICES = ("plot_manager", "manuscript_analyzer")
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._instances: Dict[str, Any] = {}
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        inst = self._instances.get(name)
+        if inst is not None:
+            return inst
+        with self._lock:
+            inst = self._instances.get(name)
+            if inst is None:
+                inst = factory()
+                self._instances[name] = inst
+        return inst
+
+    # ---------------------------------------------------------
+    # Story Keeper / Clio
+    # ---------------------------------------------------------
+    def plot_manager(self):
+        # extracter 모듈 싱글톤과 같은 인스턴스를 공유
+        from app.service.story_keeper_agent.load_state.extracter import _get_plot_manager
+        return self._get("plot_manager", _get_plot_manager)
+
+    def manuscript_analyzer(self):
+        from app.service.clio_fact_checker_agent.service import ManuscriptAnalyzer
+        analyzer = self._get(
+            "manuscript_analyzer",
+            lambda: ManuscriptAnalyzer(setting_path=PLOT_DB_PATH, character_path=CHARACTER_DB_PATH),
+        )
+        # 설정 파일이 바뀌었으면 설정/허구 키워드만 다시 로드
+        analyzer.reload_settings()
+        return analyzer
+
+    # ---------------------------------------------------------
+    # RAG 에이전트 (/agent)
+    # ---------------------------------------------------------
+    def user_repository(self):
+        from app.repository.vector.user_repo import UserRepository
+        return self._get("user_repository", UserRepository)
+
+    def vector_repository(self):
+        from app.core.settings import chromadb_settings, vector_settings
+
+        def _build():
+            if vector_settings.backend == "numpy":
+                from app.repository.vector.numpy_repo import NumpyVectorRepository
+                return NumpyVectorRepository(
+                    index_dir=os.path.join(vector_settings.index_dir, chromadb_settings.collection_name),
+                    quantize=vector_settings.quantize,
+                )
+            from app.repository.vector.vector_repo import ChromaDBRepository
+            return ChromaDBRepository()
+
+        return self._get("vector_repository", _build)
+
+    def embedding_service(self):
+        from app.service.embedding_service import EmbeddingService
+        return self._get("embedding_service", EmbeddingService)
+
+    def vector_service(self):
+        from app.service.vector_service import VectorService
+        return self._get(
+            "vector_service",
+            lambda: VectorService(
+                vector_repository=self.vector_repository(),
+                embedding_service=self.embedding_service(),
+            ),
+        )
+
+    def agent_service(self):
+        from app.service.agent_service import AgentService
+        return self._get("agent_service", lambda: AgentService(vector_service=self.vector_service()))
+
+    # ---------------------------------------------------------
+    # 수명 관리
+    # ---------------------------------------------------------
+    def warm_up(self, names: Optional[tuple] = None) -> Dict[str, bool]:
+        """서비스를 미리 생성. 실패해도 서버 기동은 계속 (해당 서비스는 첫 요청 때 다시 시도)"""
+        result: Dict[str, bool] = {}
+        for name in names or self.WARM_SERVICES:
+            try:
+                getattr(self, name)()
+                result[name] = True
+            except Exception as e:
+                print(f"⚠️ [Container] '{name}' 준비 실패 (요청 시 재시도): {e}")
+                result[name] = False
+        ready = [n for n, ok in result.items() if ok]
+        print(f"🔥 [Container] 준비 완료: {', '.join(ready) if ready else '-'}")
+        return result
+
+    def reset(self) -> None:
+        with self._lock:
+            self._instances.clear()
+
+
+# 싱글톤 인스턴스 (main.py lifespan에서 warm_up, app.state.container에도 연결)
+container = ServiceContainer()
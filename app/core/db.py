@@ -1,90 +1,231 @@
+from __future__ import annotations
+
 import logging
-import chromadb
+import os
+import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from contextlib import contextmanager
 from app.core.settings import chromadb_settings
+from app.common.deadline import check_deadline
+
+if TYPE_CHECKING:
+    import chromadb
 
 logger = logging.getLogger("chroma")
 
 
 class ChromaDBConnectionManager:
-    _instance: Optional['ChromaDBConnectionManager'] = None
-    _client: Optional[chromadb.HttpClient] = None
-    _collections_cache: Dict[str, Any] = {}
-    _last_health_check: float = 0
-    _health_check_interval: float = 30.0
-    _max_retries: int = 3
-    _retry_delay: float = 1.0
-    
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __init__(self):
-        if self._client is None:
-            self._initialize_connection()
-    
+    """
+    앱 전체가 공유하는 ChromaDB 연결 (HistoryVectorStore / ManuscriptRepository / ChromaDBRepository)
+
+    - HttpClient 1개 = HTTP 세션(커넥션 풀) 1개를 모든 벡터 소비자가 공유
+    - CHROMA_MODE=embedded 이면 HTTP 대신 PersistentClient(app/data/chroma_db)를 같은 방식으로 공유
+    - heartbeat는 백그라운드 스레드(start_health_monitor)가 주기적으로 수행 → 요청 경로에서는 호출하지 않음
+    - 컬렉션 핸들은 이름별로 캐시. 재연결되면 캐시를 비우고 generation을 올려
+      핸들을 들고 있는 쪽(LangChain Chroma 래퍼 등)이 다시 만들도록 함
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        health_check_interval: float = 30.0,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        mode: Optional[str] = None,
+        persist_dir: Optional[str] = None,
+    ):
+        self.host = host or chromadb_settings.host
+        self.port = int(port or chromadb_settings.port)
+        self.mode = (mode or chromadb_settings.mode or "http").lower()
+        if self.mode not in ("http", "embedded"):
+            raise ValueError(f"CHROMA_MODE must be 'http' or 'embedded': {self.mode}")
+        self.persist_dir = persist_dir or chromadb_settings.persist_dir
+        self.health_check_interval = health_check_interval
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+
+        self._lock = threading.RLock()
+        self._client: Optional[chromadb.ClientAPI] = None
+        self._collections_cache: Dict[str, Any] = {}
+        self._generation = 0
+        self._healthy = False
+        self._last_health_check: float = 0
+        self._last_error: Optional[str] = None
+
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+
+    # ---------------------------------------------------------
+    # 연결
+    # ---------------------------------------------------------
+    @property
+    def endpoint(self) -> str:
+        return f"embedded:{self.persist_dir}" if self.mode == "embedded" else f"{self.host}:{self.port}"
+
+    def _create_client(self):
+        import chromadb
+        from chromadb.config import Settings
+
+        settings = Settings(allow_reset=True, anonymized_telemetry=False)
+        if self.mode == "embedded":
+            os.makedirs(self.persist_dir, exist_ok=True)
+            return chromadb.PersistentClient(path=self.persist_dir, settings=settings)
+        return chromadb.HttpClient(host=self.host, port=self.port, settings=settings)
+
     def _initialize_connection(self):
         for attempt in range(self._max_retries):
             try:
-                self._client = chromadb.HttpClient(
-                    host=chromadb_settings.host, 
-                    port=chromadb_settings.port
-                )
-                self._test_connection()
-                logger.info(f"ChromaDB connection established: {chromadb_settings.host}:{chromadb_settings.port}")
+                client = self._create_client()
+                client.heartbeat()
+                self._client = client
+                self._collections_cache.clear()
+                self._generation += 1
+                self._mark_health(True)
+                logger.info(f"ChromaDB connection established: {self.endpoint}")
+                print(f"📡 [ChromaDB] 연결: {self.endpoint}")
                 return
             except Exception as e:
                 logger.warning(f"Connection attempt {attempt + 1} failed: {e}")
+                self._mark_health(False, str(e))
                 if attempt < self._max_retries - 1:
                     time.sleep(self._retry_delay * (2 ** attempt))
                 else:
                     logger.error(f"Failed to connect to ChromaDB after {self._max_retries} attempts")
                     raise ConnectionError(f"Could not establish ChromaDB connection: {e}")
-    
-    def _test_connection(self):
-        self._client.heartbeat()
+
+    def _mark_health(self, healthy: bool, error: Optional[str] = None):
+        self._healthy = healthy
         self._last_health_check = time.time()
-    
-    def _ensure_healthy_connection(self):
-        current_time = time.time()
-        if current_time - self._last_health_check > self._health_check_interval:
-            try:
-                self._test_connection()
-            except Exception as e:
-                logger.warning(f"Health check failed, reconnecting: {e}")
-                self._client = None
-                self._collections_cache.clear()
+        self._last_error = error
+
+    @property
+    def client(self) -> chromadb.ClientAPI:
+        client = self._client
+        if client is not None:
+            return client
+        with self._lock:
+            if self._client is None:
                 self._initialize_connection()
-    
+            return self._client
+
     @property
-    def client(self) -> chromadb.HttpClient:
-        self._ensure_healthy_connection()
-        return self._client
-    
-    def get_collection(self, collection_name: str = None):
+    def generation(self) -> int:
+        """연결이 (재)생성될 때마다 증가. 핸들을 캐시하는 쪽에서 비교용"""
+        return self._generation
+
+    # ---------------------------------------------------------
+    # 컬렉션 핸들 캐시
+    # ---------------------------------------------------------
+    def get_collection(self, collection_name: str = None, create: bool = True):
+        """
+        컬렉션 핸들을 반환 (이름별 캐시)
+        - create=False 이면 없는 컬렉션은 만들지 않고 None 반환
+        """
         name = collection_name or chromadb_settings.collection_name
-        
-        if name not in self._collections_cache:
+
+        collection = self._collections_cache.get(name)
+        if collection is not None:
+            return collection
+
+        with self._lock:
+            collection = self._collections_cache.get(name)
+            if collection is not None:
+                return collection
             try:
-                collection = self.client.get_or_create_collection(
-                    name=name,
-                    metadata={"description": "Upstage Solar2 embeddings collection"}
-                )
-                self._collections_cache[name] = collection
-                logger.debug(f"Collection '{name}' cached")
+                if create:
+                    collection = self.client.get_or_create_collection(
+                        name=name,
+                        metadata={"description": "Upstage Solar2 embeddings collection"}
+                    )
+                else:
+                    collection = self.client.get_collection(name=name)
             except Exception as e:
+                if not create:
+                    logger.debug(f"Collection '{name}' not found: {e}")
+                    return None
                 logger.error(f"Failed to get collection '{name}': {e}")
                 raise
-        
-        return self._collections_cache[name]
-    
+            self._collections_cache[name] = collection
+            logger.debug(f"Collection '{name}' cached")
+        return collection
+
+    def invalidate_collection(self, collection_name: str):
+        """컬렉션을 삭제/재생성한 쪽에서 호출 (다른 소비자가 죽은 핸들을 쓰지 않도록)"""
+        self._collections_cache.pop(collection_name, None)
+
     def clear_cache(self):
         self._collections_cache.clear()
         logger.info("Collection cache cleared")
-    
+
+    # ---------------------------------------------------------
+    # 헬스 체크 (백그라운드)
+    # ---------------------------------------------------------
+    def check_health(self) -> bool:
+        client = self._client
+        if client is None:
+            return False
+        try:
+            client.heartbeat()
+            self._mark_health(True)
+            return True
+        except Exception as e:
+            logger.warning(f"Health check failed, reconnecting: {e}")
+            print(f"⚠️ [ChromaDB] heartbeat 실패 → 재연결 시도: {e}")
+            self._mark_health(False, str(e))
+            self._reconnect()
+            return self._healthy
+
+    def _reconnect(self):
+        with self._lock:
+            self._client = None
+            self._collections_cache.clear()
+            try:
+                self._initialize_connection()
+            except ConnectionError as e:
+                # 다음 주기(또는 다음 요청)에서 다시 시도
+                self._mark_health(False, str(e))
+
+    def _monitor_loop(self):
+        while not self._stop_event.wait(self.health_check_interval):
+            try:
+                self.check_health()
+            except Exception as e:
+                logger.error(f"Health monitor error: {e}")
+
+    def start_health_monitor(self):
+        if self.mode == "embedded":
+            # 프로세스 내부 DB라 끊길 네트워크가 없음
+            return
+        if self._monitor_thread is not None and self._monitor_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._monitor_thread = threading.Thread(
+            target=self._monitor_loop, name="chroma-health", daemon=True
+        )
+        self._monitor_thread.start()
+        print(f"🩺 [ChromaDB] 헬스 모니터 시작 (주기 {self.health_check_interval:.0f}s)")
+
+    def stop_health_monitor(self):
+        self._stop_event.set()
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(timeout=5)
+            self._monitor_thread = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "endpoint": self.endpoint,
+            "connected": self._client is not None,
+            "healthy": self._healthy,
+            "last_check": self._last_health_check,
+            "last_error": self._last_error,
+            "generation": self._generation,
+            "collections": sorted(self._collections_cache.keys()),
+            "monitor": self._monitor_thread is not None and self._monitor_thread.is_alive(),
+        }
+
     @contextmanager
     def get_connection(self):
         try:
@@ -94,27 +235,43 @@ class ChromaDBConnectionManager:
             raise
         finally:
             pass
-    
+
     def close(self):
-        if self._client:
-            self._collections_cache.clear()
-            self._client = None
-            logger.info("ChromaDB connection closed")
+        self.stop_health_monitor()
+        with self._lock:
+            if self._client:
+                self._collections_cache.clear()
+                self._client = None
+                logger.info("ChromaDB connection closed")
 
 
-_connection_manager = ChromaDBConnectionManager()
+# 연결(재시도 + backoff sleep 포함)은 import 시점이 아니라 첫 사용 시점에 수행
+_connection_manager: Optional[ChromaDBConnectionManager] = None
+_connection_manager_lock = threading.Lock()
 
 
-def get_chroma_client() -> chromadb.HttpClient:
-    """ChromaDB 클라이언트를 반환하는 의존성 함수"""
-    return _connection_manager.client
+def get_chroma_client() -> chromadb.ClientAPI:
+    """ChromaDB 클라이언트를 반환하는 의존성 함수 (요청 마감이 지났으면 DeadlineExceeded)"""
+    check_deadline("chroma")
+    return get_connection_manager().client
 
 
-def get_chroma_collection(collection_name: str = None):
-    """ChromaDB 컬렉션을 반환하는 의존성 함수"""
-    return _connection_manager.get_collection(collection_name)
+def get_chroma_collection(collection_name: str = None, create: bool = True):
+    """ChromaDB 컬렉션을 반환하는 의존성 함수 (요청 마감이 지났으면 DeadlineExceeded)"""
+    check_deadline("chroma")
+    return get_connection_manager().get_collection(collection_name, create=create)
 
 
 def get_connection_manager() -> ChromaDBConnectionManager:
-    """ChromaDB 연결 매니저를 반환하는 함수"""
-    return _connection_manager
\ No newline at end of file
+    """ChromaDB 연결 매니저를 반환하는 함수 (연결은 client를 처음 꺼낼 때)"""
+    global _connection_manager
+    if _connection_manager is None:
+        with _connection_manager_lock:
+            if _connection_manager is None:
+                _connection_manager = ChromaDBConnectionManager()
+    return _connection_manager
+
+
+def chroma_status() -> Optional[Dict[str, Any]]:
+    """연결 매니저가 만들어졌으면 상태, 아니면 None (/health 용, 연결을 새로 만들지 않음)"""
+    return _connection_manager.status() if _connection_manager is not None else None
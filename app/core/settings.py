@@ -1,4 +1,5 @@
 import os
+from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
 
@@ -38,10 +39,29 @@ class ChromaDBSettings(BaseSettings):
     
     def __init__(self):
         super().__init__()
-        self.host = self.get_env("CHROMA_HOST", "localhost")
-        self.port = int(self.get_env("CHROMA_PORT", "8800"))
+        # k8s Service(infra/k8s/application/03-chromadb.yaml)와 같은 기본값 (모든 벡터 소비자가 이 값을 공유)
+        self.host = self.get_env("CHROMA_HOST", "chromadb")
+        self.port = int(self.get_env("CHROMA_PORT", "8000"))
         self.collection_name = self.get_env("CHROMA_COLLECTION_NAME", "upstage_embeddings")
+        # http: 별도 Chroma 서버(Pod)에 접속 / embedded: 백엔드 프로세스 안에서 PersistentClient로 실행
+        # embedded는 단일 replica 전용 (같은 디렉터리를 여러 프로세스가 동시에 쓰면 안 됨)
+        self.mode = self.get_env("CHROMA_MODE", "http").strip().lower()
+        default_dir = Path(__file__).resolve().parents[1] / "data" / "chroma_db"  # app/data (PVC 마운트 경로)
+        self.persist_dir = self.get_env("CHROMA_PERSIST_DIR", str(default_dir))
+
+
+class VectorIndexSettings(BaseSettings):
+    """VectorRepository backend settings (/agent 지식 베이스)"""
+
+    def __init__(self):
+        super().__init__()
+        # chroma: ChromaDBRepository / numpy: 프로세스 내 memmap 인덱스 (Chroma 서버 불필요)
+        self.backend = self.get_env("VECTOR_BACKEND", "chroma").strip().lower()
+        default_dir = Path(__file__).resolve().parents[1] / "data" / "vector_index"
+        self.index_dir = self.get_env("VECTOR_INDEX_DIR", str(default_dir))
+        self.quantize = self.get_env("VECTOR_INDEX_QUANTIZE", "float32").strip().lower()  # float32 | int8
 
 
 upstage_settings = UpstageSettings()
-chromadb_settings = ChromaDBSettings()
\ No newline at end of file
+chromadb_settings = ChromaDBSettings()
+vector_settings = VectorIndexSettings()
\ No newline at end of file
@@ -1,8 +1,14 @@
+from __future__ import annotations
+
 import os
-from langchain_upstage import ChatUpstage, UpstageEmbeddings
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
 from app.repository.client.base import BaseLLMClient
 
+if TYPE_CHECKING:
+    from langchain_upstage import UpstageEmbeddings
+
 if os.getenv("KUBERNETES_SERVICE_HOST") is None:
     load_dotenv()
 
@@ -16,10 +22,15 @@ class UpstageClinet(BaseLLMClient):
 
     def get_chat_model(self):
         if self._chat_instance is None:
+            # langchain_upstage는 모델을 처음 만들 때 로드 (import 시점 로드 방지)
+            from langchain_upstage import ChatUpstage
+
             self._chat_instance = ChatUpstage(api_key=self.api_key, model=self.chat_model_name)
         return self._chat_instance
 
     def get_embedding_mode(self) -> UpstageEmbeddings:
         if self._embedding_instance is None:
+            from langchain_upstage import UpstageEmbeddings
+
             self._embedding_instance = UpstageEmbeddings(api_key=self.api_key, model=self.embedding_model_name)
         return self._embedding_instance
\ No newline at end of file
@@ -0,0 +1,470 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+from typing import List, Dict, Any, Optional, Set
+
+import numpy as np
+
+from app.repository.vector.vector_repo import VectorRepository
+
+# 한 번에 행렬곱할 행 수 (메모리 사용량 상한: block x dim x 4 bytes)
+SEARCH_BLOCK_ROWS = 32768
+# 삭제 표시된 행이 이 비율을 넘으면 자동 압축
+COMPACT_RATIO = 0.5
+# meta.log.jsonl이 이 줄 수와 전체 행 수를 둘 다 넘으면 meta.json으로 합침 (쓰기 비용을 행 수에 선형으로 유지)
+META_LOG_MIN_LINES = 10000
+
+
+def _match_where(meta: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """
+    Chroma where 절 부분 구현
+    - {"k": v} / {"k": {"$eq"|"$ne"|"$gt"|"$gte"|"$lt"|"$lte"|"$in"|"$nin": v}}
+    - {"$and": [...]} / {"$or": [...]}
+    """
+    if not where:
+        return True
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(_match_where(meta, c) for c in cond):
+                return False
+            continue
+        if key == "$or":
+            if not any(_match_where(meta, c) for c in cond):
+                return False
+            continue
+
+        value = meta.get(key)
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, target in cond.items():
+            if op == "$eq" and not value == target:
+                return False
+            if op == "$ne" and not value != target:
+                return False
+            if op == "$in" and value not in target:
+                return False
+            if op == "$nin" and value in target:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > target:
+                    return False
+                if op == "$gte" and not value >= target:
+                    return False
+                if op == "$lt" and not value < target:
+                    return False
+                if op == "$lte" and not value <= target:
+                    return False
+    return True
+
+
+class NumpyVectorRepository(VectorRepository):
+    """
+    Chroma 서버 없이 프로세스 안에서 도는 벡터 저장소 (테스트/소규모 설치용)
+
+    저장 구조 (index_dir/)
+    - vectors.f32 | vectors.i8 : (capacity, dim) memmap. int8이면 행별 scale을 scales.f32 에 저장
+    - meta.json                : dim/개수/id·문서·메타데이터 스냅샷 (삭제된 행은 id=None)
+    - meta.log.jsonl           : 스냅샷 이후 바뀐 행 (추가/삭제할 때마다 한 줄씩 append, 로드 시 재생)
+                                 길어지면 meta.json으로 합침 → 대량 적재 때 전체 메타를 매번 다시 쓰지 않음
+
+    검색은 블록 단위 행렬곱 + argpartition top-k.
+    int8은 디스크/페이지 캐시를 1/4로 줄이는 대신 질의 때 float 변환 비용이 들고 recall이 약간 낮아짐
+    (benchmarks/vector_backends.py 참고)
+    거리는 ChromaDBRepository(기본 hnsw:space=l2)와 같은 제곱 L2 (space="cosine"|"ip"도 지원)
+    """
+
+    def __init__(
+        self,
+        index_dir: str,
+        quantize: str = "float32",
+        space: str = "l2",
+        initial_capacity: int = 1024,
+    ):
+        if quantize not in ("float32", "int8"):
+            raise ValueError(f"quantize must be 'float32' or 'int8': {quantize}")
+        if space not in ("l2", "cosine", "ip"):
+            raise ValueError(f"space must be 'l2', 'cosine' or 'ip': {space}")
+
+        self.index_dir = index_dir
+        self.quantize = quantize
+        self.space = space
+        self.initial_capacity = initial_capacity
+        self._lock = threading.RLock()
+
+        self.dim: Optional[int] = None
+        self.count = 0          # 사용한 행 수 (삭제 표시 포함)
+        self.capacity = 0
+        self._ids: List[Optional[str]] = []
+        self._documents: List[Optional[str]] = []
+        self._metadatas: List[Optional[Dict[str, Any]]] = []
+        self._row_of: Dict[str, int] = {}
+        self._log_lines = 0
+
+        self._vectors: Optional[np.memmap] = None
+        self._scales: Optional[np.memmap] = None
+        self._sq_norms = np.zeros(0, dtype=np.float32)  # 행별 |x|^2 (메모리에만, 로드 시 재계산)
+
+        self._load()
+
+    # ---------------------------------------------------------
+    # 파일
+    # ---------------------------------------------------------
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.index_dir, "meta.json")
+
+    @property
+    def _log_path(self) -> str:
+        return os.path.join(self.index_dir, "meta.log.jsonl")
+
+    @property
+    def _vector_path(self) -> str:
+        ext = "i8" if self.quantize == "int8" else "f32"
+        return os.path.join(self.index_dir, f"vectors.{ext}")
+
+    @property
+    def _scale_path(self) -> str:
+        return os.path.join(self.index_dir, "scales.f32")
+
+    def _open_memmaps(self, capacity: int) -> None:
+        """capacity 행 크기로 memmap을 (재)오픈. 파일이 작으면 늘림"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        vec_dtype = np.int8 if self.quantize == "int8" else np.float32
+
+        def _open(path, dtype, shape):
+            need = int(np.prod(shape)) * np.dtype(dtype).itemsize
+            mode = "r+" if os.path.exists(path) else "w+"
+            if mode == "r+" and os.path.getsize(path) < need:
+                with open(path, "r+b") as f:
+                    f.truncate(need)
+            return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._scales is not None:
+            self._scales.flush()
+
+        self._vectors = _open(self._vector_path, vec_dtype, (capacity, self.dim))
+        if self.quantize == "int8":
+            self._scales = _open(self._scale_path, np.float32, (capacity,))
+        self.capacity = capacity
+
+    def _load(self) -> None:
+        if not os.path.exists(self._meta_path):
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("quantize", "float32") != self.quantize:
+            raise ValueError(
+                f"index at {self.index_dir} was built with quantize={meta.get('quantize')}, not {self.quantize}"
+            )
+        self.dim = meta.get("dim")
+        self._ids = meta.get("ids", [])
+        self._documents = meta.get("documents", [])
+        self._metadatas = meta.get("metadatas", [])
+        self._replay_log()
+        self.count = len(self._ids)
+        self._row_of = {eid: row for row, eid in enumerate(self._ids) if eid is not None}
+
+        if self.dim:
+            self._open_memmaps(max(meta.get("capacity", self.count), self.count, 1))
+            self._sq_norms = self._row_sq_norms(0, self.count)
+
+    def _replay_log(self) -> None:
+        if not os.path.exists(self._log_path):
+            return
+        with open(self._log_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    e = json.loads(line)
+                except json.JSONDecodeError:
+                    # 비정상 종료로 마지막 줄이 잘린 경우
+                    continue
+                row = e["r"]
+                while len(self._ids) <= row:
+                    self._ids.append(None)
+                    self._documents.append(None)
+                    self._metadatas.append(None)
+                self._ids[row] = e.get("id")
+                self._documents[row] = e.get("d")
+                self._metadatas[row] = e.get("m")
+                self._log_lines += 1
+
+    def _append_log(self, rows: List[int]) -> None:
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            for row in dict.fromkeys(rows):
+                f.write(json.dumps(
+                    {"r": row, "id": self._ids[row], "d": self._documents[row], "m": self._metadatas[row]},
+                    ensure_ascii=False, separators=(",", ":"),
+                ) + "\n")
+        self._log_lines += len(set(rows))
+
+    def _save_meta_rows(self, rows: List[int]) -> None:
+        """바뀐 행만 로그에 추가. 스냅샷이 없거나 로그가 길어졌으면 전체 스냅샷으로 합침"""
+        if not os.path.exists(self._meta_path) or self._log_lines + len(rows) > max(META_LOG_MIN_LINES, self.count):
+            self._save_meta()
+        else:
+            self._append_log(rows)
+
+    def _save_meta(self) -> None:
+        os.makedirs(self.index_dir, exist_ok=True)
+        data = {
+            "dim": self.dim,
+            "quantize": self.quantize,
+            "capacity": self.capacity,
+            "ids": self._ids,
+            "documents": self._documents,
+            "metadatas": self._metadatas,
+        }
+        fd, tmp_path = tempfile.mkstemp(prefix="._tmp_", dir=self.index_dir)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, self._meta_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        # 스냅샷에 모두 반영됨
+        if os.path.exists(self._log_path):
+            os.remove(self._log_path)
+        self._log_lines = 0
+
+    def _flush(self, rows: Optional[List[int]] = None) -> None:
+        """rows가 있으면 그 행만 메타 로그에 추가, 없으면 전체 스냅샷"""
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._scales is not None:
+            self._scales.flush()
+        if rows is None:
+            self._save_meta()
+        else:
+            self._save_meta_rows(rows)
+
+    # ---------------------------------------------------------
+    # 벡터 입출력
+    # ---------------------------------------------------------
+    def _rows_float(self, start: int, end: int) -> np.ndarray:
+        block = self._vectors[start:end]
+        if self.quantize == "int8":
+            return block.astype(np.float32) * self._scales[start:end, None]
+        return np.asarray(block, dtype=np.float32)
+
+    def _row_sq_norms(self, start: int, end: int) -> np.ndarray:
+        out = np.empty(end - start, dtype=np.float32)
+        for s in range(start, end, SEARCH_BLOCK_ROWS):
+            e = min(end, s + SEARCH_BLOCK_ROWS)
+            block = self._rows_float(s, e)
+            out[s - start:e - start] = np.einsum("ij,ij->i", block, block)
+        return out
+
+    def _write_rows(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        if self.quantize == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            self._vectors[rows] = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+            self._scales[rows] = scales.astype(np.float32)
+        else:
+            self._vectors[rows] = vectors
+
+    def _ensure_capacity(self, needed: int) -> None:
+        if needed <= self.capacity:
+            return
+        new_cap = max(needed, self.capacity * 2, self.initial_capacity)
+        self._open_memmaps(new_cap)
+
+    # ---------------------------------------------------------
+    # VectorRepository
+    # ---------------------------------------------------------
+    def add_documents(self, documents: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
+        if ids is None:
+            ids = [f"doc_{i}" for i in range(len(documents))]
+
+        if metadatas is None:
+            metadatas = [{"text": doc} for doc in documents]
+
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(ids):
+            raise ValueError("embeddings must be a 2D list with one row per id")
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"embedding dim {vectors.shape[1]} != index dim {self.dim}")
+
+            # 같은 ID는 제자리 덮어쓰기, 새 ID는 끝에 추가
+            rows = []
+            new_ids = [eid for eid in dict.fromkeys(ids) if eid not in self._row_of]
+            self._ensure_capacity(self.count + len(new_ids))
+            for eid in new_ids:
+                self._row_of[eid] = self.count
+                self._ids.append(eid)
+                self._documents.append(None)
+                self._metadatas.append(None)
+                self.count += 1
+
+            for i, eid in enumerate(ids):
+                row = self._row_of[eid]
+                rows.append(row)
+                self._documents[row] = documents[i]
+                self._metadatas[row] = metadatas[i]
+
+            rows_arr = np.asarray(rows, dtype=np.int64)
+            self._write_rows(rows_arr, vectors)
+
+            if len(self._sq_norms) < self.count:
+                self._sq_norms = np.concatenate([
+                    self._sq_norms, np.zeros(self.count - len(self._sq_norms), dtype=np.float32)
+                ])
+            stored = self._rows_float_at(rows_arr)
+            self._sq_norms[rows_arr] = np.einsum("ij,ij->i", stored, stored)
+
+            self._flush(rows)
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        with self._lock:
+            return {eid for eid in ids if eid in self._row_of}
+
+    def _rows_float_at(self, rows: np.ndarray) -> np.ndarray:
+        block = self._vectors[rows]
+        if self.quantize == "int8":
+            return block.astype(np.float32) * self._scales[rows][:, None]
+        return np.asarray(block, dtype=np.float32)
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 5, include: List[str] = None, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if include is None:
+            include = ["documents", "metadatas", "distances"]
+
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        n_q = len(queries)
+
+        with self._lock:
+            if not self.count or not self.dim:
+                return self._format([[] for _ in range(n_q)], [[] for _ in range(n_q)], include)
+
+            # 1. 후보 행 (삭제 표시 제외 + where 필터)
+            alive = np.fromiter((eid is not None for eid in self._ids), dtype=bool, count=self.count)
+            if where:
+                alive &= np.fromiter(
+                    (m is not None and _match_where(m, where) for m in self._metadatas),
+                    dtype=bool, count=self.count,
+                )
+            candidates = np.flatnonzero(alive)
+            if len(candidates) == 0:
+                return self._format([[] for _ in range(n_q)], [[] for _ in range(n_q)], include)
+
+            k = min(n_results, len(candidates))
+            q_sq = np.einsum("ij,ij->i", queries, queries)
+            q_norm = np.sqrt(q_sq)
+
+            best_d = np.full((n_q, 0), np.inf, dtype=np.float32)
+            best_r = np.zeros((n_q, 0), dtype=np.int64)
+
+            # 2. 블록 단위 행렬곱 → 블록별 top-k를 누적 top-k와 병합
+            dense = len(candidates) == self.count
+            for s in range(0, len(candidates), SEARCH_BLOCK_ROWS):
+                rows = candidates[s:s + SEARCH_BLOCK_ROWS]
+                raw = self._vectors[rows[0]:rows[-1] + 1] if dense else self._vectors[rows]
+                if self.quantize == "int8":
+                    # scale은 (질의 x 블록) 결과에 곱함 → (블록 x dim) 역양자화 곱셈을 생략
+                    dots = (queries @ raw.astype(np.float32).T) * self._scales[rows][None, :]
+                else:
+                    dots = queries @ np.asarray(raw, dtype=np.float32).T
+                x_sq = self._sq_norms[rows]
+
+                if self.space == "l2":
+                    dist = q_sq[:, None] + x_sq[None, :] - 2.0 * dots
+                    np.maximum(dist, 0.0, out=dist)
+                elif self.space == "cosine":
+                    denom = q_norm[:, None] * np.sqrt(x_sq)[None, :]
+                    denom[denom == 0] = 1.0
+                    dist = 1.0 - dots / denom
+                else:  # ip
+                    dist = 1.0 - dots
+
+                kk = min(k, dist.shape[1])
+                part = np.argpartition(dist, kk - 1, axis=1)[:, :kk]
+                part_d = np.take_along_axis(dist, part, axis=1)
+                best_d = np.concatenate([best_d, part_d], axis=1)
+                best_r = np.concatenate([best_r, rows[part]], axis=1)
+                if best_d.shape[1] > k:
+                    keep = np.argpartition(best_d, k - 1, axis=1)[:, :k]
+                    best_d = np.take_along_axis(best_d, keep, axis=1)
+                    best_r = np.take_along_axis(best_r, keep, axis=1)
+
+            order = np.argsort(best_d, axis=1)
+            best_d = np.take_along_axis(best_d, order, axis=1)
+            best_r = np.take_along_axis(best_r, order, axis=1)
+            return self._format(best_r.tolist(), best_d.tolist(), include)
+
+    def _format(self, rows: List[List[int]], dists: List[List[float]], include: List[str]) -> Dict[str, Any]:
+        """Chroma collection.query 와 같은 모양 ({key: [[query별 결과]]})"""
+        out: Dict[str, Any] = {"ids": [[self._ids[r] for r in rs] for rs in rows]}
+        out["documents"] = [[self._documents[r] for r in rs] for rs in rows] if "documents" in include else None
+        out["metadatas"] = [[self._metadatas[r] for r in rs] for rs in rows] if "metadatas" in include else None
+        out["distances"] = [[float(d) for d in ds] for ds in dists] if "distances" in include else None
+        out["embeddings"] = (
+            [[self._rows_float_at(np.asarray([r]))[0].tolist() for r in rs] for rs in rows]
+            if "embeddings" in include else None
+        )
+        return out
+
+    def delete_documents(self, ids: List[str]):
+        with self._lock:
+            deleted: List[int] = []
+            for eid in ids:
+                row = self._row_of.pop(eid, None)
+                if row is None:
+                    continue
+                self._ids[row] = None
+                self._documents[row] = None
+                self._metadatas[row] = None
+                deleted.append(row)
+            if not deleted:
+                return
+            if self.count and (self.count - len(self._row_of)) / self.count > COMPACT_RATIO:
+                self.compact()
+            else:
+                self._save_meta_rows(deleted)
+
+    def compact(self) -> None:
+        """삭제 표시된 행을 제거하고 남은 행을 앞으로 당김"""
+        with self._lock:
+            keep = np.asarray([r for r, eid in enumerate(self._ids) if eid is not None], dtype=np.int64)
+            for new_row, old_row in enumerate(keep.tolist()):
+                if new_row != old_row:
+                    self._vectors[new_row] = self._vectors[old_row]
+                    if self._scales is not None:
+                        self._scales[new_row] = self._scales[old_row]
+
+            self._ids = [self._ids[r] for r in keep.tolist()]
+            self._documents = [self._documents[r] for r in keep.tolist()]
+            self._metadatas = [self._metadatas[r] for r in keep.tolist()]
+            self._sq_norms = self._sq_norms[keep] if len(keep) else np.zeros(0, dtype=np.float32)
+            self.count = len(self._ids)
+            self._row_of = {eid: row for row, eid in enumerate(self._ids)}
+            self._flush()
+
+    def get_collection_info(self) -> Dict[str, Any]:
+        return {
+            "name": os.path.basename(os.path.normpath(self.index_dir)),
+            "count": len(self._row_of),
+            "metadata": {
+                "backend": "numpy",
+                "dim": self.dim,
+                "quantize": self.quantize,
+                "space": self.space,
+                "capacity": self.capacity,
+            },
+        }
@@ -1,8 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
-from app.core.db import get_chroma_collection
-from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
 from app.core.db import get_chroma_collection
 
 
@@ -11,8 +8,16 @@ class VectorRepository(ABC):
     def add_documents(self, documents: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
         pass
 
+    def upsert_documents(self, documents: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
+        # 같은 ID는 덮어쓰기 (기본 구현은 add_documents가 이미 upsert라고 가정)
+        self.add_documents(documents=documents, embeddings=embeddings, metadatas=metadatas, ids=ids)
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        # 이미 저장된 ID (대량 적재 시 재임베딩 생략용). 모르면 빈 집합
+        return set()
+
     @abstractmethod
-    def query(self, query_embeddings: List[List[float]], n_results: int = 5, include: List[str] = None) -> Dict[str, Any]:
+    def query(self, query_embeddings: List[List[float]], n_results: int = 5, include: List[str] = None, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         pass
 
     @abstractmethod
@@ -26,7 +31,12 @@ class VectorRepository(ABC):
 
 class ChromaDBRepository(VectorRepository):
     def __init__(self, collection_name: str = None):
-        self.collection = get_chroma_collection(collection_name)
+        self.collection_name = collection_name
+
+    @property
+    def collection(self):
+        # 공용 연결 매니저의 컬렉션 캐시에서 꺼냄 (재연결 후에도 최신 핸들)
+        return get_chroma_collection(self.collection_name)
 
     def add_documents(self, documents: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
         if ids is None:
@@ -42,14 +52,43 @@ class ChromaDBRepository(VectorRepository):
             ids=ids
         )
 
-    def query(self, query_embeddings: List[List[float]], n_results: int = 5, include: List[str] = None) -> Dict[str, Any]:
+    def upsert_documents(self, documents: List[str], embeddings: List[List[float]], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
+        if ids is None:
+            raise ValueError("upsert_documents requires ids")
+
+        if metadatas is None:
+            metadatas = [{"text": doc} for doc in documents]
+
+        self.collection.upsert(
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+
+    def existing_ids(self, ids: List[str]) -> Set[str]:
+        if not ids:
+            return set()
+        found = self.collection.get(ids=ids, include=[])
+        return set(found.get("ids") or [])
+
+    def max_batch_size(self) -> Optional[int]:
+        # Chroma 서버가 한 번에 받는 최대 레코드 수 (버전에 따라 API가 없을 수 있음)
+        try:
+            from app.core.db import get_chroma_client
+            return int(get_chroma_client().get_max_batch_size())
+        except Exception:
+            return None
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 5, include: List[str] = None, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         if include is None:
             include = ["documents", "metadatas", "distances"]
 
         return self.collection.query(
             query_embeddings=query_embeddings,
             n_results=n_results,
-            include=include
+            include=include,
+            where=where or None,
         )
 
     def delete_documents(self, ids: List[str]):
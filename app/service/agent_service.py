@@ -1,17 +1,34 @@
-from typing import List, Dict, Any
-from openai import OpenAI # openai==1.52.2
-from app.service.vector_service import VectorService
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, List, Dict, Any, Iterator, Tuple
 from app.core.settings import upstage_settings
+from app.common.answer_cache import SemanticAnswerCache
+from app.common.llm_limiter import solar_limiter
+
+if TYPE_CHECKING:
+    from app.service.vector_service import VectorService
 
 
 class AgentService:
-    def __init__(self, vector_service: VectorService):
+    def __init__(self, vector_service: VectorService, answer_cache: SemanticAnswerCache = None):
+        from openai import OpenAI  # openai==1.52.2 (import 시점 로드 방지)
+
         self.client = OpenAI(api_key=upstage_settings.api_key, base_url=upstage_settings.base_url)
         self.vector_service = vector_service
+        self.answer_cache = answer_cache if answer_cache is not None else SemanticAnswerCache()
     
     def process_query(self, query: str, context_limit: int = 3) -> Dict[str, Any]:
         # Step 1: Retrieve relevant documents using vector search
-        search_results = self.vector_service.search(query, n_results=context_limit)
+        query_embedding = self.vector_service.embedding_service.create_embedding(query)
+        search_results = self.vector_service.search_by_embedding(query_embedding, n_results=context_limit)
+
+        # Step 1-1: 거의 같은 질문 + 같은 근거 문서면 저장된 답변 재사용 (LLM 호출 생략)
+        version = self.vector_service.collection_version
+        cached = self.answer_cache.lookup(query_embedding, search_results["ids"], version=version)
+        if cached is not None:
+            cached["query"] = query
+            cached["cached"] = True
+            return cached
         
         # Step 2: Prepare context from retrieved documents
         context = self._prepare_context(search_results)
@@ -19,14 +36,78 @@ class AgentService:
         # Step 3: Generate response using Upstage Solar LLM
         response = self._generate_response(query, context)
         
-        return {
+        result = {
             "query": query,
             "response": response,
             "retrieved_documents": search_results["documents"],
             "document_distances": search_results["distances"],
-            "context_used": context
+            "context_used": context,
+            "cached": False,
         }
+        if not response.startswith("Error generating response:"):
+            self.answer_cache.store(query_embedding, search_results["ids"], result, version=version)
+        return result
     
+    def stream_query(self, query: str, context_limit: int = 3) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        process_query의 스트리밍 버전. (event, data) 튜플을 순서대로 yield 합니다.
+        - retrieval: 검색된 문서/거리 (LLM 호출 전에 먼저 보냄 → UI가 출처를 바로 표시)
+        - token:     생성 중인 답변 조각
+        - done:      전체 답변 + cached 여부
+        - error:     생성 실패
+        """
+        query_embedding = self.vector_service.embedding_service.create_embedding(query)
+        search_results = self.vector_service.search_by_embedding(query_embedding, n_results=context_limit)
+        version = self.vector_service.collection_version
+
+        yield "retrieval", {
+            "query": query,
+            "ids": search_results["ids"],
+            "retrieved_documents": search_results["documents"],
+            "metadatas": search_results["metadatas"],
+            "document_distances": search_results["distances"],
+        }
+
+        cached = self.answer_cache.lookup(query_embedding, search_results["ids"], version=version)
+        if cached is not None:
+            yield "token", {"text": cached["response"]}
+            yield "done", {"response": cached["response"], "cached": True}
+            return
+
+        context = self._prepare_context(search_results)
+        parts: List[str] = []
+        try:
+            # 스트림을 다 읽을 때까지 Solar 호출 1건으로 계산
+            with solar_limiter.slot():
+                stream = self.client.chat.completions.create(
+                    model=upstage_settings.chat_model,
+                    messages=self._build_messages(query, context),
+                    temperature=0.3,
+                    max_tokens=500,
+                    stream=True,
+                )
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield "token", {"text": delta}
+        except Exception as e:
+            yield "error", {"message": f"Error generating response: {str(e)}"}
+            return
+
+        response = "".join(parts)
+        self.answer_cache.store(query_embedding, search_results["ids"], {
+            "query": query,
+            "response": response,
+            "retrieved_documents": search_results["documents"],
+            "document_distances": search_results["distances"],
+            "context_used": context,
+            "cached": False,
+        }, version=version)
+        yield "done", {"response": response, "cached": False}
+
     def _prepare_context(self, search_results: Dict[str, Any]) -> str:
         documents = search_results["documents"]
         metadatas = search_results["metadatas"]
@@ -41,7 +122,7 @@ class AgentService:
         
         return "\n".join(context_parts)
     
-    def _generate_response(self, query: str, context: str) -> str:
+    def _build_messages(self, query: str, context: str) -> List[Dict[str, str]]:
         system_prompt = """You are a helpful AI assistant. Use the provided context to answer the user's question accurately and concisely. 
         If the context doesn't contain enough information to answer the question, say so clearly."""
         
@@ -51,17 +132,21 @@ class AgentService:
 Question: {query}
 
 Please provide a helpful response based on the context above."""
-        
+
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+
+    def _generate_response(self, query: str, context: str) -> str:
         try:
-            response = self.client.chat.completions.create(
-                model=upstage_settings.chat_model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.3,
-                max_tokens=500
-            )
+            with solar_limiter.slot():
+                response = self.client.chat.completions.create(
+                    model=upstage_settings.chat_model,
+                    messages=self._build_messages(query, context),
+                    temperature=0.3,
+                    max_tokens=500
+                )
             return response.choices[0].message.content
         except Exception as e:
             return f"Error generating response: {str(e)}"
@@ -69,9 +154,16 @@ Please provide a helpful response based on the context above."""
     def add_knowledge(self, documents: List[str], metadatas: List[Dict[str, Any]] = None) -> Dict[str, str]:
         try:
             self.vector_service.add_documents(documents, metadatas)
+            # 컬렉션이 바뀌었으므로 답변 캐시 비움 (collection_version으로도 걸러지지만 즉시 메모리 반환)
+            self.answer_cache.clear()
             return {"status": "success", "message": f"Added {len(documents)} documents to knowledge base"}
         except Exception as e:
             return {"status": "error", "message": f"Failed to add documents: {str(e)}"}
     
+    def ingest_knowledge_file(self, path: str, resume: bool = True) -> Dict[str, Any]:
+        result = self.vector_service.ingest_file(path, resume=resume)
+        self.answer_cache.clear()
+        return result
+
     def get_knowledge_stats(self) -> Dict[str, Any]:
         return self.vector_service.get_collection_info()
\ No newline at end of file
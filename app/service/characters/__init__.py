@@ -9,6 +9,7 @@ from typing import Any, Dict, List, Tuple, Union
 DB_PATH = "/app/app/data/characters.json"
 
 from app.service.characters.solar_client import SolarClient
+from app.common.changelog import record_change
 
 
 # =========================================================
@@ -407,6 +408,7 @@ def upsert_character(name: str, features: Union[str, Dict[str, Any]], *, db_path
         db[key] = new_obj
         action = "inserted"
     _write_json(db_path, db)
+    record_change("character", "upsert", key, db[key])
     return {"status": "success", "action": action, "name": key}
 
 def parse_character_with_name(name: str, features: str) -> Dict[str, Any]:
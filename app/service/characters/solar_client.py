@@ -6,6 +6,9 @@ from typing import Any, Dict, List, Union
 
 import requests
 
+from app.common.deadline import clamp_timeout
+from app.common.llm_limiter import solar_limiter
+
 try:
     from dotenv import load_dotenv
 
@@ -147,8 +150,9 @@ class SolarClient:
             "temperature": 0.1,  # 창의성 낮추고 정확도 높임
         }
 
-        resp = requests.post(self.base_url, headers=headers, json=payload, timeout=timeout)
-        resp.raise_for_status()
+        with solar_limiter.slot():
+            resp = requests.post(self.base_url, headers=headers, json=payload, timeout=clamp_timeout(timeout, "llm"))
+            resp.raise_for_status()
 
         data = resp.json()
         if "choices" in data and data["choices"]:
@@ -1,14 +1,17 @@
 # app/service/clio_fact_checker_agent/history_router.py
 
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import List, Dict, Any, Literal, Optional
 
 # Common 모듈 import
 from app.common.history import repo as history_repo
-from app.common.history import vector_store
+from app.common.history.vector_store import vector_store, build_where
+from app.common.history.lexical_index import reciprocal_rank_fusion
+from app.common.etag import not_modified
+from app.common.pagination import decode_cursor, parse_fields, project
 
 # Schemas (필요한 경우 common schemas를 쓰거나 현재 패키지의 schemas 사용)
-from .schemas import HistoryOut, HistoryCreate, HistoryUpdate, IngestRequest, HistoryUpsertRequest
+from .schemas import HistoryOut, HistoryCreate, HistoryUpdate, IngestRequest, HistoryUpsertRequest, HistoryFilterOut, HistoryOutPartial
 
 from app.service.history.solar_client import HistoryLLMClient
 
@@ -72,26 +75,101 @@ def _merge_entity_data(existing: Dict[str, Any], new_data: Dict[str, Any]) -> Di
 # API Endpoints (app.get -> router.get 으로 변경됨!)
 # ---------------------------------------------------------
 
-@router.get("", response_model=List[HistoryOut])
-def api_list_history_entities():
-    """전체 역사 엔티티 목록 조회"""
-    return history_repo.list_entities(HISTORY_DB_PATH)
+@router.get("", response_model=List[HistoryOutPartial], response_model_exclude_unset=True)
+def api_list_history_entities(
+    request: Request,
+    response: Response,
+    cursor: Optional[str] = Query(None, description="이전 응답의 X-Next-Cursor 헤더 값"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="페이지 크기 (없으면 전체)"),
+    fields: Optional[str] = Query(None, description="반환할 필드 (예: id,name,summary)"),
+):
+    """
+    역사 엔티티 목록 조회
+    - 파라미터 없이 호출하면 기존처럼 전체 목록
+    - limit/cursor: ID 순 커서 페이지네이션 (다음 커서는 X-Next-Cursor 헤더)
+    - fields: 필드 projection (id는 항상 포함)
+    """
+    # history_db.json이 바뀌지 않았으면 304 (조회/직렬화 생략)
+    cached = not_modified(request, response, HISTORY_DB_PATH)
+    if cached:
+        return cached
+
+    field_list = parse_fields(fields, always=("id",))
+
+    if limit is None and cursor is None:
+        items = history_repo.list_entities(HISTORY_DB_PATH)
+    else:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        items, next_cursor = history_repo.list_entities_page(HISTORY_DB_PATH, after_id=after_id, limit=limit or 50)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+
+    return [project(e, field_list) for e in items]
 
 @router.get("/search", response_model=List[HistoryOut])
-def api_search_history(q: str = Query(..., description="검색할 키워드")):
-    """벡터 검색"""
-    results = vector_store.search(q, top_k=5)
-    response_list = []
-    for doc, score in results:
-        # 벡터 DB에는 요약된 텍스트만 있으므로,
-        # 필요하다면 ID를 가지고 repo.get_entity()로 원본 상세 데이터를 다시 가져와도 됩니다.
-        # 여기서는 메타데이터를 활용해 반환합니다.
-        entity_id = doc.metadata["id"]
-        # 원본 데이터 조회 (가장 확실한 방법)
-        original_data = history_repo.get_entity(HISTORY_DB_PATH, entity_id)
-        if original_data:
-            response_list.append(original_data)
-    return response_list
+def api_search_history(
+    q: str = Query(..., description="검색할 키워드"),
+    mode: Literal["vector", "lexical", "hybrid"] = Query("vector", description="vector | lexical(BM25) | hybrid(RRF)"),
+    top_k: int = Query(5, ge=1, le=50),
+    entity_type: Optional[str] = Query(None, description="유형 필터 (예: Person)"),
+    era: Optional[str] = Query(None, description="시대 필터"),
+    tags: Optional[List[str]] = Query(None, description="태그 필터 (모두 포함, AND)"),
+):
+    """벡터 / 어휘(BM25) / 하이브리드 검색 (+ facet 필터)"""
+    has_filter = bool(entity_type or era or tags)
+    allowed_ids = (
+        history_repo.filter_entity_ids(HISTORY_DB_PATH, entity_type=entity_type, era=era, tags=tags)
+        if has_filter else None
+    )
+    if allowed_ids is not None and not allowed_ids:
+        return []
+
+    rankings = []
+
+    if mode in ("vector", "hybrid"):
+        # hybrid는 후보를 넉넉히 뽑아 RRF로 합친 뒤 top_k만 남김
+        k = top_k if mode == "vector" else top_k * 2
+        # tags는 Chroma where로 표현할 수 없어 후처리하므로 후보를 더 뽑아 둠
+        if tags:
+            k *= 2
+        where = build_where(entity_type=entity_type, era=era)
+        results = vector_store.search(q, top_k=k, where=where)
+        ids = [doc.metadata["id"] for doc, _score in results]
+        if allowed_ids is not None:
+            ids = [eid for eid in ids if eid in allowed_ids]
+        rankings.append(ids)
+
+    if mode in ("lexical", "hybrid"):
+        k = top_k if mode == "lexical" else top_k * 2
+        lexical = history_repo.search_lexical(HISTORY_DB_PATH, q, top_k=k, allowed_ids=allowed_ids)
+        rankings.append([eid for eid, _score in lexical])
+
+    entity_ids = rankings[0] if len(rankings) == 1 else reciprocal_rank_fusion(rankings)
+
+    # 벡터 DB에는 요약된 텍스트만 있으므로, ID로 원본 상세 데이터를 한 번에 조회합니다. (순위 유지)
+    return history_repo.get_entities(HISTORY_DB_PATH, entity_ids[:top_k])
+
+
+@router.get("/filter", response_model=HistoryFilterOut)
+def api_filter_history(
+    entity_type: Optional[str] = Query(None, description="유형 필터 (예: Person)"),
+    era: Optional[str] = Query(None, description="시대 필터"),
+    tags: Optional[List[str]] = Query(None, description="태그 필터 (모두 포함, AND)"),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=200),
+):
+    """facet 필터 목록 조회 (페이지네이션 + facet별 개수)"""
+    return history_repo.filter_entities(
+        HISTORY_DB_PATH,
+        entity_type=entity_type,
+        era=era,
+        tags=tags,
+        offset=offset,
+        limit=limit,
+    )
 
 
 @router.post("", response_model=HistoryOut, tags=["History"])
@@ -117,50 +195,50 @@ def api_update_history_entity(payload: HistoryRewriteRequest):
     [일괄 재작성] 지정된 엔티티들을 삭제하고, 입력된 텍스트를 분석하여 새로 생성합니다.
     - 단계 1: entity_ids에 있는 항목 제거
     - 단계 2: text를 LLM으로 분석하여 Ingest (Create/Update/Delete 수행)
-    - 단계 3: 벡터 DB 일괄 동기화 (마지막에 1회)
+    - 단계 3: 변경분 일괄 저장 + 벡터 DB 증분 반영 (마지막에 1회)
     """
     target_ids = payload.entity_ids
     input_text = payload.text
 
     print(f"🔄 [API/Rewrite] 재작성 요청: 삭제 {len(target_ids)}건, 분석 텍스트 {len(input_text)}자")
 
-    results = []
-    success_count = 0
-
-    # ---------------------------------------------------------
-    # 1. [DELETE] 기존 엔티티 일괄 삭제
-    # ---------------------------------------------------------
-    for ent_id in target_ids:
-        try:
-            # auto_sync=False: 속도를 위해 벡터 동기화는 나중에 한 번에 함
-            history_repo.delete_entity(HISTORY_DB_PATH, ent_id, auto_sync=False)
-            print(f"   🗑️ 삭제 완료: {ent_id}")
-            results.append({
-                "action": "pre_delete",
-                "id": ent_id,
-                "status": "success",
-                "message": "재작성 전 삭제됨"
-            })
-        except Exception as e:
-            # 이미 없는 경우 등 에러가 나도, 재생성 로직은 계속 진행해야 함
-            print(f"   ⚠️ 삭제 중 오류 (무시함): {ent_id} - {e}")
-
-    # ---------------------------------------------------------
-    # 2. [INGEST] 텍스트 분석 및 반영 (기존 ingest 로직 재사용)
-    # ---------------------------------------------------------
+    # LLM 분석을 먼저 수행 (실패 시 기존 데이터는 그대로 유지)
     client = HistoryLLMClient()
     try:
         commands = client.parse_history_command(input_text)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LLM analysis failed: {str(e)}")
 
-    if commands:
-        for cmd in commands:
+    results = []
+    success_count = 0
+
+    # history_db.json은 batch 안에서 1회 로드 / 1회 저장
+    with history_repo.batch(HISTORY_DB_PATH) as b:
+        # ---------------------------------------------------------
+        # 1. [DELETE] 기존 엔티티 일괄 삭제
+        # ---------------------------------------------------------
+        for ent_id in target_ids:
+            if b.delete_entity(ent_id):
+                print(f"   🗑️ 삭제 완료: {ent_id}")
+                results.append({
+                    "action": "pre_delete",
+                    "id": ent_id,
+                    "status": "success",
+                    "message": "재작성 전 삭제됨"
+                })
+            else:
+                # 이미 없는 경우에도 재생성 로직은 계속 진행해야 함
+                print(f"   ⚠️ 삭제 대상 없음 (무시함): {ent_id}")
+
+        # ---------------------------------------------------------
+        # 2. [INGEST] 텍스트 분석 결과 반영 (기존 ingest 로직 재사용)
+        # ---------------------------------------------------------
+        for cmd in commands or []:
             suggested_action = cmd.get("action", "create")
             target_name = cmd.get("target", {}).get("name")
 
             # DB에서 이름으로 ID 검색
-            existing_id = history_repo.find_id_by_name(HISTORY_DB_PATH, target_name)
+            existing_id = b.find_id_by_name(target_name)
 
             final_action = suggested_action
             final_target_id = existing_id
@@ -176,8 +254,7 @@ def api_update_history_entity(payload: HistoryRewriteRequest):
                 normalized_payload = _normalize_ingest_payload(raw_payload)
 
                 if final_action == "create":
-                    # auto_sync=False 유지
-                    saved_entity = history_repo.create_entity(HISTORY_DB_PATH, normalized_payload, auto_sync=False)
+                    saved_entity = b.create_entity(normalized_payload)
 
                     log_item.update({
                         "status": "success",
@@ -192,10 +269,10 @@ def api_update_history_entity(payload: HistoryRewriteRequest):
                         # 혹시 모를 예외 처리 (Update인데 ID가 없는 경우)
                         raise ValueError(f"업데이트 대상 ID 없음: {target_name}")
 
-                    existing_entity = history_repo.get_entity(HISTORY_DB_PATH, final_target_id)
+                    existing_entity = b.get_entity(final_target_id)
                     merged_data = _merge_entity_data(existing_entity, normalized_payload)
 
-                    updated_entity = history_repo.update_entity(HISTORY_DB_PATH, final_target_id, merged_data, auto_sync=False)
+                    updated_entity = b.update_entity(final_target_id, merged_data)
 
                     log_item.update({
                         "status": "success",
@@ -207,7 +284,7 @@ def api_update_history_entity(payload: HistoryRewriteRequest):
 
                 elif final_action == "delete":
                     if final_target_id:
-                        history_repo.delete_entity(HISTORY_DB_PATH, final_target_id, auto_sync=False)
+                        b.delete_entity(final_target_id)
                         log_item.update({"status": "success", "id": final_target_id, "message": "분석 결과에 따라 삭제됨"})
                         success_count += 1
 
@@ -217,16 +294,10 @@ def api_update_history_entity(payload: HistoryRewriteRequest):
 
             results.append(log_item)
 
-    # ---------------------------------------------------------
-    # 3. [SYNC] 벡터 DB 일괄 동기화
-    # ---------------------------------------------------------
-    # 삭제된 항목과 새로 생성된 항목을 모두 반영하기 위해 Force Sync 수행
-    print("🔄 [API/Rewrite] 모든 변경사항 벡터 DB 동기화 중...")
-    try:
-        history_repo.force_sync_vector_db(HISTORY_DB_PATH)
-    except Exception as e:
-        print(f"⚠️ 벡터 DB 동기화 실패: {e}")
-        # 벡터 동기화 실패는 전체 실패로 간주하지 않고 결과 반환 (필요시 수정)
+        # ---------------------------------------------------------
+        # 3. [COMMIT] with 블록 종료 시 JSON 1회 저장 + 벡터 DB 증분 반영
+        # ---------------------------------------------------------
+        print("🔄 [API/Rewrite] 모든 변경사항 저장 및 벡터 DB 반영 중...")
 
     return {
         "status": "success",
@@ -245,30 +316,20 @@ def api_delete_history_entity(payload: DeleteRequest):
     results = []
 
     # ---------------------------------------------------------
-    # 1. [DELETE] 기존 엔티티 일괄 삭제
+    # 1. [DELETE] 기존 엔티티 일괄 삭제 (JSON 1회 저장 + 벡터 DB 증분 반영)
     # ---------------------------------------------------------
-    for ent_id in target_ids:
-        try:
-            # auto_sync=False: 속도를 위해 벡터 동기화는 나중에 한 번에 함
-            history_repo.delete_entity(HISTORY_DB_PATH, ent_id, auto_sync=False)
-            print(f"   🗑️ 삭제 완료: {ent_id}")
-            results.append({
-                "action": "pre_delete",
-                "id": ent_id,
-                "status": "success",
-                "message": "삭제됨"
-            })
-        except Exception as e:
-            # 이미 없는 경우 등 에러가 나도, 재생성 로직은 계속 진행해야 함
-            print(f"   ⚠️ 삭제 중 오류 (무시함): {ent_id} - {e}")
-
-    # 삭제된 항목과 새로 생성된 항목을 모두 반영하기 위해 Force Sync 수행
-    print("🔄 [API/Rewrite] 모든 변경사항 벡터 DB 동기화 중...")
-    try:
-        history_repo.force_sync_vector_db(HISTORY_DB_PATH)
-    except Exception as e:
-        print(f"⚠️ 벡터 DB 동기화 실패: {e}")
-        # 벡터 동기화 실패는 전체 실패로 간주하지 않고 결과 반환 (필요시 수정)
+    with history_repo.batch(HISTORY_DB_PATH) as b:
+        for ent_id in target_ids:
+            if b.delete_entity(ent_id):
+                print(f"   🗑️ 삭제 완료: {ent_id}")
+                results.append({
+                    "action": "pre_delete",
+                    "id": ent_id,
+                    "status": "success",
+                    "message": "삭제됨"
+                })
+            else:
+                print(f"   ⚠️ 삭제 대상 없음 (무시함): {ent_id}")
 
     return {
         "status": "success",
@@ -297,85 +358,80 @@ def api_ingest_history_text(payload: IngestRequest):
     results = []
     success_count = 0
 
-    # 1. 반복문 시작
-    for cmd in commands:
-        suggested_action = cmd.get("action", "create")
-        target_name = cmd.get("target", {}).get("name")
-
-        # DB에서 동명이인 검색
-        existing_id = history_repo.find_id_by_name(HISTORY_DB_PATH, target_name)
+    # history_db.json은 batch 안에서 1회 로드 / 1회 저장, 벡터 DB도 변경분만 1회 반영
+    with history_repo.batch(HISTORY_DB_PATH) as b:
+        for cmd in commands:
+            suggested_action = cmd.get("action", "create")
+            target_name = cmd.get("target", {}).get("name")
 
-        final_action = suggested_action
-        final_target_id = existing_id
+            # DB에서 동명이인 검색 (앞선 명령으로 생성된 엔티티도 포함)
+            existing_id = b.find_id_by_name(target_name)
 
-        # Upsert 로직: create인데 이미 있으면 update로 변경
-        if suggested_action == "create" and existing_id:
-            final_action = "update"
-            print(f"ℹ️ 중복 발견: '{target_name}'(ID:{existing_id}) -> 'Create'를 'Update'로 전환합니다.")
+            final_action = suggested_action
+            final_target_id = existing_id
 
-        log_item = {"name": target_name, "action": final_action, "status": "pending"}
+            # Upsert 로직: create인데 이미 있으면 update로 변경
+            if suggested_action == "create" and existing_id:
+                final_action = "update"
+                print(f"ℹ️ 중복 발견: '{target_name}'(ID:{existing_id}) -> 'Create'를 'Update'로 전환합니다.")
 
-        try:
-            raw_payload = cmd.get("payload", {})
-            normalized_payload = _normalize_ingest_payload(raw_payload)
+            log_item = {"name": target_name, "action": final_action, "status": "pending"}
 
-            if final_action == "create":
-                # [중요] auto_sync=False로 설정하여 매번 동기화 방지
-                saved_entity = history_repo.create_entity(HISTORY_DB_PATH, normalized_payload, auto_sync=False)
+            try:
+                raw_payload = cmd.get("payload", {})
+                normalized_payload = _normalize_ingest_payload(raw_payload)
 
-                log_item.update({
-                    "status": "success",
-                    "id": saved_entity["id"],
-                    "message": "새로 생성됨",
-                    "result_data": saved_entity
-                })
-                success_count += 1
+                if final_action == "create":
+                    saved_entity = b.create_entity(normalized_payload)
 
-            elif final_action == "update":
-                if not final_target_id:
-                    raise ValueError(f"수정할 대상 ID를 찾지 못함: {target_name}")
+                    log_item.update({
+                        "status": "success",
+                        "id": saved_entity["id"],
+                        "message": "새로 생성됨",
+                        "result_data": saved_entity
+                    })
+                    success_count += 1
 
-                # 기존 데이터 조회
-                existing_entity = history_repo.get_entity(HISTORY_DB_PATH, final_target_id)
-                if not existing_entity:
-                    raise ValueError("ID는 찾았으나 실제 데이터가 없습니다.")
+                elif final_action == "update":
+                    if not final_target_id:
+                        raise ValueError(f"수정할 대상 ID를 찾지 못함: {target_name}")
 
-                # [수정됨] 병합(Merge)을 먼저 수행해야 함!
-                merged_data = _merge_entity_data(existing_entity, normalized_payload)
+                    # 기존 데이터 조회
+                    existing_entity = b.get_entity(final_target_id)
+                    if not existing_entity:
+                        raise ValueError("ID는 찾았으나 실제 데이터가 없습니다.")
 
-                # 업데이트 수행 (auto_sync=False)
-                updated_entity = history_repo.update_entity(HISTORY_DB_PATH, final_target_id, merged_data, auto_sync=False)
+                    # [수정됨] 병합(Merge)을 먼저 수행해야 함!
+                    merged_data = _merge_entity_data(existing_entity, normalized_payload)
 
-                log_item.update({
-                    "status": "success",
-                    "id": updated_entity["id"],
-                    "message": "기존 정보에 병합됨",
-                    "result_data": updated_entity
-                })
-                success_count += 1
+                    updated_entity = b.update_entity(final_target_id, merged_data)
 
-            elif final_action == "delete":
-                if final_target_id:
-                    history_repo.delete_entity(HISTORY_DB_PATH, final_target_id, auto_sync=False)
-                    log_item.update({"status": "success", "id": final_target_id, "message": "삭제됨"})
+                    log_item.update({
+                        "status": "success",
+                        "id": updated_entity["id"],
+                        "message": "기존 정보에 병합됨",
+                        "result_data": updated_entity
+                    })
                     success_count += 1
-                else:
-                    raise ValueError(f"삭제할 대상을 찾을 수 없음: {target_name}")
 
-        except Exception as e:
-            log_item.update({"status": "error", "message": str(e)})
-            print(f"⚠️ 처리 실패 ({target_name}): {e}")
+                elif final_action == "delete":
+                    if final_target_id:
+                        b.delete_entity(final_target_id)
+                        log_item.update({"status": "success", "id": final_target_id, "message": "삭제됨"})
+                        success_count += 1
+                    else:
+                        raise ValueError(f"삭제할 대상을 찾을 수 없음: {target_name}")
+
+            except Exception as e:
+                log_item.update({"status": "error", "message": str(e)})
+                print(f"⚠️ 처리 실패 ({target_name}): {e}")
 
-        # [중요] 처리 결과 기록은 반복문 안에서!
-        results.append(log_item)
+            # [중요] 처리 결과 기록은 반복문 안에서!
+            results.append(log_item)
 
-    # 2. 반복문 종료 후 일괄 동기화 (들여쓰기 주의!)
-    if success_count > 0:
-        print("🔄 [API] 일괄 변경 완료. 벡터 DB 동기화를 수행합니다...")
-        try:
-            history_repo.force_sync_vector_db(HISTORY_DB_PATH)
-        except Exception as e:
-            print(f"⚠️ 벡터 DB 동기화 중 오류 발생: {e}")
+        # 2. with 블록 종료 시 일괄 저장 + 벡터 DB 증분 반영 (변경이 없으면 아무것도 쓰지 않음)
+        if success_count > 0:
+            print("🔄 [API] 일괄 변경 완료. 저장 및 벡터 DB 반영을 수행합니다...")
 
     # 3. 최종 반환 (들여쓰기 주의!)
     return {
@@ -402,14 +458,6 @@ async def upsert_history(payload: HistoryUpsertRequest):
     # 기존에 연결되어 있던 엔티티들을 알아내기 위해 Material을 먼저 조회합니다.
     old_material = history_repo.get_material(MATERIAL_DB_PATH, payload.id) # (구현 필요)
 
-    if old_material:
-        old_entity_ids = old_material.get("linked_entity_ids", [])
-        if old_entity_ids:
-            print(f"🧹 기존 엔티티 {len(old_entity_ids)}건 삭제 중...")
-            for ent_id in old_entity_ids:
-                # 벡터 DB와 JSON DB에서 삭제
-                history_repo.delete_entity(HISTORY_DB_PATH, ent_id, auto_sync=False)
-
     client = HistoryLLMClient()
     try:
         commands = client.parse_history_command(payload.content)
@@ -419,36 +467,46 @@ async def upsert_history(payload: HistoryUpsertRequest):
     results = []
     success_count = 0
 
-    # 1. 반복문 시작
-    for cmd in commands:
-        action = cmd.get("action", "create")
-        target_name = cmd.get("target", {}).get("name")
+    # 기존 엔티티 삭제 + 새 엔티티 생성을 하나의 batch로 처리 (JSON 1회 저장, 벡터 DB 1회 반영)
+    with history_repo.batch(HISTORY_DB_PATH) as b:
+        if old_material:
+            old_entity_ids = old_material.get("linked_entity_ids", [])
+            if old_entity_ids:
+                print(f"🧹 기존 엔티티 {len(old_entity_ids)}건 삭제 중...")
+                for ent_id in old_entity_ids:
+                    b.delete_entity(ent_id)
 
-        log_item = {"name": target_name, "action": action, "status": "pending"}
+        for cmd in commands:
+            action = cmd.get("action", "create")
+            target_name = cmd.get("target", {}).get("name")
 
-        try:
-            raw_payload = cmd.get("payload", {})
-            normalized_payload = _normalize_ingest_payload(raw_payload)
+            log_item = {"name": target_name, "action": action, "status": "pending"}
+
+            try:
+                raw_payload = cmd.get("payload", {})
+                normalized_payload = _normalize_ingest_payload(raw_payload)
+
+                saved_entity = b.create_entity(normalized_payload)
 
-            # [중요] auto_sync=False로 설정하여 매번 동기화 방지
-            saved_entity = history_repo.create_entity(HISTORY_DB_PATH, normalized_payload, auto_sync=False)
+                log_item.update({
+                    "status": "success",
+                    "id": saved_entity["id"],
+                    "message": "새로 생성됨",
+                    "result_data": saved_entity
+                })
+                success_count += 1
 
-            log_item.update({
-                "status": "success",
-                "id": saved_entity["id"],
-                "message": "새로 생성됨",
-                "result_data": saved_entity
-            })
-            success_count += 1
+            except Exception as e:
+                log_item.update({"status": "error", "message": str(e)})
+                print(f"⚠️ 처리 실패 ({target_name}): {e}")
 
-        except Exception as e:
-            log_item.update({"status": "error", "message": str(e)})
-            print(f"⚠️ 처리 실패 ({target_name}): {e}")
+            # [중요] 처리 결과 기록은 반복문 안에서!
+            results.append(log_item)
 
-        # [중요] 처리 결과 기록은 반복문 안에서!
-        results.append(log_item)
+        if b.has_changes:
+            print("🔄 [API] 일괄 변경 완료. 저장 및 벡터 DB 반영을 수행합니다...")
 
-    # 3. 새 엔티티 저장 및 ID 수집
+    # 3. 새 엔티티 ID 수집
     new_linked_ids = []
 
     for item in results:
@@ -456,16 +514,7 @@ async def upsert_history(payload: HistoryUpsertRequest):
         if item.get("status") == "success" and item.get("id"):
             new_linked_ids.append(item["id"])
 
-        # 4. 벡터 DB 동기화 (한 번에)
-    if success_count > 0: # 또는 if new_linked_ids:
-        print("🔄 [API] 일괄 변경 완료. 벡터 DB 동기화를 수행합니다...")
-        try:
-            history_repo.force_sync_vector_db(HISTORY_DB_PATH)
-        except Exception as e:
-            print(f"⚠️ 벡터 DB 동기화 중 오류 발생: {e}")
-
-        # 5. Material 최종 저장 (링크 정보 포함)
-        # mat_id 변수가 위에서 정의되어 있어야 합니다. (payload.id 사용)
+    # 4. Material 최종 저장 (링크 정보 포함)
     mat_id = payload.id
 
     final_material_data = {
@@ -504,12 +553,10 @@ async def delete_material(material_id: str):
 
     if linked_ids:
         print(f"🔗 연결된 엔티티 {len(linked_ids)}건 삭제 시작...")
-        for ent_id in linked_ids:
-            # auto_sync=False로 개별 삭제 시 부하를 줄임
-            history_repo.delete_entity(HISTORY_DB_PATH, ent_id, auto_sync=False)
-
-        # 3. 벡터 DB 동기화 (한 번에 반영)
-        history_repo.force_sync_vector_db(HISTORY_DB_PATH)
+        # 3. JSON 1회 저장 + 벡터 DB 증분 반영 (batch 종료 시 한 번에)
+        with history_repo.batch(HISTORY_DB_PATH) as b:
+            for ent_id in linked_ids:
+                b.delete_entity(ent_id)
 
     # 4. Material 원본 삭제
     success = history_repo.delete_material(MATERIAL_DB_PATH, material_id)
@@ -1,51 +1,46 @@
-import os
-import chromadb
-from chromadb.config import Settings
 from typing import List, Dict, Any
 
 # Solar 임베딩 라이브러리
 from langchain_upstage import UpstageEmbeddings
 
+from app.core.db import get_connection_manager
+from app.common.embedding import BatchedEmbeddings, get_query_embedder
+
 # [변경 1] 로컬 경로 설정 삭제
 # CHROMA_DB_PATH = ... (삭제)
 COLLECTION_NAME = "history_collection"
 
-# 전역 클라이언트 (재연결 방지)
-_shared_client = None
 
 class ManuscriptRepository:
     def __init__(self):
-        global _shared_client
-
-        # 1. 임베딩 함수 생성
-        self.embedding_function = UpstageEmbeddings(model="solar-embedding-1-large")
-
-        if _shared_client is None:
-            # [변경 2] 환경변수에서 호스트/포트 가져오기
-            chroma_host = os.getenv("CHROMA_HOST", "chromadb")
-            chroma_port = os.getenv("CHROMA_PORT", "8000")
-
-            print(f"📡 [ManuscriptRepo] ChromaDB 서버 연결 시도: {chroma_host}:{chroma_port}")
-
-            # [변경 3] HttpClient로 변경 (서버 접속 모드)
-            _shared_client = chromadb.HttpClient(
-                host=chroma_host,
-                port=int(chroma_port),
-                settings=Settings(allow_reset=True, anonymized_telemetry=False)
-            )
+        # 1. 임베딩 함수 생성 (질의 임베딩은 /history/search 등과 배치를 공유)
+        self.embedding_function = BatchedEmbeddings(
+            UpstageEmbeddings(model="solar-embedding-1-large"),
+            get_query_embedder("solar-embedding-1-large"),
+        )
+
+        # 2. ChromaDB 연결은 앱 공용 매니저(app.core.db)를 사용 (HttpClient/컬렉션 핸들 공유)
+        self._manager = get_connection_manager()
+        if self.collection is None:
+            # 혹시 컬렉션이 아직 안 만들어졌을 경우를 대비 (보통 vector_store에서 만들지만 안전하게)
+            print(f"⚠️ 컬렉션 '{COLLECTION_NAME}'을 찾을 수 없습니다. (아직 데이터가 없을 수 있음)")
 
-        self.client = _shared_client
+    @property
+    def client(self):
+        return self._manager.client
 
-        # 컬렉션 가져오기
+    @property
+    def collection(self):
+        # 매번 캐시에서 꺼냄: vector_store가 컬렉션을 재생성하거나 재연결되어도 최신 핸들 사용
         try:
-            self.collection = self.client.get_collection(name=COLLECTION_NAME)
-        except Exception:
-            # 혹시 컬렉션이 아직 안 만들어졌을 경우를 대비 (보통 vector_store에서 만들지만 안전하게)
-            print(f"⚠️ 컬렉션 '{COLLECTION_NAME}'을 찾을 수 없습니다. (아직 데이터가 없을 수 있음)")
-            self.collection = None
+            return self._manager.get_collection(COLLECTION_NAME, create=False)
+        except Exception as e:
+            print(f"⚠️ ChromaDB 연결 실패: {e}")
+            return None
 
     def search(self, query_text: str, n_results: int = 1) -> Dict[str, Any]:
-        if self.collection is None:
+        collection = self.collection
+        if collection is None:
             print("⚠️ 컬렉션이 없어서 검색을 수행할 수 없습니다.")
             return {"documents": [[]], "distances": [[]]}
 
@@ -54,7 +49,7 @@ class ManuscriptRepository:
             query_vector = self.embedding_function.embed_query(query_text)
 
             # 쿼리 수행
-            results = self.collection.query(
+            results = collection.query(
                 query_embeddings=[query_vector],
                 n_results=n_results
             )
@@ -7,29 +7,23 @@ from typing import Dict, Any
 
 # 상대 경로 import 사용 (.service, .schemas)
 from .schemas import ManuscriptInput
-from .service import ManuscriptAnalyzer
+from app.deps import get_manuscript_analyzer
 
 router = APIRouter(prefix="/manuscript", tags=["Fact Checker"])
 
-# 설정 파일 경로
-# 주의: 실행 위치에 따라 경로가 달라질 수 있으므로 절대 경로 사용 권장
-BASE_DIR = os.getcwd()
-PLOT_DB_PATH = os.path.join(BASE_DIR, "app/data/plot.json") # 경로 확인 필요
-CHARACTER_DB_PATH = os.path.join(BASE_DIR, "app/data/characters.json")
-
-# Analyzer 인스턴스 (전역)
-# 실제 프로덕션에서는 Depends를 이용한 의존성 주입을 권장하지만, 현재 구조 유지
+# Analyzer 인스턴스는 앱 전역 1개 (app.core.container)
+# 설정 파일 경로(plot.json / characters.json)는 container 에서 프로젝트 루트 기준으로 관리
 
 
 @router.post("/analyze")
 async def analyze_manuscript_file(
     title: str = Form(...),
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    analyzer=Depends(get_manuscript_analyzer),  # ManuscriptAnalyzer (LangChain 의존이라 타입 import 생략)
 ):
     """
     [파일 업로드] 원고 분석 요청
     """
-    analyzer = ManuscriptAnalyzer(setting_path=PLOT_DB_PATH, character_path=CHARACTER_DB_PATH)
 
     try:
         # 1. 파일 읽기 (Bytes -> String)
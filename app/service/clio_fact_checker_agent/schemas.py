@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class IngestRequest(BaseModel):
     text: str
@@ -40,6 +40,26 @@ class HistoryOut(BaseModel):
     created_at: str
     updated_at: str
 
+class HistoryOutPartial(BaseModel):
+    """fields= projection용 (요청한 필드만 채워서 반환, response_model_exclude_unset과 함께 사용)"""
+    id: str
+    name: Optional[str] = None
+    entity_type: Optional[str] = None
+    era: Optional[str] = None
+    summary: Optional[str] = None
+    description: Optional[str] = None
+    tags: Optional[List[str]] = None
+    related_entities: Optional[List[RelatedEntitySchema]] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+class HistoryFilterOut(BaseModel):
+    total: int
+    offset: int
+    limit: int
+    items: List[HistoryOut]
+    facets: Dict[str, Dict[str, int]]  # {"entity_type": {"Person": 3}, "era": {...}, "tags": {...}}
+
 class ManuscriptInput(BaseModel):
     title: str
     content: str
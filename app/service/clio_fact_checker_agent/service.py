@@ -12,6 +12,16 @@ from langchain_community.utilities import GoogleSerperAPIWrapper
 
 # 로컬 DB 레포지토리
 from app.service.clio_fact_checker_agent.repo import ManuscriptRepository
+from app.common.etag import file_version
+from app.common.hedging import hedged_call
+from app.common.llm_limiter import solar_limiter
+from app.common.prompt_budget import PromptPacker, Section
+
+
+def _evidence_marker(i: int) -> str:
+    # 프롬프트 조립 후 토큰 예산에 맞춰 잘린 검색 결과로 치환할 자리
+    return f"⟦evidence:{i}⟧"
+
 
 class ManuscriptAnalyzer:
     def __init__(self, setting_path: str, character_path: str):
@@ -19,9 +29,11 @@ class ManuscriptAnalyzer:
         self.llm = ChatUpstage(model="solar-pro")
 
         # 2. 소설 설정(Plot DB) 로드 -> 허구 정보 필터링용
-        self.settings = self._load_settings(setting_path)
-        self.character_data = self._load_settings(character_path)
-        self.setting_keywords = self._extract_setting_keywords()
+        #    (앱 전역 인스턴스로 재사용되므로 파일이 바뀌면 reload_settings()가 다시 읽음)
+        self.setting_path = setting_path
+        self.character_path = character_path
+        self._settings_version = None
+        self.reload_settings()
 
         # 3. 로컬 벡터 DB (기존 지식)
         self.repo = ManuscriptRepository()
@@ -46,12 +58,34 @@ class ManuscriptAnalyzer:
             print(f"⚠️ 설정 파일을 찾을 수 없습니다: {path}")
             return {}
 
-    def _extract_setting_keywords(self) -> Set[str]:
+    def reload_settings(self, force: bool = False) -> bool:
+        """plot.json / characters.json 이 바뀐 경우에만 다시 읽음 (stat 비교). 다시 읽었으면 True"""
+        version = (file_version(self.setting_path), file_version(self.character_path))
+        if not force and version == self._settings_version:
+            return False
+
+        settings = self._load_settings(self.setting_path)
+        character_data = self._load_settings(self.character_path)
+        keywords = self._extract_setting_keywords(settings, character_data)
+
+        # 분석 중인 요청이 반쯤 바뀐 설정을 보지 않도록 다 만든 뒤 교체
+        self.settings = settings
+        self.character_data = character_data
+        self.setting_keywords = keywords
+        if self._settings_version is not None:
+            print(f"🔄 [Analyzer] 설정 파일 변경 감지 → 허구 키워드 {len(keywords)}개 재로드")
+        self._settings_version = version
+        return True
+
+    def _extract_setting_keywords(self, plot_data: Dict[str, Any] = None, character_data: Dict[str, Any] = None) -> Set[str]:
         """소설 속 허구의 고유명사 + characters.json의 인물들을 필터링 키워드로 추출"""
         keywords = set()
+        if plot_data is None:
+            plot_data = self.settings
+        if character_data is None:
+            character_data = self.character_data
 
         # 1. plot.json 데이터 처리 (기존 로직 유지)
-        plot_data = self.settings
         for char in plot_data.get("characters", []):
             name = char.get("name", "").strip()
             if name: keywords.add(name)
@@ -62,8 +96,8 @@ class ManuscriptAnalyzer:
                 keywords.add(f.split("(")[0].strip())
 
         # 2. [추가] characters.json 데이터 처리
-        if self.character_data:
-            for name_key in self.character_data.keys():
+        if character_data:
+            for name_key in character_data.keys():
                 keywords.add(name_key.strip())
 
         return keywords
@@ -100,8 +134,10 @@ class ManuscriptAnalyzer:
 
                 def _retry_extract_sentence(chunk_text, keyword):
                     prompt = f"키워드 '{keyword}'가 포함된 문장을 원문 그대로 추출하세요. 없으면 None."
+                    chunk_text = PromptPacker("clio_retry").pack(prompt, [Section("chunk", text=chunk_text)])["chunk"]
                     try:
-                        res = self.llm.invoke([SystemMessage(content=prompt), HumanMessage(content=chunk_text[:3000])])
+                        with solar_limiter.slot():
+                            res = self.llm.invoke([SystemMessage(content=prompt), HumanMessage(content=chunk_text)])
                         val = res.content.strip().strip('"\'')
                         return None if val == "None" or len(val) < 2 else val
                     except: return None
@@ -270,12 +306,16 @@ class ManuscriptAnalyzer:
         ]
         """
 
+        # 문맥 파악을 위해 토큰 예산 안에서 최대한 넣음
+        text = PromptPacker("clio_extract").pack(prompt + "Text: ", [Section("manuscript", text=text)])["manuscript"]
+
         try:
             # LLM에게 텍스트 전달
-            response = self.llm.invoke([
-                SystemMessage(content=prompt),
-                HumanMessage(content=f"Text: {text[:3500]}") # 문맥 파악을 위해 길이 약간 늘림
-            ])
+            with solar_limiter.slot():
+                response = self.llm.invoke([
+                    SystemMessage(content=prompt),
+                    HumanMessage(content=f"Text: {text}")
+                ])
             content = response.content.strip()
 
             # JSON 파싱
@@ -331,16 +371,25 @@ class ManuscriptAnalyzer:
         except Exception:
             return None
 
+    def _fill_evidence(self, name: str, prompt: str, batch_items: List[Dict]) -> str:
+        """검색 결과 본문을 남은 토큰 예산 안에서 항목별로 고르게 잘라 넣음 (고정 800/500자 대신)"""
+        packed = PromptPacker(name).pack(prompt, [
+            Section("evidence", items=[str(item.get('content') or '') for item in batch_items], fair=True),
+        ])
+        for i, evidence in enumerate(packed["evidence"]):
+            prompt = prompt.replace(_evidence_marker(i), evidence)
+        return prompt
+
     def _verify_batch_relevance(self, batch_items: List[Dict]) -> Dict[str, Dict]:
         """[1차] 기본 검증"""
         items_text = ""
-        for item in batch_items:
+        for i, item in enumerate(batch_items):
             items_text += f"""
             ---
             [ID: {item['id']}]
             - 검증 명제: {item['keyword']}
             - 소설 맥락: {item['context']}
-            - 검색 결과: {item['content'][:800]} (너무 길면 자름)
+            - 검색 결과: {_evidence_marker(i)}
             """
 
         prompt = f"""
@@ -364,8 +413,10 @@ class ManuscriptAnalyzer:
         }}
         """
 
+        prompt = self._fill_evidence("clio_verify", prompt, batch_items)
+
         try:
-            response = self.llm.invoke([SystemMessage(content=prompt)])
+            response = hedged_call("clio_verify", lambda: self.llm.invoke([SystemMessage(content=prompt)]))
             return self._clean_json_string(response.content)
         except Exception as e:
             print(f"⚠️ 배치 검증 실패: {e}")
@@ -377,7 +428,7 @@ class ManuscriptAnalyzer:
         1차 검증 결과를 바탕으로 '최종 감수관' 페르소나가 한 번 더 확인합니다.
         """
         audit_payload = ""
-        for item in batch_items:
+        for i, item in enumerate(batch_items):
             item_id = item['id']
             # 1차 결과 가져오기
             f_res = first_results.get(item_id, {})
@@ -388,7 +439,7 @@ class ManuscriptAnalyzer:
             ---
             [ID: {item_id}]
             - 검증 명제: {item['keyword']}
-            - 검색 증거: {item['content'][:500]}
+            - 검색 증거: {_evidence_marker(i)}
             - 1차 판정: {'[승인]' if f_is_positive else '[오류/거부]'} (이유: {f_reason})
             """
 
@@ -413,8 +464,10 @@ class ManuscriptAnalyzer:
         }}
         """
 
+        prompt = self._fill_evidence("clio_audit", prompt, batch_items)
+
         try:
-            response = self.llm.invoke([SystemMessage(content=prompt)])
+            response = hedged_call("clio_audit", lambda: self.llm.invoke([SystemMessage(content=prompt)]))
             return self._clean_json_string(response.content)
         except Exception as e:
             print(f"⚠️ 2차 교차 검증 실패: {e}")
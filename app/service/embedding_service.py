@@ -1,20 +1,22 @@
-import os
 from typing import List
-from openai import OpenAI
 from dotenv import load_dotenv
 
-from app.repository.client.upstage_client import UpstageClient
+from app.common.embedding import get_query_embedder
 
 load_dotenv()
 
 
 class EmbeddingService:
     def __init__(self):
-        self._client = UpstageClient()
+        # langchain_upstage는 서비스를 처음 만들 때 로드
+        from app.repository.client.llm_client import UpstageClinet
+
+        self._client = UpstageClinet()
 
     def create_embeddings(self, texts: List[str]) -> List[List[float]]:
         # 정제 작업은 했다 가정
-        return self._client.create_embeddings(texts=texts)
-    
+        return self._client.get_embedding_mode().embed_documents(texts)
+
     def create_embedding(self, text: str) -> List[float]:
-        return self._client.create_embeddings([text])[0]
\ No newline at end of file
+        # 동시 질의는 마이크로배칭으로 한 번에 호출
+        return get_query_embedder(self._client.embedding_model_name).embed_query(text)
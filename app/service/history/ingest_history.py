@@ -7,6 +7,7 @@ import os
 # (주의) repo 모듈은 common/history/repo.py에 구현되어야 함
 from app.common.history import repo
 from app.service.history.solar_client import HistoryLLMClient
+from app.common.llm_limiter import llm_priority
 
 # 파일 경로 상수 정의
 DB_PATH = "app/common/data/history_db.json"
@@ -50,7 +51,8 @@ def process_history_text(text: str) -> Dict[str, Any]:
 
     # 1. LLM 분석
     client = HistoryLLMClient()
-    cmd = client.parse_history_command(text)
+    with llm_priority("background"):
+        cmd = client.parse_history_command(text)
 
     action = cmd.get("action")
     target_name = cmd.get("target", {}).get("name")
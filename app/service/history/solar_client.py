@@ -5,13 +5,15 @@ import os
 import requests
 from typing import Any, Dict, List
 from dotenv import load_dotenv
-from langchain_upstage import ChatUpstage
-from langchain_core.messages import SystemMessage, HumanMessage
+from app.common.deadline import clamp_timeout
+from app.common.llm_limiter import solar_limiter
 
 load_dotenv()
 
 class HistoryLLMClient:
     def __init__(self) -> None:
+        # LangChain은 import 비용이 커서 실제 사용 시점에 로드 (서버 기동/라우터 import 가볍게)
+        from langchain_upstage import ChatUpstage
         self.llm = ChatUpstage(model="solar-pro")
         self.api_key = os.getenv("SOLAR_API_KEY", "").strip()
         self.base_url = os.getenv("SOLAR_BASE_URL", "https://api.upstage.ai/v1/chat/completions").strip()
@@ -60,13 +62,15 @@ class HistoryLLMClient:
         ]
         """
 
+        from langchain_core.messages import SystemMessage, HumanMessage
         messages = [
             SystemMessage(content=system_prompt),
             HumanMessage(content=f"입력 텍스트: {text}")
         ]
 
         try:
-            response = self.llm.invoke(messages)
+            with solar_limiter.slot():
+                response = self.llm.invoke(messages)
             content = response.content.strip()
 
             # 마크다운 코드 블록 제거 (혹시 몰라서 처리)
@@ -104,8 +108,9 @@ class HistoryLLMClient:
             "temperature": 0.1, # 정확성을 위해 낮춤
         }
 
-        resp = requests.post(self.base_url, headers=headers, json=payload, timeout=30)
-        resp.raise_for_status()
+        with solar_limiter.slot():
+            resp = requests.post(self.base_url, headers=headers, json=payload, timeout=clamp_timeout(30, "llm"))
+            resp.raise_for_status()
 
         data = resp.json()
         return data["choices"][0]["message"]["content"]
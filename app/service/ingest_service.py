@@ -1,5 +1,7 @@
 import os
 
+from app.common.llm_limiter import llm_priority
+
 # 캐릭터 모듈
 try:
     from app.service.characters import summarize_character_info
@@ -32,7 +34,9 @@ def _get_plot_manager():
     if PlotManager is None:
         return None
 
-    _plot_manager_singleton = PlotManager()
+    # 앱 전역 PlotManager 공유 (story_keeper 라우터/파이프라인과 같은 인스턴스)
+    from app.core.container import container
+    _plot_manager_singleton = container.plot_manager()
     return _plot_manager_singleton
 
 
@@ -86,12 +90,14 @@ class StoryIngestionService:
         print(f"🔄 [IngestService] 텍스트 수신 (Type: {upload_type}, Length: {len(text)}자)")
 
         try:
-            if upload_type == "character":
-                return self._to_character_manager(text)
-
-            # 프론트에서 world / worldview 둘 다 올 수 있음
-            if upload_type in ("world", "worldview"):
-                return self._to_world_manager(text)
+            # 설정 파일 적재는 background 우선순위 (실시간 피드백 호출이 먼저)
+            with llm_priority("background"):
+                if upload_type == "character":
+                    return self._to_character_manager(text)
+
+                # 프론트에서 world / worldview 둘 다 올 수 있음
+                if upload_type in ("world", "worldview"):
+                    return self._to_world_manager(text)
 
             print(f"⚠️ 지원하지 않는 타입: {upload_type}")
             return False
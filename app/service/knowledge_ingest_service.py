@@ -0,0 +1,303 @@
+"""
+/agent 지식 베이스 대량 적재 (JSONL 스트리밍)
+
+    python -m app.service.knowledge_ingest_service data/knowledge.jsonl
+    python -m app.service.knowledge_ingest_service infra/chromadb/sample_knowledge.json --no-resume
+
+입력 형식
+- .jsonl : 한 줄에 레코드 1개. 문자열이거나 {"text"|"document"|"content": ..., "metadata": {...}, "id"?: ...}
+- .json  : {"documents": [...], "metadatas": [...]} (infra/chromadb/sample_knowledge.json 형식, 작은 파일용)
+
+- ID는 본문 내용 해시 (같은 문서를 다시 넣어도 덮어쓰기만 되고 중복/충돌 없음)
+- 이미 저장된 해시 ID는 임베딩 없이 건너뜀, 레코드에 "id"를 직접 준 경우는 수정본일 수 있어 항상 다시 upsert
+- 파일은 한 줄씩 읽고 upsert 묶음(chunk) 단위로만 메모리에 올림
+- 묶음 안에서 임베딩은 embed_batch 크기로 나눠 최대 max_in_flight개 동시 호출
+- 묶음을 저장할 때마다 체크포인트 기록 → 중단 후 다시 실행하면 이어서 적재
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_EMBED_BATCH = int(os.getenv("KNOWLEDGE_INGEST_EMBED_BATCH", "64"))        # Upstage 임베딩 API 1회 최대 100개
+DEFAULT_UPSERT_BATCH = int(os.getenv("KNOWLEDGE_INGEST_UPSERT_BATCH", "512"))     # Chroma max_batch_size보다 크면 자동 축소
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("KNOWLEDGE_INGEST_MAX_IN_FLIGHT", "4"))     # 동시 임베딩 호출 수
+DEFAULT_MAX_RETRIES = int(os.getenv("KNOWLEDGE_INGEST_MAX_RETRIES", "3"))
+DEFAULT_CHECKPOINT_DIR = os.getenv(
+    "KNOWLEDGE_INGEST_CHECKPOINT_DIR",
+    str(Path(__file__).resolve().parents[1] / "data" / "ingest_checkpoints"),
+)
+
+TEXT_KEYS = ("text", "document", "content")
+ID_PREFIX = "kb_"  # 본문 해시 ID 접두사
+
+Record = Tuple[str, str, Dict[str, Any]]  # (id, text, metadata)
+EmbedFn = Callable[[List[str]], List[List[float]]]
+
+
+def content_id(text: str) -> str:
+    """본문 해시 기반 문서 ID (kb_ + sha256 앞 32자리)"""
+    return ID_PREFIX + hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:32]
+
+
+def _clean_metadata(metadata: Any, source: str) -> Dict[str, Any]:
+    # Chroma 메타데이터는 str/int/float/bool 값만 허용 (그 외는 JSON 문자열로)
+    meta: Dict[str, Any] = {"source": source}
+    if isinstance(metadata, dict):
+        for k, v in metadata.items():
+            if v is None:
+                continue
+            meta[str(k)] = v if isinstance(v, (str, int, float, bool)) else json.dumps(v, ensure_ascii=False)
+    return meta
+
+
+def _to_record(raw: Any, metadata: Any, source: str) -> Optional[Record]:
+    if isinstance(raw, dict):
+        text = next((raw[k] for k in TEXT_KEYS if isinstance(raw.get(k), str)), None)
+        metadata = raw.get("metadata", metadata)
+        doc_id = raw.get("id")
+    else:
+        text, doc_id = raw, None
+
+    if not isinstance(text, str) or not text.strip():
+        return None
+    text = text.strip()
+    return (str(doc_id) if doc_id else content_id(text)), text, _clean_metadata(metadata, source)
+
+
+def iter_knowledge_records(path: str) -> Iterator[Optional[Record]]:
+    """
+    레코드를 하나씩 yield (잘못된 줄은 None — 줄 번호가 체크포인트 위치와 어긋나지 않도록 건너뛰지 않음)
+    """
+    source = os.path.basename(path)
+
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            documents = data.get("documents") or []
+            metadatas = data.get("metadatas") or []
+        else:
+            documents, metadatas = data, []
+        for i, doc in enumerate(documents):
+            yield _to_record(doc, metadatas[i] if i < len(metadatas) else None, source)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield _to_record(json.loads(line), None, source)
+            except json.JSONDecodeError:
+                yield None
+
+
+def file_fingerprint(path: str) -> str:
+    # 체크포인트 키: 경로가 아니라 내용 기준 (업로드 임시 파일도 같은 내용이면 이어서 적재)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:24]
+
+
+class KnowledgeIngestor:
+    """
+    JSONL -> (해시 ID, 병렬 임베딩) -> VectorRepository.upsert_documents
+
+    vector_repository: upsert_documents / existing_ids 를 쓰는 VectorRepository
+    embed_documents:   문서 임베딩 함수 (EmbeddingService.create_embeddings)
+    """
+
+    def __init__(
+        self,
+        vector_repository: Any,
+        embed_documents: EmbedFn,
+        embed_batch: int = DEFAULT_EMBED_BATCH,
+        upsert_batch: int = DEFAULT_UPSERT_BATCH,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        checkpoint_dir: Optional[str] = DEFAULT_CHECKPOINT_DIR,
+        skip_existing: bool = True,
+    ):
+        self.vector_repository = vector_repository
+        self.embed_documents = embed_documents
+        self.embed_batch = max(1, embed_batch)
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max(1, max_retries)
+        self.checkpoint_dir = checkpoint_dir
+        self.skip_existing = skip_existing
+
+        upsert_batch = max(1, upsert_batch)
+        max_batch_size = getattr(vector_repository, "max_batch_size", lambda: None)()
+        if max_batch_size:
+            upsert_batch = min(upsert_batch, max_batch_size)
+        self.upsert_batch = upsert_batch
+
+    # ---------------------------------------------------------
+    # 체크포인트
+    # ---------------------------------------------------------
+    def _checkpoint_path(self, fingerprint: str) -> Optional[str]:
+        if not self.checkpoint_dir:
+            return None
+        return os.path.join(self.checkpoint_dir, f"{fingerprint}.json")
+
+    def _load_checkpoint(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        path = self._checkpoint_path(fingerprint)
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _save_checkpoint(self, fingerprint: str, state: Dict[str, Any]) -> None:
+        path = self._checkpoint_path(fingerprint)
+        if not path:
+            return
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.checkpoint_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # ---------------------------------------------------------
+    # 적재
+    # ---------------------------------------------------------
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                vectors = self.embed_documents(texts)
+                if len(vectors) != len(texts):
+                    raise RuntimeError(f"embedding returned {len(vectors)} vectors for {len(texts)} texts")
+                return vectors
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                wait = 2 ** (attempt - 1)
+                print(f"⚠️ 임베딩 실패 ({attempt}/{self.max_retries}), {wait}s 후 재시도: {e}")
+                time.sleep(wait)
+        return []
+
+    def _ingest_chunk(self, pool: ThreadPoolExecutor, chunk: List[Record], stats: Dict[str, int]) -> None:
+        # 묶음 안 중복 ID는 마지막 것만
+        by_id: Dict[str, Record] = {}
+        for rec in chunk:
+            by_id[rec[0]] = rec
+        stats["duplicates"] += len(chunk) - len(by_id)
+
+        if self.skip_existing:
+            # 본문 해시 ID만 건너뜀 (같은 ID = 같은 본문). 명시 ID는 내용이 고쳐졌을 수 있어 항상 upsert
+            hashed = [eid for eid in by_id if eid.startswith(ID_PREFIX)]
+            existing = self.vector_repository.existing_ids(hashed) if hashed else set()
+            for eid in existing:
+                del by_id[eid]
+            stats["skipped_existing"] += len(existing)
+
+        records = list(by_id.values())
+        if not records:
+            return
+
+        texts = [text for _, text, _ in records]
+        batches = [texts[i:i + self.embed_batch] for i in range(0, len(texts), self.embed_batch)]
+        embeddings: List[List[float]] = []
+        for vectors in pool.map(self._embed_with_retry, batches):
+            embeddings.extend(vectors)
+
+        self.vector_repository.upsert_documents(
+            documents=texts,
+            embeddings=embeddings,
+            metadatas=[meta for _, _, meta in records],
+            ids=[eid for eid, _, _ in records],
+        )
+        stats["upserted"] += len(records)
+
+    def ingest_file(self, path: str, resume: bool = True) -> Dict[str, Any]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"입력 파일을 찾을 수 없습니다: {path}")
+
+        fingerprint = file_fingerprint(path)
+        checkpoint = self._load_checkpoint(fingerprint) if resume else None
+        start = int(checkpoint.get("records_done", 0)) if checkpoint else 0
+        stats = {"upserted": 0, "skipped_existing": 0, "duplicates": 0, "invalid": 0}
+        if checkpoint:
+            stats.update(checkpoint.get("stats", {}))
+            if checkpoint.get("done"):
+                print(f"✅ 이미 적재 완료된 파일입니다: {path}")
+                return {"fingerprint": fingerprint, "records": start, "resumed_from": start, "elapsed_s": 0.0, **stats}
+            print(f"↩️ 체크포인트에서 이어서 적재: {start}번째 레코드부터")
+
+        t0 = time.perf_counter()
+        done = start
+        chunk: List[Record] = []
+
+        def _commit(records_done: int, finished: bool = False) -> None:
+            self._save_checkpoint(fingerprint, {
+                "source": os.path.abspath(path),
+                "records_done": records_done,
+                "stats": stats,
+                "done": finished,
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            })
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="kb-embed") as pool:
+            for idx, rec in enumerate(iter_knowledge_records(path)):
+                if idx < start:
+                    continue
+                done = idx + 1
+                if rec is None:
+                    stats["invalid"] += 1
+                    continue
+                chunk.append(rec)
+                if len(chunk) >= self.upsert_batch:
+                    self._ingest_chunk(pool, chunk, stats)
+                    chunk = []
+                    _commit(done)
+                    rate = (done - start) / max(time.perf_counter() - t0, 1e-9)
+                    print(f"📥 {done}건 처리 (upsert {stats['upserted']}, 기존 {stats['skipped_existing']}) {rate:.0f} docs/s")
+
+            if chunk:
+                self._ingest_chunk(pool, chunk, stats)
+            _commit(done, finished=True)
+
+        elapsed = time.perf_counter() - t0
+        print(f"✅ 적재 완료: {done}건 ({elapsed:.1f}s) {stats}")
+        return {"fingerprint": fingerprint, "records": done, "resumed_from": start, "elapsed_s": round(elapsed, 2), **stats}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="bulk JSONL ingestion into the /agent knowledge collection")
+    parser.add_argument("path")
+    parser.add_argument("--no-resume", action="store_true", help="체크포인트 무시하고 처음부터")
+    parser.add_argument("--embed-batch", type=int, default=DEFAULT_EMBED_BATCH)
+    parser.add_argument("--upsert-batch", type=int, default=DEFAULT_UPSERT_BATCH)
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT)
+    args = parser.parse_args()
+
+    from app.core.container import container
+
+    vector_service = container.vector_service()
+    result = vector_service.ingest_file(
+        args.path,
+        resume=not args.no_resume,
+        embed_batch=args.embed_batch,
+        upsert_batch=args.upsert_batch,
+        max_in_flight=args.max_in_flight,
+    )
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,26 +2,35 @@
 import sys
 import os
 import json
+import asyncio
+import tempfile
 from pathlib import Path
 
 sys.path.insert(0, os.getcwd())
 
-from fastapi import APIRouter, HTTPException, Body, Form, Query
+from fastapi import APIRouter, HTTPException, Body, Form, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import ValidationError, BaseModel
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from app.service.story_keeper_agent.ingest_episode import (
-    ingest_episode,
-    IngestEpisodeRequest,
-)
-from app.service.story_keeper_agent.ingest_episode.chunking import split_into_chunks
-from app.service.story_keeper_agent.load_state.extracter import PlotManager
+from app.core.container import container
+from app.common.deadline import CancelToken, Cancelled, cancel_scope
 
-from app.service.story_keeper_agent.rules.check_consistency import check_consistency
+from app.service.story_keeper_agent.pipeline import analyze_feedback, issue_result, summary_saved
 from app.service.characters import upsert_character
+from app.common.changelog import record_change
+from app.common.etag import not_modified
+from app.common.pagination import decode_cursor, paginate_keys, parse_fields, project
 
 router = APIRouter(prefix="/story", tags=["story-keeper"])
-manager = PlotManager()
+
+# 분석 중 클라이언트 연결 끊김 확인 간격
+DISCONNECT_POLL_S = float(os.getenv("FEEDBACK_DISCONNECT_POLL_S", "1.0"))
+
+
+def _manager():
+    # 앱 전역 PlotManager (pipeline/ingest와 공유). LLM 클라이언트 생성이 있어 import 시점이 아니라 첫 요청 때 생성
+    return container.plot_manager()
 
 
 def _project_root() -> Path:
@@ -44,9 +53,16 @@ def _safe_read_json(path: str) -> dict:
 
 
 def _safe_write_json(path: str, data: Any) -> None:
+    # 임시 파일에 쓰고 교체 (분석 중인 요청이 반쯤 쓴 plot.json을 읽지 않도록)
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    fd, tmp_path = tempfile.mkstemp(prefix="._tmp_", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
 
 def _load_plot_config() -> dict:
@@ -54,48 +70,11 @@ def _load_plot_config() -> dict:
     return _safe_read_json(path)
 
 
-def _extract_world_from_plot(plot_config: dict) -> dict:
-    if not isinstance(plot_config, dict):
-        return {}
-    for k in ("world", "world_setting", "worldSettings", "settings", "setting", "global"):
-        v = plot_config.get(k)
-        if isinstance(v, dict) and v:
-            return v
-    return plot_config if isinstance(plot_config, dict) else {}
-
-
 def _load_story_history() -> dict:
     path = _data_path("story_history.json")
     return _safe_read_json(path)
 
 
-def _load_character_config() -> dict:
-    path = _data_path("characters.json")
-    if not os.path.exists(path):
-        return {"characters": []}
-
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except Exception:
-        return {"characters": []}
-
-    if isinstance(data, dict):
-        chars = []
-        for name, d in data.items():
-            if isinstance(d, dict):
-                x = dict(d)
-                x.setdefault("name", name)
-                chars.append(x)
-        return {"characters": chars}
-
-    if isinstance(data, list):
-        chars = [d for d in data if isinstance(d, dict) and d.get("name")]
-        return {"characters": chars}
-
-    return {"characters": []}
-
-
 def _call_upsert_character(name: str, text: str):
     print(f"📂 현재 실행 위치(CWD): {os.getcwd()}")
     target_path = os.path.abspath(_data_path("characters.json"))
@@ -121,27 +100,87 @@ def _call_upsert_character(name: str, text: str):
         raise
 
 
+def _episode_key(k: Any) -> Optional[int]:
+    try:
+        return int(str(k))
+    except (TypeError, ValueError):
+        return None
+
+
 @router.get(
     "/history",
     summary="Story History",
-    description="app/data/story_history.json을 그대로 반환",
+    description="app/data/story_history.json 반환 (from_ep/to_ep 범위, cursor/limit 페이지네이션, fields projection 지원)",
 )
-def get_story_history():
+def get_story_history(
+    request: Request,
+    response: Response,
+    from_ep: Optional[int] = Query(None, ge=0, description="시작 화 (포함)"),
+    to_ep: Optional[int] = Query(None, ge=0, description="끝 화 (포함)"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="페이지 크기 (없으면 범위 전체)"),
+    fields: Optional[str] = Query(None, description="반환할 필드 (예: episode_no,title,summary)"),
+):
+    # 파일이 그대로면 읽지도 않고 304
+    cached = not_modified(request, response, _data_path("story_history.json"))
+    if cached:
+        return cached
+
     try:
         history = _load_story_history()
         if not isinstance(history, dict):
             history = {}
-        return {"history": history}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"history load failed: {e}")
 
+    paginated = limit is not None or cursor is not None
+    if from_ep is None and to_ep is None and not paginated and not fields:
+        return {"history": history}
+
+    try:
+        after = decode_cursor(cursor)
+        after_ep = int(after) if after is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    by_ep: Dict[int, str] = {}
+    for k in history.keys():
+        ep = _episode_key(k)
+        if ep is None:
+            continue
+        if from_ep is not None and ep < from_ep:
+            continue
+        if to_ep is not None and ep > to_ep:
+            continue
+        by_ep[ep] = k
+
+    eps = sorted(by_ep)
+    next_cursor = None
+    if paginated:
+        eps, next_cursor = paginate_keys(eps, after_ep, limit or 50)
+
+    field_list = parse_fields(fields)
+    out = {
+        by_ep[ep]: project(history[by_ep[ep]], field_list) if isinstance(history[by_ep[ep]], dict) else history[by_ep[ep]]
+        for ep in eps
+    }
+
+    body: Dict[str, Any] = {"history": out}
+    if paginated:
+        body["next_cursor"] = next_cursor
+    return body
+
 
 @router.get(
     "/world_setting",
     summary="World/Plot Setting (Read)",
     description="app/data/plot.json을 그대로 반환",
 )
-def get_world_setting():
+def get_world_setting(request: Request, response: Response):
+    cached = not_modified(request, response, _data_path("plot.json"))
+    if cached:
+        return cached
+
     try:
         plot = _load_plot_config()
         if not isinstance(plot, dict):
@@ -175,9 +214,10 @@ def world_setting(text: str = Body(..., media_type="text/plain")):
                     v.pop("summary", None)
 
             _safe_write_json(path, plot)
+            record_change("plot", "upsert", "plot", plot)
             return {"status": "success", "message": "world cleared", "plot": plot}
 
-        return manager.update_global_settings(text)
+        return _manager().update_global_settings(text)
 
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -202,7 +242,7 @@ def ingest(payload: IngestRequest):
             return {"status": "error", "message": "empty text"}
 
         if upload_type in ("world", "worldview"):
-            res = manager.update_global_settings(text)
+            res = _manager().update_global_settings(text)
             return {"status": "success", "message": "world ingested", "data": res}
 
         return {"status": "error", "message": f"unsupported type: {upload_type}"}
@@ -223,67 +263,97 @@ def character_setting(name: str = Form(...), text: str = Form(...)):
         raise HTTPException(status_code=400, detail=str(e))
 
 
+async def _cancel_on_disconnect(request: Request, token: CancelToken) -> None:
+    # 클라이언트가 떠나면 분석을 멈춤 (대기 중인 LLM 호출까지 취소가 전달됨)
+    while not token.cancelled:
+        if await request.is_disconnected():
+            token.cancel("disconnected")
+            print("🛑 [FEEDBACK] 클라이언트 연결 끊김 → 분석 취소")
+            return
+        await asyncio.sleep(DISCONNECT_POLL_S)
+
+
 @router.post(
     "/manuscript_feedback",
     summary="Manuscript Feedback",
     description="원고 업로드 -> plot.json/characters.json/story_history.json과 비교 피드백",
 )
-def manuscript_feedback(
+async def manuscript_feedback(
+    request: Request,
     episode_no: int,
     text: str = Body(..., media_type="text/plain"),
     debug_raw: bool = Query(False, description="디버그 정보를 포함할지"),
+    deadline_ms: Optional[int] = Query(None, ge=1, description="요청 전체 시간 예산(ms). 넘기면 그때까지 검증된 이슈만 partial로 반환"),
+    doc_id: Optional[str] = Query(None, description="문서 ID. 같은 문서로 새 원고가 오면 이전 분석을 취소"),
+):
+    # 분석은 스레드 풀에서, 이벤트 루프는 연결 끊김만 지켜봄
+    token = CancelToken()
+    watcher = asyncio.create_task(_cancel_on_disconnect(request, token))
+    try:
+        return await run_in_threadpool(_manuscript_feedback, episode_no, text, debug_raw, deadline_ms, doc_id, token)
+    finally:
+        watcher.cancel()
+
+
+def _manuscript_feedback(
+    episode_no: int,
+    text: str,
+    debug_raw: bool,
+    deadline_ms: Optional[int],
+    doc_id: Optional[str],
+    token: CancelToken,
 ):
     try:
         full_text_str = text or ""
         if not full_text_str.strip():
             raise ValueError("원고가 비어있습니다.")
 
-        plot_config = _load_plot_config()
-        world = _extract_world_from_plot(plot_config)
-
-        history = _load_story_history()
-        character_config = _load_character_config()
-        story_state = {"world": world, "history": history}
-
-        chunks = split_into_chunks(full_text_str)
-
-        ingest_episode(req=IngestEpisodeRequest(episode_no=episode_no, text_chunks=chunks))
-
-        history_after = _load_story_history()
-        story_state = {"world": world, "history": history_after}
-
-        episode_facts = manager.extract_facts(episode_no, full_text_str, story_state)
-        if isinstance(episode_facts, dict):
-            episode_facts["raw_text"] = full_text_str
-        else:
-            episode_facts = {"raw_text": full_text_str}
-
-        issues = check_consistency(
-            episode_facts=episode_facts,
-            character_config=character_config,
-            plot_config=plot_config,
-            story_state=story_state,
-        )
+        # chunk → ingest → (요약 저장 ‖ 룰 검사) 단계 그래프 (run_pipeline과 같은 정의)
+        # 같은 원고/저장소 상태면 진행 중인 계산에 합류하거나 캐시된 결과 사용 (더블 클릭, 저장+분석 동시 요청)
+        with cancel_scope(token):
+            run, source = analyze_feedback(episode_no, full_text_str, deadline_ms=deadline_ms, doc_id=doc_id)
+        if not run.ok:
+            failed = run.results[run.failed[0]]
+            raise ValueError(f"{failed.name} 단계 실패: {failed.error}")
 
+        result = issue_result(run)
+        issues = result["issues"]
         if not issues:
-            base = {"episode_no": episode_no, "message": "수정할 사안이 없습니다!", "issues": []}
+            message = "시간 안에 검증을 마친 이슈가 없습니다." if result["partial"] else "수정할 사안이 없습니다!"
+            base = {"episode_no": episode_no, "message": message, "issues": []}
         else:
             base = {"episode_no": episode_no, "issues": issues}
 
+        # 요약 저장 단계는 실패/시간 초과여도 응답은 200 → 저장 여부를 따로 알려 줌 (히스토리 저장 버튼이 확인)
+        base["summary_saved"] = summary_saved(run)
+
+        if result["partial"]:
+            # 마감으로 빠진 룰 검사/재검증 못 한 이슈 수를 같이 알려 줌
+            base["partial"] = True
+            base["skipped_checks"] = result["skipped_checks"]
+            base["unverified_count"] = result["unverified"]
+
         if debug_raw:
+            state = run.get("state") or {}
+            character_config = state.get("character_config") or {}
             base["debug"] = {
                 "cwd": os.getcwd(),
                 "history_path": _data_path("story_history.json"),
-                "full_text_len": len(full_text_str),
-                "plot_loaded": bool(plot_config),
-                "world_loaded": bool(world),
-                "history_loaded": bool(history_after),
-                "character_count": len(character_config.get("characters", [])) if isinstance(character_config, dict) else 0,
-                "issues_count": len(issues) if isinstance(issues, list) else 0,
+                "full_text_len": len(run.get("full_text") or ""),
+                "plot_loaded": bool(state.get("plot_config")),
+                "world_loaded": bool(state.get("world")),
+                "history_loaded": bool(state.get("history")),
+                "character_count": len(character_config.get("characters", [])),
+                "issues_count": len(issues),
+                "stages": run.timings(),
+                "source": source,
             }
 
         return base
 
+    except Cancelled as ce:
+        # 같은 문서의 새 요청으로 대체됐거나 클라이언트가 떠남
+        raise HTTPException(status_code=409, detail=f"분석이 취소되었습니다 ({ce.reason or 'cancelled'})")
     except ValidationError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
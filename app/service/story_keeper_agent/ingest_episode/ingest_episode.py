@@ -13,7 +13,12 @@ def ingest_episode(
     *,
     episode_no: Optional[int] = None,
     text_chunks: Optional[List[str]] = None,
+    summarize: bool = True,
 ) -> IngestEpisodeResponse:
+    """
+    청크를 합쳐 회차 원문을 만들고 story_history 요약을 저장
+    summarize=False면 요약은 건너뜀 (파이프라인이 요약 단계를 따로 병렬 실행할 때)
+    """
 
     if req is None:
         try:
@@ -23,11 +28,17 @@ def ingest_episode(
 
     chunks = req.text_chunks
     full_text = "\n".join(chunks).strip()
+    if not summarize:
+        return IngestEpisodeResponse(episode_no=req.episode_no, full_text=full_text)
 
     try:
-        from app.service.story_keeper_agent.load_state.extracter import PlotManager
-        manager = PlotManager()
-        res = manager.summarize_and_save(req.episode_no, full_text)
+        # PlotManager(LLM 클라이언트 포함)는 앱 전역 인스턴스 재사용
+        from app.core.container import container
+        from app.common.llm_limiter import llm_priority
+        manager = container.plot_manager()
+        # 회차 요약 저장은 적재 작업 → 실시간 피드백 호출에 Solar 동시 한도를 양보
+        with llm_priority("background"):
+            res = manager.summarize_and_save(req.episode_no, full_text)
         if res.get("status") != "success":
             raise IngestEpisodeError("story_history 저장 실패")
     except Exception as e:
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
 import re
+import tempfile
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from app.common.changelog import record_change
+from app.common.hedging import hedged_call
+from app.common.prompt_budget import PromptPacker, Section
+
 try:
     from dotenv import load_dotenv
-    from langchain_upstage import ChatUpstage
 except ImportError:
-    ChatUpstage = None
+    load_dotenv = None
 
 
 def _project_root() -> Path:
@@ -28,9 +33,21 @@ def _read_json(path: Path, default: Any):
 
 
 def _write_json(path: Path, data: Any) -> None:
+    # 임시 파일에 쓰고 교체 (파이프라인 다른 단계가 동시에 읽어도 반쯤 쓴 파일을 보지 않도록)
     path.parent.mkdir(parents=True, exist_ok=True)
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    fd, tmp_path = tempfile.mkstemp(prefix="._tmp_", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def source_hash(text: str) -> str:
+    """요약 원문 해시 (story_history 항목이 어떤 원고로 만든 요약인지 확인용)"""
+    return hashlib.sha256((text or "").strip().encode("utf-8")).hexdigest()[:32]
 
 
 def _split_sentences_ko(text: str) -> List[str]:
@@ -87,7 +104,12 @@ class PlotManager:
 
     def _init_llm(self) -> Optional["ChatUpstage"]:
         key = (os.getenv("UPSTAGE_API_KEY") or "").strip()
-        if not key or ChatUpstage is None:
+        if not key:
+            return None
+        # LangChain은 import 비용이 커서 PlotManager를 실제로 만들 때 로드
+        try:
+            from langchain_upstage import ChatUpstage
+        except ImportError:
             return None
         try:
             return ChatUpstage(model="solar-pro")
@@ -111,21 +133,24 @@ class PlotManager:
         if self.llm is None:
             return _pick_summary(text)
 
-        prompt = f"""
+        template = """
 너는 웹소설 편집자다.
 아래 '세계관 설정' 원문을 읽고, 핵심 규칙/배경/제약/톤을 6~10줄로 요약해라.
 반드시 JSON으로만 반환해라.
 
 형식:
-{{
+{
   "summary": ["...", "..."]
-}}
+}
 
 세계관 원문:
-{text[:6000]}
+{world}
 """
+        # 글자 수가 아니라 토큰 예산만큼 원문을 넣음
+        packed = PromptPacker("world_summary").pack(template, [Section("world", text=text)])
+        prompt = template.replace("{world}", packed["world"])
         try:
-            res = self.llm.invoke(prompt)
+            res = hedged_call("world_summary", lambda: self.llm.invoke(prompt))
             data = self._safe_json(getattr(res, "content", "") or "")
             summary = data.get("summary")
             if isinstance(summary, list):
@@ -171,6 +196,7 @@ class PlotManager:
         plot["characters"] = characters
 
         _write_json(self.global_setting_file, plot)
+        record_change("plot", "upsert", "plot", plot)
         return {"status": "success", "data": plot}
 
     def summarize_and_save(self, episode_no: int, full_text: str) -> Dict[str, Any]:
@@ -187,7 +213,7 @@ class PlotManager:
                 "story_flow": prev_flow,
             }
         else:
-            prompt = f"""
+            template = """
 너는 웹소설 편집자다.
 아래 원고를 요약하여 JSON으로 반환하라.
 키: title, summary, story_flow
@@ -196,10 +222,16 @@ class PlotManager:
 {prev_flow}
 
 원고:
-{full_text[:3500]}
+{manuscript}
 """
+            # 원고 우선, 이전 흐름은 최소 10% 보장
+            packed = PromptPacker("episode_summary").pack(template, [
+                Section("manuscript", text=full_text, priority=0),
+                Section("prev_flow", text=_safe_str(prev_flow), priority=1, min_share=0.1),
+            ])
+            prompt = template.replace("{prev_flow}", packed["prev_flow"]).replace("{manuscript}", packed["manuscript"])
             try:
-                res = self.llm.invoke(prompt)
+                res = hedged_call("episode_summary", lambda: self.llm.invoke(prompt))
                 result = self._safe_json(getattr(res, "content", "") or "")
             except Exception:
                 result = {}
@@ -216,9 +248,11 @@ class PlotManager:
             "title": result.get("title", ""),
             "summary": result.get("summary", ""),
             "story_flow": result.get("story_flow", ""),
+            "source_hash": source_hash(full_text),
         }
 
         _write_json(self.history_file, history)
+        record_change("episode", "upsert", str(episode_no), history[str(episode_no)])
         return {"status": "success", "data": history[str(episode_no)]}
 
     def extract_facts(self, episode_no, full_text, story_state):
@@ -1,18 +1,40 @@
 from __future__ import annotations
 
+import dataclasses
+import hashlib
 import json
-import traceback
+import os
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from dotenv import load_dotenv
-from pydantic import ValidationError
 
 from app.service.story_keeper_agent.ingest_episode import ingest_episode, IngestEpisodeRequest
 from app.service.story_keeper_agent.ingest_episode.chunking import split_into_chunks
-from app.service.story_keeper_agent.load_state.extracter import PlotManager
-from app.service.story_keeper_agent.rules.check_consistency import check_consistency
+from app.core.container import container
+from app.service.story_keeper_agent.rules.check_consistency import Issue, filter_issues
 from app.service.story_keeper_agent.finalize_episode import finalize_episode
+from app.service.story_keeper_agent.load_state.extracter import source_hash
+from app.common.deadline import CancelToken, Cancelled, cancelled, current_cancel_token, deadline_scope, detached
+from app.common.etag import file_version
+from app.common.llm_limiter import llm_priority
+from app.common.single_flight import SingleFlight
+from app.common.stage_graph import CUT, GraphRun, Stage, StageGraph, StageResult
+
+# 단계별 제한 시간/재시도 (룰 검사는 읽기 전용이라 재시도해도 안전)
+RULE_STAGE_TIMEOUT_S = float(os.getenv("STORY_RULE_TIMEOUT_S", "300"))
+RULE_STAGE_RETRIES = int(os.getenv("STORY_RULE_RETRIES", "1"))
+SUMMARY_STAGE_TIMEOUT_S = float(os.getenv("STORY_SUMMARY_TIMEOUT_S", "180"))
+# 요청 전체 시간 예산 (deadline_ms를 안 주면 이 값, 0이면 제한 없음)
+FEEDBACK_DEADLINE_MS = int(os.getenv("STORY_FEEDBACK_DEADLINE_MS", "300000"))
+# 룰 검사는 예산의 이 비율까지만 → 나머지는 이슈 재검증 몫
+RULE_DEADLINE_SHARE = float(os.getenv("STORY_RULE_DEADLINE_SHARE", "0.75"))
+# 같은 원고 피드백 결과 보관 개수/시간 (0이면 진행 중 요청 합치기만)
+FEEDBACK_CACHE_MAX_ENTRIES = int(os.getenv("FEEDBACK_CACHE_MAX_ENTRIES", "64"))
+FEEDBACK_CACHE_TTL_S = float(os.getenv("FEEDBACK_CACHE_TTL_S", "3600"))
+
+RULE_LABELS = {"world": "세계관", "character": "캐릭터", "plot": "플롯"}
 
 
 def _project_root() -> Path:
@@ -36,10 +58,32 @@ def _load_world_state(root: Path) -> Dict[str, Any]:
     return data if isinstance(data, dict) else {}
 
 
+def _extract_world_from_plot(plot_config: dict) -> dict:
+    if not isinstance(plot_config, dict):
+        return {}
+    for k in ("world", "world_setting", "worldSettings", "settings", "setting", "global"):
+        v = plot_config.get(k)
+        if isinstance(v, dict) and v:
+            return v
+    return plot_config
+
+
 def _load_character_config(root: Path) -> Dict[str, Any]:
-    path = root / "app" / "data" / "characters.json"
-    data = _load_json(path, default={})
-    return data if isinstance(data, dict) else {"characters": []}
+    data = _load_json(root / "app" / "data" / "characters.json", default=None)
+
+    if isinstance(data, dict):
+        chars = []
+        for name, d in data.items():
+            if isinstance(d, dict):
+                x = dict(d)
+                x.setdefault("name", name)
+                chars.append(x)
+        return {"characters": chars}
+
+    if isinstance(data, list):
+        return {"characters": [d for d in data if isinstance(d, dict) and d.get("name")]}
+
+    return {"characters": []}
 
 
 def _normalize_severity(s: Optional[str]) -> str:
@@ -49,7 +93,316 @@ def _normalize_severity(s: Optional[str]) -> str:
     return ss
 
 
-def run_pipeline(episode_no: int, raw_text: str, severity: Optional[str] = None) -> Dict[str, Any]:
+def _story_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {"world": state["world"], "history": state["history"]}
+
+
+# ---------------------------------------------------------
+# 단계
+# ---------------------------------------------------------
+def _stage_chunks(raw_text: str) -> List[str]:
+    chunks = split_into_chunks(raw_text, max_len=2500, min_len=1500)
+    if not chunks:
+        raise ValueError("원고가 비어있습니다.")
+    return chunks
+
+
+def _stage_ingest(episode_no: int, chunks: List[str]) -> str:
+    res = ingest_episode(req=IngestEpisodeRequest(episode_no=int(episode_no), text_chunks=chunks), summarize=False)
+    if not res.full_text.strip():
+        raise ValueError("원고가 비어있습니다.")
+    return res.full_text
+
+
+def _stage_summary(episode_no: int, full_text: str) -> Dict[str, Any]:
+    # 회차 요약 저장은 적재 작업 → 실시간 피드백 호출에 Solar 동시 한도를 양보
+    # 요청 마감·연결 끊김과 무관하게 끝까지 저장 (마감이 지나면 그래프는 기다리지 않고 응답)
+    # 같은 문서의 새 원고로 대체됐을 때만 중단 → 이전 원고 요약이 새 원고 요약을 덮어쓰지 않도록
+    with llm_priority("background"), detached(cancel_on=("superseded",)):
+        res = container.plot_manager().summarize_and_save(int(episode_no), full_text)
+    if res.get("status") != "success":
+        raise RuntimeError("story_history 저장 실패")
+    return res
+
+
+def _stage_state() -> Dict[str, Any]:
+    # 룰 검사는 이번 화 요약을 쓰지 않으므로 요약 저장을 기다리지 않고 바로 읽음
+    root = _project_root()
+    plot_config = _load_world_state(root)
+    history = _load_json(Path(container.plot_manager().history_file), default={})
+    return {
+        "plot_config": plot_config,
+        "world": _extract_world_from_plot(plot_config),
+        "character_config": _load_character_config(root),
+        "history": history if isinstance(history, dict) else {},
+    }
+
+
+def _stage_facts(episode_no: int, full_text: str, state: Dict[str, Any]) -> Dict[str, Any]:
+    facts = container.plot_manager().extract_facts(int(episode_no), full_text, _story_state(state))
+    facts = dict(facts) if isinstance(facts, dict) else {}
+    facts["raw_text"] = full_text
+    return facts
+
+
+def _stage_world_rules(facts: Dict[str, Any], state: Dict[str, Any]) -> List[Issue]:
+    from app.service.story_keeper_agent.rules.world_rules import check_world_consistency
+    return check_world_consistency(facts, state["plot_config"])
+
+
+def _stage_character_rules(facts: Dict[str, Any], state: Dict[str, Any]) -> List[Issue]:
+    from app.service.story_keeper_agent.rules.character_rules import check_character_consistency
+    return check_character_consistency(facts, state["character_config"], _story_state(state))
+
+
+def _stage_plot_rules(facts: Dict[str, Any], state: Dict[str, Any]) -> List[Issue]:
+    from app.service.story_keeper_agent.rules.plot_rules import check_plot_consistency
+    return check_plot_consistency(facts, state["plot_config"], _story_state(state))
+
+
+def _stage_issues(
+    facts: Dict[str, Any],
+    world_issues: Any,
+    character_issues: Any,
+    plot_issues: Any,
+    severity: Optional[str],
+) -> Dict[str, Any]:
+    issues: List[Issue] = []
+    skipped: List[str] = []
+    for kind, found in (("world", world_issues), ("character", character_issues), ("plot", plot_issues)):
+        if found is CUT:
+            # 요청 마감으로 이 룰은 결과가 없음 → 실패 이슈 대신 부분 결과로 표시
+            skipped.append(kind)
+            continue
+        if found is None:
+            # 룰 단계가 예외/시간 초과로 끝남 → 룰 엔진 자체 실패와 같은 형태로 알림
+            found = [Issue(
+                type=kind,
+                title=f"{RULE_LABELS[kind]} 룰 검사 실패",
+                sentence="(원고 전체)",
+                reason="룰 검사 단계가 실패했거나 제한 시간 안에 끝나지 않았습니다.",
+                severity="high",
+            )]
+        issues += found
+
+    unverified: List[Issue] = []
+    verified = filter_issues(issues, facts.get("raw_text", ""), _normalize_severity(severity), unverified=unverified)
+    return {
+        "issues": verified,
+        "partial": bool(skipped or unverified),
+        "skipped_checks": skipped,
+        "unverified": len(unverified),
+    }
+
+
+def _stage_report(episode_no: int, facts: Dict[str, Any], issues: Dict[str, Any]) -> Dict[str, Any]:
+    report = finalize_episode(int(episode_no), facts, issues["issues"])
+    return report if isinstance(report, dict) else {}
+
+
+# chunk → ingest → (summary ‖ facts → world/character/plot 룰 병렬) → issues → report
+STORY_KEEPER_GRAPH = StageGraph("story_keeper", [
+    Stage("chunks", _stage_chunks, inputs=("raw_text",)),
+    Stage("full_text", _stage_ingest, inputs=("episode_no", "chunks")),
+    Stage("summary", _stage_summary, inputs=("episode_no", "full_text"),
+          timeout_s=SUMMARY_STAGE_TIMEOUT_S, required=False),
+    Stage("state", _stage_state),
+    Stage("facts", _stage_facts, inputs=("episode_no", "full_text", "state")),
+    Stage("world_issues", _stage_world_rules, inputs=("facts", "state"),
+          timeout_s=RULE_STAGE_TIMEOUT_S, retries=RULE_STAGE_RETRIES, required=False,
+          deadline_share=RULE_DEADLINE_SHARE),
+    Stage("character_issues", _stage_character_rules, inputs=("facts", "state"),
+          timeout_s=RULE_STAGE_TIMEOUT_S, retries=RULE_STAGE_RETRIES, required=False,
+          deadline_share=RULE_DEADLINE_SHARE),
+    Stage("plot_issues", _stage_plot_rules, inputs=("facts", "state"),
+          timeout_s=RULE_STAGE_TIMEOUT_S, retries=RULE_STAGE_RETRIES, required=False,
+          deadline_share=RULE_DEADLINE_SHARE),
+    # 마감이 지나도 실행: 그때까지 나온 룰 결과 중 검증된 이슈만 정리
+    Stage("issues", _stage_issues,
+          inputs=("facts", "world_issues", "character_issues", "plot_issues", "severity"), after_deadline=True),
+    Stage("report", _stage_report, inputs=("episode_no", "facts", "issues"), after_deadline=True),
+])
+
+
+def analyze_episode(
+    episode_no: int,
+    raw_text: str,
+    severity: Optional[str] = None,
+    targets: Iterable[str] = ("report", "summary"),
+    deadline_ms: Optional[float] = None,
+) -> GraphRun:
+    """
+    run_pipeline / manuscript_feedback 공용 진입점 (targets까지 필요한 단계만 실행)
+    deadline_ms 안에 끝나지 않은 단계는 건너뛰거나 끊고, 그때까지 검증된 이슈만 남김 (issue_result 참고)
+    """
+    with deadline_scope(deadline_ms if deadline_ms is not None else FEEDBACK_DEADLINE_MS):
+        return STORY_KEEPER_GRAPH.run(
+            {"episode_no": int(episode_no), "raw_text": raw_text, "severity": severity},
+            targets=targets,
+        )
+
+
+def issue_result(run: GraphRun) -> Dict[str, Any]:
+    """issues 단계 결과 + 부분 결과 여부 (요약 저장은 응답과 무관하므로 partial 판단에서 제외)"""
+    result = run.get("issues") or {"issues": [], "partial": False, "skipped_checks": [], "unverified": 0}
+    cut = [n for n in run.cut_by_deadline() if n != "summary"]
+    return {**result, "partial": bool(result["partial"] or cut), "cut_stages": cut}
+
+
+def summary_saved(run: GraphRun) -> bool:
+    """이번 화 요약이 story_history에 저장됐는지 (요약 단계는 optional이라 실패/시간 초과여도 run.ok)"""
+    summary = run.results.get("summary")
+    return bool(summary and summary.status == "ok")
+
+
+# ---------------------------------------------------------
+# 같은 원고 피드백 합치기 / 캐시
+# ---------------------------------------------------------
+feedback_flights = SingleFlight("manuscript_feedback", max_entries=FEEDBACK_CACHE_MAX_ENTRIES, ttl_s=FEEDBACK_CACHE_TTL_S)
+
+_history_digests: Dict[Tuple[str, int], str] = {}
+_history_digest_lock = threading.Lock()
+
+
+def _history_digest(path: Path, episode_no: int) -> str:
+    # 이번 화 항목은 이번 요청(요약 저장)이 다시 쓰는 값이라 제외 → 자기 저장 때문에 캐시가 깨지지 않게
+    # 파일 버전별로 한 번만 읽음
+    fv = file_version(str(path))
+    memo_key = (fv, int(episode_no))
+    with _history_digest_lock:
+        if memo_key in _history_digests:
+            return _history_digests[memo_key]
+
+    history = _load_json(path, default={})
+    if isinstance(history, dict):
+        history = {k: v for k, v in history.items() if str(k) != str(int(episode_no))}
+    digest = hashlib.sha1(json.dumps(history, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    with _history_digest_lock:
+        if len(_history_digests) > 256:
+            _history_digests.clear()
+        _history_digests[memo_key] = digest
+    return digest
+
+
+def story_state_version(episode_no: int) -> Tuple[str, str, str]:
+    """룰 검사가 읽는 저장소(plot/characters/story_history) 버전. 하나라도 바뀌면 캐시된 피드백은 무효"""
+    data = _project_root() / "app" / "data"
+    return (
+        file_version(str(data / "plot.json")),
+        file_version(str(data / "characters.json")),
+        _history_digest(Path(container.plot_manager().history_file), episode_no),
+    )
+
+
+def _summary_current(episode_no: int, full_text: str) -> bool:
+    history = _load_json(Path(container.plot_manager().history_file), default={})
+    entry = history.get(str(int(episode_no))) if isinstance(history, dict) else None
+    return isinstance(entry, dict) and entry.get("source_hash") == source_hash(full_text)
+
+
+def _ensure_summary(run: GraphRun, episode_no: int, raw_text: str, deadline_ms: Optional[float]) -> GraphRun:
+    # 캐시/합류 결과는 요약 단계를 다시 돌지 않음 (저장소 버전에서 이번 화 항목은 빠져 있음)
+    # → A, B, 다시 A 순서면 story_history에는 B 요약이 남으므로 이번 원고로 요약만 다시 저장
+    if _summary_current(episode_no, run.get("full_text") or ""):
+        summary = StageResult("summary", status="ok")
+    else:
+        print(f"📝 [FEEDBACK] episode={episode_no} 저장된 요약이 이번 원고와 다름 → 요약만 다시 저장")
+        resave = analyze_episode(episode_no, raw_text, targets=("summary",), deadline_ms=deadline_ms)
+        if resave.cancelled:
+            token = current_cancel_token()
+            raise Cancelled("story_keeper", token.reason if token else "")
+        summary = resave.results["summary"]
+    # 캐시에 든 GraphRun은 다른 요청과 공유 → 복사본에 이번 요청의 요약 결과를 넣음
+    return dataclasses.replace(run, results={**run.results, "summary": summary})
+
+
+# 문서별 진행 중인 피드백 요청: doc_id -> (요청 키, 그 키로 들어온 요청들의 취소 토큰)
+_doc_runs: Dict[str, Tuple[Tuple, List[CancelToken]]] = {}
+_doc_runs_lock = threading.Lock()
+
+
+def _claim_document(doc_id: str, key: Tuple, token: CancelToken) -> None:
+    # 같은 문서에 다른 원고가 들어오면 이전 분석은 쓸모없음 → 취소 (같은 원고면 합류하므로 그대로 둠)
+    with _doc_runs_lock:
+        prev = _doc_runs.get(doc_id)
+        if prev and prev[0] == key:
+            prev[1].append(token)
+            return
+        _doc_runs[doc_id] = (key, [token])
+    if prev:
+        superseded = [t for t in prev[1] if t.cancel("superseded")]
+        if superseded:
+            print(f"🛑 [FEEDBACK] doc={doc_id} 새 원고 제출 → 이전 분석 {len(superseded)}건 취소")
+
+
+def _release_document(doc_id: str, token: CancelToken) -> None:
+    with _doc_runs_lock:
+        entry = _doc_runs.get(doc_id)
+        if entry and token in entry[1]:
+            entry[1].remove(token)
+            if not entry[1]:
+                del _doc_runs[doc_id]
+
+
+def analyze_feedback(
+    episode_no: int,
+    raw_text: str,
+    severity: Optional[str] = None,
+    deadline_ms: Optional[float] = None,
+    doc_id: Optional[str] = None,
+) -> Tuple[GraphRun, str]:
+    """
+    manuscript_feedback용 analyze_episode. 같은 (화, 원고, 임계치, 저장소 버전) 요청은 한 번만 계산
+    (GraphRun, 출처) 반환 — 출처는 SingleFlight.do 참고
+    부분 결과/실패는 합류한 요청에만 공유하고 캐시하지 않음
+    캐시/합류 결과여도 story_history의 이번 화 요약이 이번 원고 것이 아니면 요약은 다시 저장
+
+    doc_id를 주면 같은 문서의 이전 요청(다른 원고)을 취소. 취소 토큰은 호출자의 cancel_scope에서 가져오고
+    이 요청이 취소되면 Cancelled
+    """
+    sev = _normalize_severity(severity)
+    key = (int(episode_no), sev, hashlib.sha256(raw_text.encode("utf-8")).hexdigest())
+
+    def compute() -> GraphRun:
+        run = analyze_episode(episode_no, raw_text, sev, targets=("issues", "summary"), deadline_ms=deadline_ms)
+        if run.cancelled:
+            token = current_cancel_token()
+            raise Cancelled("story_keeper", token.reason if token else "")
+        return run
+
+    token = current_cancel_token()
+    if doc_id and token is not None:
+        _claim_document(doc_id, key, token)
+    try:
+        for attempt in range(2):
+            try:
+                run, source = feedback_flights.do(
+                    key,
+                    story_state_version(episode_no),
+                    compute,
+                    cacheable=lambda run: run.ok and not issue_result(run)["partial"],
+                )
+                break
+            except Cancelled:
+                # 합류했던 계산이 다른 요청의 취소로 끊김 → 이 요청이 살아 있으면 한 번 직접 계산
+                if attempt or cancelled():
+                    raise
+                print("🔁 [FEEDBACK] 합류한 분석이 취소됨 → 다시 계산")
+        if source != "computed":
+            run = _ensure_summary(run, episode_no, raw_text, deadline_ms)
+        return run, source
+    finally:
+        if doc_id and token is not None:
+            _release_document(doc_id, token)
+
+
+def run_pipeline(
+    episode_no: int,
+    raw_text: str,
+    severity: Optional[str] = None,
+    deadline_ms: Optional[float] = None,
+) -> Dict[str, Any]:
     """
     ✅ UI severity를 '임계치(threshold)'로 반영하도록 수정
     """
@@ -69,80 +422,15 @@ def run_pipeline(episode_no: int, raw_text: str, severity: Optional[str] = None)
     if not isinstance(raw_text, str) or not raw_text.strip():
         return {"episode_no": int(episode_no), "full_text_len": 0, "edits": []}
 
-    manager = PlotManager()
-
-    # 1) Chunking
-    try:
-        chunks = split_into_chunks(raw_text, max_len=2500, min_len=1500)
-    except Exception as e:
-        print(f"❌ chunking error: {e}")
-        return {"episode_no": int(episode_no), "full_text_len": 0, "edits": []}
-
-    # 2) Ingest
-    full_text = ""
-    try:
-        try:
-            req = IngestEpisodeRequest(episode_no=int(episode_no), chunks=chunks)
-        except ValidationError:
-            req = IngestEpisodeRequest(episode_no=int(episode_no), text_chunks=chunks)
-
-        res = ingest_episode(req=req) if "req" in ingest_episode.__code__.co_varnames else ingest_episode(req)
-        full_text = getattr(res, "full_text", None) or (res.get("full_text") if isinstance(res, dict) else "") or ""
-    except Exception:
-        print("❌ ingest error")
-        traceback.print_exc()
-        return {"episode_no": int(episode_no), "full_text_len": 0, "edits": []}
-
-    if not full_text.strip():
-        return {"episode_no": int(episode_no), "full_text_len": 0, "edits": []}
-
-    # 3) Summary 저장 (실패해도 계속)
-    try:
-        _ = manager.summarize_and_save(int(episode_no), full_text)
-    except Exception as e:
-        print(f"⚠️ summarize/save failed (continue): {e}")
+    run = analyze_episode(episode_no, raw_text, sev, deadline_ms=deadline_ms)
+    print(f"⏱️ [PIPELINE] {run.elapsed_ms:.0f}ms "
+          + ", ".join(f"{n}={r.elapsed_ms:.0f}" for n, r in run.results.items()))
 
-    # 4) Load state
-    try:
-        world_state = _load_world_state(root)
-        history_state = _load_json(manager.history_file, default={})
-        story_state = {"world": world_state, "history": history_state}
-    except Exception as e:
-        print(f"❌ state load error: {e}")
-        return {"episode_no": int(episode_no), "full_text_len": len(full_text), "edits": []}
-
-    # 5) Consistency check  ✅ severity_threshold 전달
-    issues = []
-    episode_facts = {}
-    try:
-        character_config = _load_character_config(root)
-
-        episode_facts = manager.extract_facts(int(episode_no), full_text, story_state)
-        if isinstance(episode_facts, dict):
-            episode_facts["raw_text"] = full_text
-        else:
-            episode_facts = {"raw_text": full_text}
-
-        issues = check_consistency(
-            episode_facts=episode_facts,
-            character_config=character_config,
-            plot_config=world_state,
-            story_state=story_state,
-            severity_threshold=sev,
-        )
-    except Exception:
-        print("❌ consistency check error")
-        traceback.print_exc()
-        issues = []
-
-    # 6) Finalize
-    try:
-        report = finalize_episode(int(episode_no), episode_facts, issues)
-        return {
-            "episode_no": int(episode_no),
-            "full_text_len": len(full_text),
-            "edits": report.get("edits", []) if isinstance(report, dict) else [],
-        }
-    except Exception as e:
-        print(f"❌ finalize error: {e}")
-        return {"episode_no": int(episode_no), "full_text_len": len(full_text), "edits": []}
+    full_text = run.get("full_text") or ""
+    report = run.get("report") or {}
+    return {
+        "episode_no": int(episode_no),
+        "full_text_len": len(full_text),
+        "edits": report.get("edits", []),
+        "partial": issue_result(run)["partial"],
+    }
@@ -1,4 +1,4 @@
 # __init__.py
-from .check_consistency import check_consistency, Issue
+from .check_consistency import check_consistency, filter_issues, Issue
 
-__all__ = ["check_consistency", "Issue"]
+__all__ = ["check_consistency", "filter_issues", "Issue"]
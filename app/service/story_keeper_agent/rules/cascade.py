@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.common.prompt_budget import PromptPacker, Section, count_tokens
+from app.common.deadline import DeadlineExceeded
+from app.common.hedging import hedged_call
+
+# 1차 선별(저가 모델) -> 후보가 있을 때만 2차(solar-pro) 이슈 작성
+# 품질 영향(recall)을 실제 원고로 재기 전까지 기본 off (benchmarks/rule_cascade.py --real)
+CASCADE_ENABLED = os.getenv("RULES_CASCADE", "off").strip().lower() in ("1", "on", "true", "yes")
+SCREEN_MODEL = os.getenv("RULES_SCREEN_MODEL") or os.getenv("UPSTAGE_CHAT_MODEL", "solar-1-mini-chat")
+DEEP_MODEL = os.getenv("RULES_DEEP_MODEL", "solar-pro")
+SCREEN_CHUNK_TOKENS = int(os.getenv("RULES_SCREEN_CHUNK_TOKENS", "1200"))
+SCREEN_MAX_WORKERS = int(os.getenv("RULES_SCREEN_MAX_WORKERS", "4"))
+
+KIND_LABELS = {
+    "world": "세계관",
+    "character": "캐릭터",
+    "plot": "플롯/연속성",
+}
+
+ScreenFn = Callable[[str, List[str], str], bool]  # (kind, anchors, chunk) -> 충돌 후보 여부
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+
+# 2차 원고에서 1차 후보 조각을 감싸는 표시 (문단 사이 별도 줄이라 sentence 인용에는 섞이지 않음)
+MARK_OPEN = "⟦검토 후보⟧"
+MARK_CLOSE = "⟦/검토 후보⟧"
+_MARK_NOTE = (
+    f"(※ {MARK_OPEN} ~ {MARK_CLOSE} 구간은 1차 검토에서 충돌 후보로 표시된 부분입니다. "
+    "먼저 확인하되 원고 전체를 검토하고, 표시 기호는 sentence에 넣지 마세요.)"
+)
+
+_SCREEN_PROMPT = """
+너는 웹소설 원고 1차 검토자다. 오직 anchors(확정 사실)와 원고 조각만 본다.
+원고 조각에 anchors와 동시에 성립할 수 없어 보이는 {label} 관련 확정 서술이 하나라도 있으면 suspect=true.
+확신이 없으면 true (놓치는 것보다 한 번 더 검토하는 편이 낫다).
+충돌 후보가 전혀 없을 때만 false.
+
+출력 JSON only:
+{"suspect": true|false}
+"""
+
+
+def deep_model() -> str:
+    """이슈 작성/검증용 모델 (RULES_DEEP_MODEL)"""
+    return DEEP_MODEL
+
+
+def split_chunks(text: str, chunk_tokens: int = SCREEN_CHUNK_TOKENS) -> List[str]:
+    """문단 경계로 나눠 chunk_tokens 근처까지 합침 (원문 그대로 → 2차 프롬프트의 sentence가 원고와 일치)"""
+    paragraphs = [p.strip() for p in _PARAGRAPH_RE.split(text or "") if p.strip()]
+    if len(paragraphs) <= 1:
+        paragraphs = [ln.strip() for ln in (text or "").splitlines() if ln.strip()]
+
+    chunks: List[str] = []
+    buf: List[str] = []
+    size = 0
+    for p in paragraphs:
+        cost = count_tokens(p)
+        if buf and size + cost > chunk_tokens:
+            chunks.append("\n\n".join(buf))
+            buf, size = [], 0
+        buf.append(p)
+        size += cost
+    if buf:
+        chunks.append("\n\n".join(buf))
+    return chunks
+
+
+def _solar_screen(kind: str, anchors: List[str], chunk: str) -> bool:
+    # LangChain은 import 비용이 커서 실제 호출 시점에 로드
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from langchain_upstage import ChatUpstage
+
+    system = _SCREEN_PROMPT.replace("{label}", KIND_LABELS.get(kind, kind))
+    packed = PromptPacker(f"{kind}_screen").pack(system + "[anchors]\n\n[manuscript]\n", [
+        Section("manuscript", text=chunk, priority=0),
+        Section("anchors", items=anchors, priority=1, min_share=0.3),
+    ])
+    human = f"[anchors]\n{json.dumps(packed['anchors'], ensure_ascii=False)}\n\n[manuscript]\n{packed['manuscript']}"
+
+    messages = [SystemMessage(content=system), HumanMessage(content=human)]
+    res = hedged_call(f"{kind}_screen", lambda: ChatUpstage(model=SCREEN_MODEL).invoke(messages))
+    content = (getattr(res, "content", "") or "").lower().replace(" ", "")
+    # 명확히 false라고 한 경우만 통과 (파싱 실패는 후보로 올림)
+    return '"suspect":false' not in content
+
+
+def mark_chunks(chunks: List[str], flags: List[Optional[bool]]) -> str:
+    """조각을 다시 이어 붙이면서 후보 조각만 MARK_OPEN/MARK_CLOSE 줄로 감쌈 (맨 앞에 표시 안내 한 줄)"""
+    parts = [_MARK_NOTE]
+    for chunk, flag in zip(chunks, flags):
+        parts.append(f"{MARK_OPEN}\n{chunk}\n{MARK_CLOSE}" if flag else chunk)
+    return "\n\n".join(parts)
+
+
+class RuleCascade:
+    """
+    룰 엔진 앞단 선별기
+
+    - 원고를 문단 단위 조각으로 나눠 저가 모델(RULES_SCREEN_MODEL)에 병렬로 "충돌 후보인가?"만 물음
+    - 후보가 있으면 원고 전체에 후보 조각만 표시해서 반환 → solar-pro는 앞뒤 맥락과 표시 안 된 구간까지 검토
+    - 후보가 없으면 "" (solar-pro 호출 생략 — 절감은 여기서만 생김)
+    - 선별 호출이 하나라도 실패하면 표시 없이 원고 전체를 올림 (recall 우선)
+    """
+
+    def __init__(
+        self,
+        screen_fn: Optional[ScreenFn] = None,
+        enabled: bool = CASCADE_ENABLED,
+        chunk_tokens: int = SCREEN_CHUNK_TOKENS,
+        max_workers: int = SCREEN_MAX_WORKERS,
+    ):
+        self.screen_fn = screen_fn or _solar_screen
+        self.enabled = enabled
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max(1, max_workers)
+
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "chunks": 0, "flagged": 0, "screen_errors": 0, "escalated": 0, "skipped": 0,
+                       "error_escalations": 0}
+
+    def _screen_one(self, kind: str, anchors: List[str], chunk: str) -> Optional[bool]:
+        # None = 선별 실패 (후보 아님으로 세지 않음 → select가 원고 전체를 올림)
+        try:
+            return bool(self.screen_fn(kind, anchors, chunk))
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            print(f"⚠️ 1차 선별 실패 → 원고 전체를 2차로 ({kind}): {e}")
+            with self._lock:
+                self._stats["screen_errors"] += 1
+            return None
+
+    def select(self, kind: str, anchors: List[str], full_text: str) -> str:
+        """2차(solar-pro)에 넣을 원고. ""이면 2차 호출 생략"""
+        if not self.enabled:
+            return full_text
+
+        chunks = split_chunks(full_text, self.chunk_tokens)
+        if not chunks:
+            return ""
+
+        # 호출자의 LLM 우선순위(contextvar)를 작업 스레드로 넘김
+        contexts = [contextvars.copy_context() for _ in chunks]
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks))) as pool:
+            flags = list(pool.map(
+                lambda ctx, c: ctx.run(self._screen_one, kind, anchors, c),
+                contexts, chunks,
+            ))
+
+        failed = sum(1 for f in flags if f is None)
+        flagged = sum(1 for f in flags if f)
+        with self._lock:
+            self._stats["runs"] += 1
+            self._stats["chunks"] += len(chunks)
+            self._stats["flagged"] += flagged
+            self._stats["escalated" if flagged or failed else "skipped"] += 1
+            if failed:
+                self._stats["error_escalations"] += 1
+
+        if failed:
+            print(f"🔎 [{kind}] 1차 선별 실패 {failed}/{len(chunks)} 조각 → 원고 전체를 {DEEP_MODEL}")
+            return full_text
+        if not flagged:
+            return ""
+        print(f"🔎 [{kind}] 1차 선별: {flagged}/{len(chunks)} 조각 표시 → 원고 전체를 {DEEP_MODEL}")
+        return mark_chunks(chunks, flags)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            s = dict(self._stats)
+        s["enabled"] = self.enabled
+        s["screen_model"] = SCREEN_MODEL
+        s["deep_model"] = DEEP_MODEL
+        s["flag_rate"] = round(s["flagged"] / s["chunks"], 4) if s["chunks"] else 0.0
+        return s
+
+
+# 룰 엔진 공용 인스턴스
+cascade = RuleCascade()
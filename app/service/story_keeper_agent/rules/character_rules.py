@@ -8,6 +8,10 @@ from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_upstage import ChatUpstage
 
+from app.common.prompt_budget import pack_manuscript_with_anchors
+from app.common.deadline import DeadlineExceeded
+from app.common.hedging import hedged_call
+from .cascade import cascade, deep_model
 from .check_consistency import Issue
 
 load_dotenv()
@@ -115,8 +119,6 @@ def _pick_character_anchor_pool(character_config: Dict[str, Any]) -> List[str]:
                 continue
             anchors.append(f"{name_tag} - {k}: {s}")
 
-    if len(anchors) > 180:
-        anchors = anchors[:180]
     return anchors
 
 
@@ -135,7 +137,12 @@ def check_character_consistency(
     if not anchors:
         return []
 
-    llm = ChatUpstage(model="solar-pro")
+    # 1차 선별 (cascade.py 참고): ""이면 solar-pro 호출 생략
+    manuscript = cascade.select("character", anchors, full_text)
+    if not manuscript:
+        return []
+
+    llm = ChatUpstage(model=deep_model())
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", """
@@ -170,13 +177,20 @@ def check_character_consistency(
 """),
     ])
 
+    # 원고 + 앵커를 토큰 예산에 맞춰 넣음 (배분 규칙은 prompt_budget 참고)
+    packed = pack_manuscript_with_anchors("character_rules", prompt.format(anchors="", full_text=""), manuscript, anchors)
+
     try:
-        raw = (prompt | llm).invoke({
-            "anchors": json.dumps(anchors, ensure_ascii=False),
-            "full_text": full_text,
-        })
+        inputs = {
+            "anchors": json.dumps(packed["anchors"], ensure_ascii=False),
+            "full_text": packed["manuscript"],
+        }
+        raw = hedged_call("character_rules", lambda: (prompt | llm).invoke(inputs))
         content = raw.content if hasattr(raw, "content") else str(raw)
         data = _extract_json(content) or {"issues": []}
+    except DeadlineExceeded:
+        # 요청 마감은 룰 실패가 아님 → 파이프라인이 부분 결과로 처리
+        raise
     except Exception as e:
         return [Issue(
             type="character",
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_upstage import ChatUpstage
+from app.common.deadline import DeadlineExceeded
+
+# 이슈 재검증(LLM) 동시 호출 수. 룰 검사 뒤 남은 마감 몫 안에 끝내야 하므로 병렬로 돌림
+VERIFY_MAX_WORKERS = int(os.getenv("RULES_VERIFY_MAX_WORKERS", "4"))
+
 
 TYPE_LABELS = {
     "world": "세계관 오류",
@@ -194,7 +200,14 @@ def _verify_issue_not_resolved_by_later_text(*, issue: Issue, full_text: str) ->
     if not issue.sentence or not issue.sentence.strip():
         return True
 
-    llm = ChatUpstage(model="solar-pro")
+    # LangChain은 import 비용이 커서 실제 검증 시점에 로드
+    from langchain_core.prompts import ChatPromptTemplate
+    from langchain_upstage import ChatUpstage
+
+    from app.common.hedging import hedged_call
+    from .cascade import deep_model
+
+    llm = ChatUpstage(model=deep_model())
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", """
@@ -223,13 +236,16 @@ def _verify_issue_not_resolved_by_later_text(*, issue: Issue, full_text: str) ->
     ])
 
     try:
-        raw = (prompt | llm).invoke({
+        inputs = {
             "title": issue.title or "",
             "issue_sentence": issue.sentence or "",
             "issue_reason": issue.reason or "",
             "full_text": full_text,
-        })
+        }
+        raw = hedged_call("issue_verify", lambda: (prompt | llm).invoke(inputs))
         content = (raw.content if hasattr(raw, "content") else str(raw)) or ""
+    except DeadlineExceeded:
+        raise
     except Exception:
         return True
 
@@ -254,18 +270,33 @@ def check_consistency(
     from .character_rules import check_character_consistency
     from .plot_rules import check_plot_consistency
 
-    threshold_rank = _severity_rank(severity_threshold)
-    if threshold_rank not in (1, 2, 3):
-        threshold_rank = 2
-
     issues: List[Issue] = []
     issues += check_world_consistency(episode_facts, plot_config)
     issues += check_character_consistency(episode_facts, character_config, story_state)
     issues += check_plot_consistency(episode_facts, plot_config, story_state)
 
     full_text = episode_facts.get("raw_text", "") if isinstance(episode_facts, dict) else ""
+    return filter_issues(issues, full_text, severity_threshold)
 
-    alive: List[Issue] = []
+
+def filter_issues(
+    issues: List[Issue],
+    full_text: str,
+    severity_threshold: str = "medium",
+    unverified: Optional[List[Issue]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    룰 엔진 결과 후처리: 비충돌 문구 제거 → 뒤 원고에서 해소됐는지 재검증 → 임계치 → 같은 문장 병합
+    (세계관/캐릭터/플롯 룰을 따로 돌린 뒤 합쳐서 호출할 수 있게 분리)
+
+    요청 마감으로 재검증을 못 한 이슈는 결과에서 빼고 unverified에 모음 (검증된 것만 반환)
+    """
+    threshold_rank = _severity_rank(severity_threshold)
+    if threshold_rank not in (1, 2, 3):
+        threshold_rank = 2
+
+    # (이슈, 재검증 필요 여부) — 순서 유지
+    candidates: List[tuple] = []
     for i in issues:
         if _is_failure_issue(i):
             i.severity = "high"
@@ -274,7 +305,7 @@ def check_consistency(
             if not i.reason:
                 i.reason = "룰 엔진이 정상적으로 결과를 만들지 못했습니다."
             if _severity_rank(i.severity) >= threshold_rank:
-                alive.append(i)
+                candidates.append((i, False))
             continue
 
         if not i.sentence or not i.reason:
@@ -283,12 +314,40 @@ def check_consistency(
         if _looks_like_non_conflict(i.reason, i.title):
             continue
 
-        if not _verify_issue_not_resolved_by_later_text(issue=i, full_text=full_text):
-            continue
-
         if _severity_rank(i.severity) < threshold_rank:
             continue
 
+        candidates.append((i, True))
+
+    def verify(issue: Issue) -> Optional[bool]:
+        # None = 요청 마감으로 재검증 못 함
+        try:
+            return _verify_issue_not_resolved_by_later_text(issue=issue, full_text=full_text)
+        except DeadlineExceeded:
+            return None
+
+    to_verify = [i for i, need in candidates if need]
+    verdicts: Dict[int, Optional[bool]] = {}
+    if len(to_verify) == 1:
+        verdicts[id(to_verify[0])] = verify(to_verify[0])
+    elif to_verify:
+        # 요청 마감(contextvar)이 작업 스레드의 LLM 호출까지 이어지도록 컨텍스트 복사
+        contexts = [contextvars.copy_context() for _ in to_verify]
+        with ThreadPoolExecutor(max_workers=max(1, min(VERIFY_MAX_WORKERS, len(to_verify)))) as pool:
+            futures = [pool.submit(ctx.run, verify, i) for ctx, i in zip(contexts, to_verify)]
+            for i, fut in zip(to_verify, futures):
+                verdicts[id(i)] = fut.result()
+
+    alive: List[Issue] = []
+    for i, need in candidates:
+        if need:
+            verdict = verdicts[id(i)]
+            if verdict is None:
+                if unverified is not None:
+                    unverified.append(i)
+                continue
+            if not verdict:
+                continue
         alive.append(i)
 
     merged = _merge_same_sentence(alive)
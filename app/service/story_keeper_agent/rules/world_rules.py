@@ -9,6 +9,10 @@ from dotenv import load_dotenv
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_upstage import ChatUpstage
 
+from app.common.prompt_budget import pack_manuscript_with_anchors
+from app.common.deadline import DeadlineExceeded
+from app.common.hedging import hedged_call
+from .cascade import cascade, deep_model
 from .check_consistency import Issue
 
 load_dotenv()
@@ -101,10 +105,7 @@ def _build_value_anchors(obj: Any) -> List[str]:
 
     walk(obj)
 
-    anchors = [a for a in anchors if isinstance(a, str) and a.strip()]
-    if len(anchors) > 160:
-        anchors = anchors[:160]
-    return anchors
+    return [a for a in anchors if isinstance(a, str) and a.strip()]
 
 
 def check_world_consistency(
@@ -123,7 +124,12 @@ def check_world_consistency(
     if not anchors:
         return []
 
-    llm = ChatUpstage(model="solar-pro")
+    # 1차 선별 (cascade.py 참고): ""이면 solar-pro 호출 생략
+    manuscript = cascade.select("world", anchors, full_text)
+    if not manuscript:
+        return []
+
+    llm = ChatUpstage(model=deep_model())
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", """
@@ -158,13 +164,20 @@ def check_world_consistency(
 """),
     ])
 
+    # 원고 + 앵커를 토큰 예산에 맞춰 넣음 (배분 규칙은 prompt_budget 참고)
+    packed = pack_manuscript_with_anchors("world_rules", prompt.format(anchors="", full_text=""), manuscript, anchors)
+
     try:
-        raw = (prompt | llm).invoke({
-            "anchors": json.dumps(anchors, ensure_ascii=False),
-            "full_text": full_text,
-        })
+        inputs = {
+            "anchors": json.dumps(packed["anchors"], ensure_ascii=False),
+            "full_text": packed["manuscript"],
+        }
+        raw = hedged_call("world_rules", lambda: (prompt | llm).invoke(inputs))
         content = raw.content if hasattr(raw, "content") else str(raw)
         data = _extract_json(content) or {"issues": []}
+    except DeadlineExceeded:
+        # 요청 마감은 룰 실패가 아님 → 파이프라인이 부분 결과로 처리
+        raise
     except Exception as e:
         return [Issue(
             type="world",
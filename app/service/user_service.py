@@ -1,6 +1,6 @@
 from typing import Dict, Any
 
-from app.repository.user_repo import UserRepository
+from app.repository.vector.user_repo import UserRepository
 
 
 class UserService:
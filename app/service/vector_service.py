@@ -1,25 +1,46 @@
 from typing import List, Dict, Any, Optional
 from .embedding_service import EmbeddingService
-from ..repository.vector_repo import VectorRepository
+from .knowledge_ingest_service import KnowledgeIngestor, content_id
+from ..repository.vector.vector_repo import VectorRepository
 
 
 class VectorService:
     def __init__(self, vector_repository: VectorRepository, embedding_service: EmbeddingService):
         self.vector_repository = vector_repository
         self.embedding_service = embedding_service
+        # 컬렉션을 바꿀 때마다 증가 (답변 캐시 등이 낡은 결과를 버리는 기준)
+        self.collection_version = 0
     
     def add_documents(self, documents: List[str], metadatas: List[Dict[str, Any]] = None, ids: List[str] = None):
+        # 기본 ID는 본문 해시 (doc_0..n 으로 두면 다음 요청이 이전 문서를 덮어씀)
+        if ids is None:
+            ids = [content_id(doc) for doc in documents]
         embeddings = self.embedding_service.create_embeddings(documents)
-        self.vector_repository.add_documents(
+        self.vector_repository.upsert_documents(
             documents=documents,
             embeddings=embeddings,
             metadatas=metadatas,
             ids=ids
         )
+        self.collection_version += 1
     
+    def ingest_file(self, path: str, resume: bool = True, **options) -> Dict[str, Any]:
+        """JSONL 대량 적재 (options: embed_batch / upsert_batch / max_in_flight, knowledge_ingest_service 참고)"""
+        ingestor = KnowledgeIngestor(
+            vector_repository=self.vector_repository,
+            embed_documents=self.embedding_service.create_embeddings,
+            **options,
+        )
+        try:
+            return ingestor.ingest_file(path, resume=resume)
+        finally:
+            self.collection_version += 1
+
     def search(self, query: str, n_results: int = 5) -> Dict[str, Any]:
         query_embedding = self.embedding_service.create_embedding(query)
-        
+        return self.search_by_embedding(query_embedding, n_results=n_results)
+
+    def search_by_embedding(self, query_embedding: List[float], n_results: int = 5) -> Dict[str, Any]:
         results = self.vector_repository.query(
             query_embeddings=[query_embedding],
             n_results=n_results,
@@ -27,6 +48,7 @@ class VectorService:
         )
         
         return {
+            "ids": (results.get("ids") or [[]])[0],
             "documents": results["documents"][0],
             "metadatas": results["metadatas"][0],
             "distances": results["distances"][0]
@@ -34,6 +56,7 @@ class VectorService:
     
     def delete_document(self, doc_id: str):
         self.vector_repository.delete_documents([doc_id])
+        self.collection_version += 1
     
     def get_collection_info(self) -> Dict[str, Any]:
         return self.vector_repository.get_collection_info()
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+ChromaDB HTTP 모드 vs embedded(PersistentClient) 모드 질의 지연/처리량 비교
+
+    python benchmarks/chroma_modes.py                         # 두 모드 모두 (HTTP 서버가 없으면 건너뜀)
+    python benchmarks/chroma_modes.py --docs 5000 --dim 4096 --queries 200 --concurrency 8
+    CHROMA_HOST=localhost CHROMA_PORT=8000 python benchmarks/chroma_modes.py --modes http
+
+- Upstage API를 쓰지 않도록 임의 벡터(정규화)로 임시 컬렉션을 만들어 측정합니다.
+- 백엔드와 같은 연결 계층(ChromaDBConnectionManager)을 그대로 사용합니다.
+- 측정이 끝나면 임시 컬렉션/디렉터리는 삭제합니다.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.db import ChromaDBConnectionManager  # noqa: E402
+
+
+def _random_vectors(n: int, dim: int, seed: int) -> List[List[float]]:
+    rnd = random.Random(seed)
+    out = []
+    for _ in range(n):
+        v = [rnd.gauss(0.0, 1.0) for _ in range(dim)]
+        norm = sum(x * x for x in v) ** 0.5 or 1.0
+        out.append([x / norm for x in v])
+    return out
+
+
+def _percentile(values: List[float], p: float) -> float:
+    s = sorted(values)
+    idx = min(len(s) - 1, max(0, int(round(p / 100.0 * (len(s) - 1)))))
+    return s[idx]
+
+
+def run_mode(mode: str, args, docs: List[List[float]], queries: List[List[float]]) -> Dict[str, float]:
+    tmp_dir = tempfile.mkdtemp(prefix="chroma_bench_") if mode == "embedded" else None
+    manager = ChromaDBConnectionManager(mode=mode, persist_dir=tmp_dir, max_retries=1)
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+
+    try:
+        collection = manager.get_collection(name)
+
+        # 1. 적재
+        t0 = time.perf_counter()
+        for i in range(0, len(docs), args.batch):
+            chunk = docs[i:i + args.batch]
+            collection.add(
+                ids=[f"d{i + j}" for j in range(len(chunk))],
+                embeddings=chunk,
+                metadatas=[{"bucket": (i + j) % 10} for j in range(len(chunk))],
+            )
+        load_s = time.perf_counter() - t0
+
+        # 워밍업 (인덱스 로드)
+        for q in queries[:5]:
+            collection.query(query_embeddings=[q], n_results=args.top_k)
+
+        # 2. 단일 스레드 지연
+        latencies = []
+        for q in queries:
+            t = time.perf_counter()
+            collection.query(query_embeddings=[q], n_results=args.top_k)
+            latencies.append((time.perf_counter() - t) * 1000)
+
+        # 3. 동시 처리량
+        def _one(q):
+            collection.query(query_embeddings=[q], n_results=args.top_k)
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(_one, queries))
+        qps = len(queries) / (time.perf_counter() - t0)
+
+        return {
+            "load_s": load_s,
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": _percentile(latencies, 95),
+            "p99_ms": _percentile(latencies, 99),
+            "qps": qps,
+        }
+    finally:
+        try:
+            manager.client.delete_collection(name)
+        except Exception:
+            pass
+        manager.close()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Chroma HTTP vs embedded benchmark")
+    parser.add_argument("--modes", default="http,embedded")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=4096, help="solar-embedding-1-large 차원")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"🧪 docs={args.docs}, dim={args.dim}, queries={args.queries}, concurrency={args.concurrency}")
+    docs = _random_vectors(args.docs, args.dim, seed=1)
+    queries = _random_vectors(args.queries, args.dim, seed=2)
+
+    results: Dict[str, Dict[str, float]] = {}
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        print(f"\n▶ {mode} 모드 측정 중...")
+        try:
+            results[mode] = run_mode(mode, args, docs, queries)
+        except ConnectionError as e:
+            print(f"   ⚠️ 건너뜀 (서버 연결 불가): {e}")
+
+    if not results:
+        print("\n❌ 측정된 모드가 없습니다.")
+        return 1
+
+    print(f"\n{'mode':<10}{'load(s)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'qps':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<10}{r['load_s']:>10.2f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}{r['qps']:>10.1f}")
+
+    if "http" in results and "embedded" in results:
+        speedup = results["http"]["p50_ms"] / max(results["embedded"]["p50_ms"], 1e-9)
+        print(f"\n📊 embedded p50 지연이 HTTP 대비 {speedup:.1f}배")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
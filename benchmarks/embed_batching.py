@@ -0,0 +1,110 @@
+"""
+질의 임베딩 마이크로배칭 처리량 비교 (요청마다 호출 vs MicroBatchEmbedder)
+
+    python benchmarks/embed_batching.py                       # 모의 백엔드 (RTT 80ms + 문자열당 0.5ms)
+    python benchmarks/embed_batching.py --concurrency 64 --requests 1000
+    python benchmarks/embed_batching.py --real                # 실제 Upstage API (UPSTAGE_API_KEY 필요, 과금 주의)
+
+모의 백엔드는 HTTP 왕복 1회 비용(--rtt-ms)과 문자열당 비용(--per-text-ms)만 흉내냅니다.
+배칭 효과는 "호출 1회당 고정 비용"을 여러 요청이 나눠 내는 데서 나오므로 이 두 값으로 재현됩니다.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.common.embedding import MicroBatchEmbedder, _upstage_batch_fn  # noqa: E402
+
+
+class _SimulatedBackend:
+    def __init__(self, rtt_ms: float, per_text_ms: float, max_parallel: int):
+        self.rtt = rtt_ms / 1000.0
+        self.per_text = per_text_ms / 1000.0
+        # 실제 API처럼 동시 연결 수 제한 (클라이언트 풀 크기)
+        self._sem = threading.Semaphore(max_parallel)
+        self.calls = 0
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        with self._sem:
+            self.calls += 1
+            time.sleep(self.rtt + self.per_text * len(texts))
+            return [[float(len(t)), 0.0, 1.0] for t in texts]
+
+
+def _run(embed_one, requests: int, concurrency: int):
+    latencies: List[float] = []
+    lock = threading.Lock()
+
+    def _task(i):
+        t = time.perf_counter()
+        embed_one(f"검색 질의 {i % 500}번 임진왜란 이순신")
+        with lock:
+            latencies.append((time.perf_counter() - t) * 1000)
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(_task, range(requests)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="micro-batching embedder benchmark")
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rtt-ms", type=float, default=80.0)
+    parser.add_argument("--per-text-ms", type=float, default=0.5)
+    parser.add_argument("--backend-parallel", type=int, default=4, help="백엔드 동시 호출 한도")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-wait-ms", type=float, default=20.0)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--real", action="store_true")
+    args = parser.parse_args()
+
+    if args.real:
+        batch_fn = _upstage_batch_fn("solar-embedding-1-large")
+    else:
+        batch_fn = _SimulatedBackend(args.rtt_ms, args.per_text_ms, args.backend_parallel)
+
+    print(f"🧪 requests={args.requests}, concurrency={args.concurrency}, "
+          f"window={args.window_ms}ms, max_wait={args.max_wait_ms}ms, max_batch={args.max_batch}")
+
+    # 1) 요청마다 1회 호출 (기존 embed_query 방식)
+    direct = _run(lambda t: batch_fn([t])[0], args.requests, args.concurrency)
+    direct_calls = getattr(batch_fn, "calls", None)
+
+    # 2) 마이크로배칭
+    if hasattr(batch_fn, "calls"):
+        batch_fn.calls = 0
+    embedder = MicroBatchEmbedder(
+        batch_fn,
+        window_ms=args.window_ms,
+        max_wait_ms=args.max_wait_ms,
+        max_batch=args.max_batch,
+        max_in_flight=args.backend_parallel,
+        name="bench",
+    )
+    batched = _run(embedder.embed_query, args.requests, args.concurrency)
+
+    print(f"\n{'mode':<10}{'req/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'API calls':>11}")
+    print(f"{'direct':<10}{direct['rps']:>10.1f}{direct['p50_ms']:>10.1f}{direct['p95_ms']:>10.1f}{str(direct_calls or '-'):>11}")
+    print(f"{'batched':<10}{batched['rps']:>10.1f}{batched['p50_ms']:>10.1f}{batched['p95_ms']:>10.1f}{embedder.stats()['batches']:>11}")
+    print(f"\n📊 처리량 {batched['rps'] / direct['rps']:.1f}배, 평균 배치 크기 {embedder.stats()['avg_batch']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+같은 원고 피드백 요청 합치기/캐시(SingleFlight) 효과 측정 (모의 지연)
+
+    python benchmarks/feedback_single_flight.py
+    python benchmarks/feedback_single_flight.py --requests 400 --docs 40 --dup-rate 0.4 --edit-rate 0.05
+
+작가 --docs명이 원고를 보내는 상황을 흉내냅니다. 요청의 --dup-rate는 직전 요청과 같은 원고
+(더블 클릭, 저장+분석 동시 요청)이고, --edit-rate 확률로 설정 저장소가 바뀌어 버전이 올라갑니다.
+합치기 없이 = 요청마다 분석 1회, SingleFlight = 실제 분석 횟수와 응답 지연을 비교합니다.
+실제 sleep은 --time-scale 배로 줄이고 결과는 원래 단위(ms)로 환산합니다.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.common.single_flight import SingleFlight  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="manuscript feedback single-flight benchmark (simulated)")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--dup-rate", type=float, default=0.3, help="직전과 같은 원고를 다시 보내는 비율")
+    parser.add_argument("--edit-rate", type=float, default=0.02, help="요청 사이 저장소 버전이 바뀌는 비율")
+    parser.add_argument("--analysis-ms", type=float, default=20000.0, help="분석 1회 지연")
+    parser.add_argument("--gap-ms", type=float, default=3000.0, help="요청 간 평균 간격")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--time-scale", type=float, default=0.001)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    plan = []
+    drafts = [0] * args.docs
+    version = 0
+    last_doc = 0
+    for _ in range(args.requests):
+        if rng.random() < args.dup_rate:
+            doc = last_doc
+        else:
+            doc = rng.randrange(args.docs)
+            drafts[doc] += rng.random() < 0.5  # 절반은 고친 뒤 다시 분석
+        if rng.random() < args.edit_rate:
+            version += 1
+        plan.append((doc, drafts[doc], version, rng.expovariate(1.0 / args.gap_ms)))
+        last_doc = doc
+
+    flights = SingleFlight("bench", max_entries=args.docs * 4, ttl_s=0)
+    lock = threading.Lock()
+    analyses = [0]
+
+    def analyze():
+        with lock:
+            analyses[0] += 1
+        time.sleep(args.analysis_ms / 1000.0 * args.time_scale)
+        return "ok"
+
+    def one(item) -> float:
+        doc, draft, ver, _ = item
+        t0 = time.perf_counter()
+        flights.do((doc, draft), ver, analyze)
+        return (time.perf_counter() - t0) * 1000 / args.time_scale
+
+    latencies = []
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = []
+        for item in plan:
+            futures.append(pool.submit(one, item))
+            time.sleep(item[3] / 1000.0 * args.time_scale)
+        latencies = [f.result() for f in futures]
+
+    s = flights.stats()
+    print(f"{'':<14}{'analyses':>10}{'p50(ms)':>10}")
+    print(f"{'no dedup':<14}{args.requests:>10}{args.analysis_ms:>10.0f}")
+    print(f"{'single-flight':<14}{analyses[0]:>10}{statistics.median(latencies):>10.0f}")
+    print(f"\n📊 분석 {args.requests} → {analyses[0]}회 (합류 {s['shared']}, 캐시 {s['cache_hits']}, 무효화 {s['invalidations']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
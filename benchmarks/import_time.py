@@ -0,0 +1,105 @@
+"""
+백엔드 import 시간 측정 (python -X importtime)
+
+    python benchmarks/import_time.py                 # 기본: import main, 예산 1500ms
+    python benchmarks/import_time.py --budget-ms 800 --module app.common.history.repo
+
+- 새 인터프리터에서 모듈을 import 하며 -X importtime 출력(stderr)을 파싱합니다.
+- 누적 시간이 예산을 넘거나, import 시점에 로드되면 안 되는 모듈(네트워크 클라이언트/LangChain)이
+  로드되면 exit code 1 로 실패합니다. (CI에서 회귀 감지용)
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parents[1]
+
+DEFAULT_MODULE = "main"
+DEFAULT_BUDGET_MS = 1500.0
+
+# import 시점에는 로드되면 안 되는 모듈 (첫 사용 시점에 lazy 로드)
+FORBIDDEN_AT_IMPORT = (
+    "chromadb",
+    "langchain_chroma",
+    "langchain_upstage",
+    "openai",
+    "langchain_community",
+    "langchain_text_splitters",
+)
+
+# "import time: self [us] | cumulative | imported package"
+_LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str) -> List[Tuple[str, int, int, int]]:
+    """(모듈명, self_us, cumulative_us, depth) 리스트"""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = str(ROOT) + os.pathsep + env.get("PYTHONPATH", "")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(ROOT),
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        tail = "\n".join(proc.stderr.strip().splitlines()[-5:])
+        raise RuntimeError(f"import {module} 실패:\n{tail}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _LINE_RE.match(line)
+        if not m:
+            continue
+        self_us, cum_us, indent, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+        rows.append((name, self_us, cum_us, (len(indent) - 1) // 2))
+    return rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="backend import-time budget check")
+    parser.add_argument("--module", default=DEFAULT_MODULE)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=3, help="여러 번 재서 최솟값 사용 (노이즈 완화)")
+    args = parser.parse_args()
+
+    best_total_us = None
+    best_rows: List[Tuple[str, int, int, int]] = []
+    for _ in range(max(1, args.runs)):
+        rows = measure(args.module)
+        total_us = sum(r[1] for r in rows)
+        if best_total_us is None or total_us < best_total_us:
+            best_total_us, best_rows = total_us, rows
+
+    total_ms = best_total_us / 1000.0
+    loaded: Dict[str, int] = {r[0]: r[2] for r in best_rows}
+
+    print(f"📦 import {args.module}: {total_ms:.1f}ms (예산 {args.budget_ms:.0f}ms, 모듈 {len(best_rows)}개)")
+    print(f"\n⏱️ 누적 시간 상위 {args.top}개 (top-level import 기준)")
+    top_level = [r for r in best_rows if r[3] == 0]
+    for name, _self_us, cum_us, _depth in sorted(top_level, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"   {cum_us / 1000:8.1f}ms  {name}")
+
+    failed = False
+    eager = [m for m in FORBIDDEN_AT_IMPORT if m in loaded]
+    if eager:
+        failed = True
+        print(f"\n❌ import 시점에 로드되면 안 되는 모듈: {', '.join(eager)}")
+    if total_ms > args.budget_ms:
+        failed = True
+        print(f"\n❌ 예산 초과: {total_ms:.1f}ms > {args.budget_ms:.0f}ms")
+
+    if not failed:
+        print("\n✅ import-time 예산 통과")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
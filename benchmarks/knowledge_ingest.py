@@ -0,0 +1,121 @@
+"""
+/agent 지식 베이스 대량 적재 처리량 / 메모리 측정 (KnowledgeIngestor)
+
+    python benchmarks/knowledge_ingest.py                          # 10만 건, 모의 임베딩, NumPy 저장소
+    python benchmarks/knowledge_ingest.py --docs 20000 --max-in-flight 8
+    python benchmarks/knowledge_ingest.py --file infra/chromadb/sample_knowledge.json --real   # 실제 Upstage + Chroma (과금 주의)
+
+모의 임베딩은 호출 1회 왕복 비용(--rtt-ms) + 문서당 비용(--per-doc-ms)만 흉내냅니다.
+두 번째 실행(체크포인트 재개)이 아무것도 다시 임베딩하지 않는지도 함께 확인합니다.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.service.knowledge_ingest_service import KnowledgeIngestor  # noqa: E402
+
+
+class _SimulatedEmbedder:
+    def __init__(self, dim: int, rtt_ms: float, per_doc_ms: float):
+        self.dim = dim
+        self.rtt = rtt_ms / 1000.0
+        self.per_doc = per_doc_ms / 1000.0
+        self.calls = 0
+        self.texts = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            self.calls += 1
+            self.texts += len(texts)
+        time.sleep(self.rtt + self.per_doc * len(texts))
+        rng = np.random.default_rng(abs(hash(texts[0])) % (2 ** 32))
+        return rng.standard_normal((len(texts), self.dim), dtype=np.float32).tolist()
+
+
+def _write_jsonl(path: str, n: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({
+                "text": f"지식 문서 {i}: 조선 수군 {i % 97}번 전선의 기록과 임진왜란 해전 {i % 13}회차 요약.",
+                "metadata": {"bucket": i % 10},
+            }, ensure_ascii=False) + "\n")
+
+
+def _peak_rss_mb() -> float:
+    # linux ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="bulk knowledge ingestion benchmark")
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--file", default=None, help="기존 JSONL/JSON 파일 사용 (없으면 --docs 만큼 생성)")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--rtt-ms", type=float, default=80.0)
+    parser.add_argument("--per-doc-ms", type=float, default=0.5)
+    parser.add_argument("--embed-batch", type=int, default=64)
+    parser.add_argument("--upsert-batch", type=int, default=512)
+    parser.add_argument("--max-in-flight", type=int, default=4)
+    parser.add_argument("--real", action="store_true", help="컨테이너의 VectorService (Upstage + 설정된 저장소)")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix="kb_ingest_bench_")
+    try:
+        path = args.file
+        if path is None:
+            path = os.path.join(work, "knowledge.jsonl")
+            _write_jsonl(path, args.docs)
+
+        if args.real:
+            from app.core.container import container
+            vector_service = container.vector_service()
+            repo = vector_service.vector_repository
+            embed = vector_service.embedding_service.create_embeddings
+        else:
+            from app.repository.vector.numpy_repo import NumpyVectorRepository
+            repo = NumpyVectorRepository(os.path.join(work, "index"))
+            embed = _SimulatedEmbedder(args.dim, args.rtt_ms, args.per_doc_ms)
+
+        ingestor = KnowledgeIngestor(
+            repo,
+            embed,
+            embed_batch=args.embed_batch,
+            upsert_batch=args.upsert_batch,
+            max_in_flight=args.max_in_flight,
+            checkpoint_dir=os.path.join(work, "checkpoints"),
+        )
+
+        print(f"🧪 file={path}, embed_batch={args.embed_batch}, upsert_batch={ingestor.upsert_batch}, "
+              f"max_in_flight={args.max_in_flight}")
+        rss_before = _peak_rss_mb()
+        first = ingestor.ingest_file(path)
+        second = ingestor.ingest_file(path)  # 완료된 체크포인트 → 재임베딩 없음
+
+        rate = first["records"] / max(first["elapsed_s"], 1e-9)
+        print(f"\n{'run':<8}{'records':>10}{'upserted':>10}{'skipped':>10}{'sec':>9}{'docs/s':>10}")
+        print(f"{'first':<8}{first['records']:>10}{first['upserted']:>10}{first['skipped_existing']:>10}{first['elapsed_s']:>9.1f}{rate:>10.0f}")
+        print(f"{'resume':<8}{second['records']:>10}{'-':>10}{'-':>10}{second['elapsed_s']:>9.1f}{'-':>10}")
+        print(f"\n📊 peak RSS {_peak_rss_mb():.0f}MB (시작 {rss_before:.0f}MB), "
+              f"embedding calls={getattr(embed, 'calls', '-')}, collection={repo.get_collection_info().get('count')}")
+        return 0
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
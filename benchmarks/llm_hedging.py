@@ -0,0 +1,106 @@
+"""
+멱등 LLM 호출 hedging 효과 측정 (모의 지연)
+
+    python benchmarks/llm_hedging.py
+    python benchmarks/llm_hedging.py --calls 2000 --slow-rate 0.03 --slow-ms 20000 --budget 0.05
+
+호출 지연을 "기본 지연(로그정규) + --slow-rate 확률로 --slow-ms 만큼 꼬리" 로 흉내내고
+HedgedCaller를 끈 경우/켠 경우의 p50/p95/p99와 추가 요청 비율을 비교합니다.
+실제 sleep은 --time-scale 배로 줄이고 결과는 원래 단위(ms)로 환산합니다.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.common.hedging import HedgedCaller  # noqa: E402
+from app.common.llm_limiter import AdaptiveConcurrencyLimiter  # noqa: E402
+
+
+class _SimCall:
+    def __init__(self, args, seed: int):
+        self.args = args
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def __call__(self) -> str:
+        a = self.args
+        with self.lock:
+            self.requests += 1
+            ms = self.rng.lognormvariate(0, 0.25) * a.base_ms
+            if self.rng.random() < a.slow_rate:
+                ms += a.slow_ms
+        time.sleep(ms / 1000.0 * a.time_scale)
+        return "ok"
+
+
+def _pct(values: List[float], q: float) -> float:
+    s = sorted(values)
+    return s[int(q * (len(s) - 1))]
+
+
+def run(args, hedge: bool) -> Dict[str, float]:
+    limiter = AdaptiveConcurrencyLimiter("bench", initial=args.concurrency * 2, max_limit=args.concurrency * 4,
+                                         latency_target_ms=10 ** 9)
+    caller = HedgedCaller(enabled=hedge, budget=args.budget, min_samples=20,
+                          min_delay_ms=args.min_delay_ms * args.time_scale,
+                          max_workers=args.concurrency * 4, limiter=limiter)
+    sim = _SimCall(args, args.seed)
+
+    def _one(_: int) -> float:
+        t0 = time.perf_counter()
+        caller.call("bench", sim)
+        return (time.perf_counter() - t0) * 1000 / args.time_scale
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(_one, range(args.calls)))
+
+    stats = caller.stats()["keys"].get("bench", {})
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": _pct(latencies, 0.95),
+        "p99_ms": _pct(latencies, 0.99),
+        "extra_rate": (sim.requests - args.calls) / args.calls,
+        "hedge_wins": stats.get("hedge_wins", 0),
+        "budget_denied": stats.get("budget_denied", 0),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="hedged LLM request benchmark (simulated)")
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--base-ms", type=float, default=2000.0, help="평상시 호출 지연 중앙값")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="꼬리 지연이 붙는 호출 비율")
+    parser.add_argument("--slow-ms", type=float, default=15000.0)
+    parser.add_argument("--budget", type=float, default=0.05, help="호출 대비 hedge 요청 비율 상한")
+    parser.add_argument("--min-delay-ms", type=float, default=500.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    args = parser.parse_args()
+
+    results = {"off": run(args, hedge=False), "hedged": run(args, hedge=True)}
+
+    print(f"{'mode':<8}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'extra req':>11}{'wins':>7}{'denied':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<8}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}{r['p99_ms']:>10.0f}"
+              f"{r['extra_rate']:>11.3f}{r['hedge_wins']:>7}{r['budget_denied']:>8}")
+
+    off, on = results["off"], results["hedged"]
+    print(f"\n📊 p99 {off['p99_ms']:.0f} → {on['p99_ms']:.0f}ms ({on['p99_ms'] / off['p99_ms']:.2f}배), "
+          f"추가 요청 {on['extra_rate'] * 100:.1f}% (예산 {args.budget * 100:.0f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
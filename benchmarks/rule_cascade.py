@@ -0,0 +1,232 @@
+"""
+룰 엔진 모델 캐스케이드 비교: solar-pro 단일 경로 vs (저가 모델 1차 선별 → 후보가 있을 때만 solar-pro)
+
+    python benchmarks/rule_cascade.py                          # 모의 모델 (지연/토큰/recall 모델링)
+    python benchmarks/rule_cascade.py --episodes 200 --conflict-rate 0.05 --screen-recall 0.9
+    python benchmarks/rule_cascade.py --real --episodes 10     # 실제 Upstage 호출 (UPSTAGE_API_KEY 필요, 과금 주의)
+
+합성 데이터: 세계관 앵커 + 문단 여러 개짜리 원고. 문단마다 --conflict-rate 확률로 앵커와 정면 충돌하는 문장을 심습니다.
+recall = 심어 둔 충돌 문장 중 이슈로 잡힌 비율. (캐스케이드는 기본 off, RULES_CASCADE=on으로 켜기 전에 이 값으로 확인)
+
+모의 모드는 RuleCascade의 실제 조각 나누기/토큰 예산 계산을 그대로 쓰고, 모델 호출만
+"고정 지연 + 토큰당 지연" 과 주어진 탐지율(recall/오탐률)로 흉내냅니다 (--time-scale 배로 줄여 실제 sleep).
+비용은 입력+출력 토큰 × 모델별 단가(--deep-price/--screen-price, 100만 토큰당)로 계산합니다.
+기본 단가는 상대값(solar-pro=1.0)이니 실제 요금표 값으로 바꿔 넣으세요.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.common.prompt_budget import count_tokens  # noqa: E402
+from app.service.story_keeper_agent.rules.cascade import RuleCascade, split_chunks  # noqa: E402
+
+WORLD = {
+    "시대": "조선 중기 (16세기 말)",
+    "마법": "존재하지 않는다",
+    "수도": "한양",
+    "화폐": "상평통보와 쌀, 포목으로 거래한다",
+    "통신": "봉화와 파발만 쓴다",
+    "무기": "화약 무기는 조총과 총통이 전부다",
+}
+
+CLEAN = [
+    "새벽 안개가 걷히자 장터에는 상평통보를 셈하는 소리가 가득했다.",
+    "이순신은 군관들을 불러 모아 물때와 바람의 방향을 다시 물었다.",
+    "파발마가 흙먼지를 일으키며 한양 쪽으로 달려갔다.",
+    "주막 주인은 국밥 한 그릇과 탁주를 내오며 요즘 세상이 흉흉하다고 투덜거렸다.",
+    "그는 낡은 도포 자락을 여미고 관아 문을 두드렸다.",
+    "총통을 실은 판옥선이 천천히 포구를 빠져나갔다.",
+    "아이들은 봉화대에 오른 연기를 가리키며 웅성거렸다.",
+    "선비는 붓을 내려놓고 창밖의 빗소리를 오래 들었다.",
+]
+
+CONFLICTS = [
+    "그는 품속에서 스마트폰을 꺼내 한양의 동료에게 전화를 걸었다.",
+    "마법사가 주문을 외우자 불꽃이 하늘로 치솟았다.",
+    "상인은 달러 지폐로 값을 치르고 거스름돈을 받았다.",
+    "왕은 수도인 개경의 궁궐에서 신하들을 맞았다.",
+    "병사들은 기관총을 걸어 두고 적선을 향해 난사했다.",
+]
+
+
+def make_episodes(n: int, paragraphs: int, conflict_rate: float, seed: int) -> List[Tuple[str, List[str]]]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        paras, planted = [], []
+        for _ in range(paragraphs):
+            body = " ".join(rng.choice(CLEAN) for _ in range(rng.randint(4, 8)))
+            if rng.random() < conflict_rate:
+                s = rng.choice(CONFLICTS)
+                body += " " + s
+                planted.append(s)
+            paras.append(body)
+        out.append(("\n\n".join(paras), planted))
+    return out
+
+
+def _anchors() -> List[str]:
+    return [f"{k}: {v}" for k, v in WORLD.items()]
+
+
+# ---------------------------------------------------------
+# 모의 모델
+# ---------------------------------------------------------
+class _SimModels:
+    def __init__(self, args, rng: random.Random):
+        self.args = args
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.tokens = {"screen": 0, "deep": 0}
+
+    def _call(self, role: str, prompt_tokens: int, out_tokens: int) -> None:
+        a = self.args
+        base, per_tok = (a.screen_rtt_ms, a.screen_ms_per_token) if role == "screen" else (a.deep_rtt_ms, a.deep_ms_per_token)
+        with self.lock:
+            self.tokens[role] += prompt_tokens + out_tokens
+        time.sleep((base + per_tok * (prompt_tokens + out_tokens)) / 1000.0 * a.time_scale)
+
+    def screen(self, kind: str, anchors: List[str], chunk: str) -> bool:
+        self._call("screen", count_tokens(chunk) + count_tokens(" ".join(anchors)) + 250, 8)
+        with self.lock:
+            if self.rng.random() < self.args.screen_error_rate:
+                raise RuntimeError("simulated screen failure")
+        has_conflict = any(c in chunk for c in CONFLICTS)
+        with self.lock:
+            roll = self.rng.random()
+        return roll < (self.args.screen_recall if has_conflict else self.args.screen_fp_rate)
+
+    def deep(self, anchors: List[str], manuscript: str) -> List[str]:
+        self._call("deep", count_tokens(manuscript) + count_tokens(" ".join(anchors)) + 600, 300)
+        found = []
+        for c in CONFLICTS:
+            if c in manuscript:
+                with self.lock:
+                    roll = self.rng.random()
+                if roll < self.args.deep_recall:
+                    found.append(c)
+        return found
+
+
+def run_simulated(args, episodes) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for mode in ("single", "cascade"):
+        models = _SimModels(args, random.Random(args.seed + 1))
+        cascade = RuleCascade(screen_fn=models.screen, enabled=(mode == "cascade"), max_workers=args.screen_workers)
+        latencies, planted_total, hit, deep_calls = [], 0, 0, 0
+        for text, planted in episodes:
+            t0 = time.perf_counter()
+            manuscript = cascade.select("world", _anchors(), text)
+            found: List[str] = []
+            if manuscript:
+                deep_calls += 1
+                found = models.deep(_anchors(), manuscript)
+            latencies.append((time.perf_counter() - t0) * 1000 / args.time_scale)
+            planted_total += len(planted)
+            hit += sum(1 for s in planted if s in found)
+        cost = (models.tokens["deep"] * args.deep_price + models.tokens["screen"] * args.screen_price) / 1e6
+        results[mode] = {
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+            "deep_calls": deep_calls,
+            "deep_tokens": models.tokens["deep"],
+            "screen_tokens": models.tokens["screen"],
+            "cost": cost,
+            "recall": hit / planted_total if planted_total else 1.0,
+        }
+    return results
+
+
+# ---------------------------------------------------------
+# 실제 호출
+# ---------------------------------------------------------
+def run_real(args, episodes) -> Dict[str, Dict[str, float]]:
+    from app.common.prompt_budget import prompt_usage_stats
+    from app.service.story_keeper_agent.rules import cascade as cascade_mod
+    from app.service.story_keeper_agent.rules.world_rules import check_world_consistency
+
+    results = {}
+    for mode in ("single", "cascade"):
+        cascade_mod.cascade.enabled = (mode == "cascade")
+        before = prompt_usage_stats()
+        latencies, planted_total, hit = [], 0, 0
+        for text, planted in episodes:
+            t0 = time.perf_counter()
+            issues = check_world_consistency({"raw_text": text}, {"world": WORLD})
+            latencies.append((time.perf_counter() - t0) * 1000)
+            sentences = " ".join(i.sentence or "" for i in issues)
+            planted_total += len(planted)
+            hit += sum(1 for s in planted if s[:12] in sentences)
+        after = prompt_usage_stats()
+
+        def _delta(name: str) -> Tuple[int, int]:
+            a, b = after.get(name, {}), before.get(name, {})
+            return a.get("tokens", 0) - b.get("tokens", 0), a.get("calls", 0) - b.get("calls", 0)
+
+        deep_tokens, deep_calls = _delta("world_rules")
+        screen_tokens, _ = _delta("world_screen")
+        results[mode] = {
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+            "deep_calls": deep_calls,
+            "deep_tokens": deep_tokens,
+            "screen_tokens": screen_tokens,
+            "cost": (deep_tokens * args.deep_price + screen_tokens * args.screen_price) / 1e6,  # 입력 토큰 기준
+            "recall": hit / planted_total if planted_total else 1.0,
+        }
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="rule engine model cascade benchmark")
+    parser.add_argument("--episodes", type=int, default=400)
+    parser.add_argument("--paragraphs", type=int, default=16)
+    parser.add_argument("--conflict-rate", type=float, default=0.03, help="문단당 충돌 문장 심을 확률")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--deep-price", type=float, default=1.0, help="solar-pro 100만 토큰당 단가")
+    parser.add_argument("--screen-price", type=float, default=0.2, help="선별 모델 100만 토큰당 단가")
+    parser.add_argument("--real", action="store_true")
+    # 모의 모델 파라미터
+    parser.add_argument("--deep-rtt-ms", type=float, default=900.0)
+    parser.add_argument("--deep-ms-per-token", type=float, default=0.35)
+    parser.add_argument("--screen-rtt-ms", type=float, default=250.0)
+    parser.add_argument("--screen-ms-per-token", type=float, default=0.08)
+    parser.add_argument("--deep-recall", type=float, default=0.9)
+    parser.add_argument("--screen-recall", type=float, default=0.95)
+    parser.add_argument("--screen-fp-rate", type=float, default=0.1)
+    parser.add_argument("--screen-error-rate", type=float, default=0.0, help="선별 호출 실패 확률 (실패 시 원고 전체를 2차로)")
+    parser.add_argument("--screen-workers", type=int, default=4)
+    parser.add_argument("--time-scale", type=float, default=0.01, help="모의 지연을 이 배율로 줄여 sleep (결과는 원래 단위로 환산)")
+    args = parser.parse_args()
+
+    episodes = make_episodes(args.episodes, args.paragraphs, args.conflict_rate, args.seed)
+    with_conflict = sum(1 for _, p in episodes if p)
+    chunks = statistics.mean(len(split_chunks(t)) for t, _ in episodes)
+    print(f"🧪 episodes={len(episodes)} (충돌 포함 {with_conflict}), 평균 조각 {chunks:.1f}개, "
+          f"{'real' if args.real else 'simulated'}")
+
+    results = run_real(args, episodes) if args.real else run_simulated(args, episodes)
+
+    print(f"\n{'path':<9}{'p50(ms)':>10}{'p95(ms)':>10}{'pro calls':>11}{'pro tok':>10}{'screen tok':>12}{'cost':>10}{'recall':>8}")
+    for mode, r in results.items():
+        print(f"{mode:<9}{r['p50_ms']:>10.0f}{r['p95_ms']:>10.0f}{r['deep_calls']:>11}{r['deep_tokens']:>10}"
+              f"{r['screen_tokens']:>12}{r['cost']:>10.4f}{r['recall']:>8.3f}")
+
+    s, c = results["single"], results["cascade"]
+    if s["cost"]:
+        print(f"\n📊 비용 {c['cost'] / s['cost']:.2f}배, p50 지연 {c['p50_ms'] / s['p50_ms']:.2f}배, "
+              f"recall {s['recall']:.3f} → {c['recall']:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
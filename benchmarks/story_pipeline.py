@@ -0,0 +1,100 @@
+"""
+Story Keeper 파이프라인: 순차 실행 vs 단계 그래프(StageGraph) 동시 실행 (모의 지연)
+
+    python benchmarks/story_pipeline.py
+    python benchmarks/story_pipeline.py --runs 20 --summary-ms 9000 --rule-ms 12000 --jitter 0.3
+    python benchmarks/story_pipeline.py --deadline-ms 12000
+
+
+STORY_KEEPER_GRAPH의 단계/입력 정의를 그대로 쓰고 각 단계 함수만 "지정 지연만큼 sleep"으로 바꿉니다.
+순차 = 모든 단계 지연의 합 (기존 run_pipeline / manuscript_feedback 흐름),
+그래프 = 입력이 준비된 단계부터 동시에 실행했을 때의 실제 경과 시간.
+--deadline-ms를 주면 같은 마감(deadline_scope)으로 돌려 응답 시간과 부분 결과(partial) 비율을 같이 봅니다.
+실제 sleep은 --time-scale 배로 줄이고 결과는 원래 단위(ms)로 환산합니다.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.common.deadline import deadline_scope, remaining  # noqa: E402
+from app.common.stage_graph import Stage, StageGraph  # noqa: E402
+from app.service.story_keeper_agent.pipeline import STORY_KEEPER_GRAPH  # noqa: E402
+
+
+def _latencies(args) -> Dict[str, float]:
+    return {
+        "chunks": 5, "full_text": 5, "state": 20, "facts": args.facts_ms,
+        "summary": args.summary_ms,
+        "world_issues": args.rule_ms, "character_issues": args.rule_ms, "plot_issues": args.rule_ms,
+        "issues": args.verify_ms, "report": 30,
+    }
+
+
+def _sim_graph(args, rng: random.Random) -> StageGraph:
+    base = _latencies(args)
+
+    def make(name: str):
+        def fn(**_):
+            ms = base.get(name, 0) * (1 + rng.uniform(-args.jitter, args.jitter))
+            left = remaining()  # 실제 LLM 호출처럼 마감이 지나면 기다리지 않음
+            time.sleep(min(ms / 1000.0 * args.time_scale, left if left is not None else float("inf")))
+            return name
+        return fn
+
+    return StageGraph("sim", [
+        Stage(s.name, make(s.name), inputs=s.inputs, required=s.required,
+              after_deadline=s.after_deadline, deadline_share=s.deadline_share)
+        for s in STORY_KEEPER_GRAPH.stages.values()
+    ])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="story keeper stage graph benchmark (simulated)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--summary-ms", type=float, default=8000.0, help="회차 요약 LLM 호출")
+    parser.add_argument("--rule-ms", type=float, default=10000.0, help="룰 검사 1종(세계관/캐릭터/플롯) LLM 호출")
+    parser.add_argument("--verify-ms", type=float, default=4000.0, help="이슈 재검증/필터")
+    parser.add_argument("--facts-ms", type=float, default=10.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--deadline-ms", type=float, default=0.0, help="요청 마감 (0이면 없음)")
+    parser.add_argument("--time-scale", type=float, default=0.01)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    params = {"episode_no": 1, "raw_text": "", "severity": None}
+    sequential = sum(_latencies(args).values())
+
+    graph = _sim_graph(args, rng)
+    totals = []
+    partial = 0
+    # 마감을 주면 manuscript_feedback처럼 응답에 필요한 단계까지만 실행
+    targets = ("issues", "summary") if args.deadline_ms else None
+    for _ in range(args.runs):
+        t0 = time.perf_counter()
+        with deadline_scope(args.deadline_ms * args.time_scale):
+            run = graph.run(params, targets=targets)
+        totals.append((time.perf_counter() - t0) * 1000 / args.time_scale)
+        partial += bool([n for n in run.cut_by_deadline() if n != "summary"])
+
+    print(f"{'stage':<18}{'p50(ms)':>10}")
+    for name, s in graph.stats()["stages"].items():
+        print(f"{name:<18}{(s['p50_ms'] or 0) / args.time_scale:>10.0f}")
+
+    p50 = statistics.median(totals)
+    print(f"\n📊 순차 {sequential:.0f}ms → 그래프 p50 {p50:.0f}ms ({p50 / sequential:.2f}배)")
+    if args.deadline_ms:
+        print(f"⏱️ 마감 {args.deadline_ms:.0f}ms: 최대 {max(totals):.0f}ms, partial {partial}/{args.runs}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+VectorRepository 백엔드 비교: NumPy memmap(float32 / int8) vs Chroma
+
+    python benchmarks/vector_backends.py                          # 10k, 100k / dim 1024 / Chroma embedded
+    python benchmarks/vector_backends.py --sizes 10000 --dim 4096 --chroma-mode http
+    python benchmarks/vector_backends.py --backends numpy-f32,numpy-int8   # Chroma 없이
+
+- 정답(ground truth)은 float32 전수 비교(제곱 L2)로 계산하고 recall@k를 냅니다.
+- 지연은 질의 1건씩(p50/p95), 처리량은 질의 묶음 1회 호출(batch) 기준입니다.
+- Upstage API는 쓰지 않습니다 (정규분포 임의 벡터).
+"""
+from __future__ import annotations
+
+import argparse
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.repository.vector.numpy_repo import NumpyVectorRepository  # noqa: E402
+
+
+def _ground_truth(X: np.ndarray, Q: np.ndarray, k: int) -> np.ndarray:
+    x_sq = np.einsum("ij,ij->i", X, X)
+    out = []
+    for q in Q:
+        d = x_sq - 2.0 * (X @ q)
+        out.append(np.argsort(d)[:k])
+    return np.asarray(out)
+
+
+def _recall(result_ids: List[List[str]], truth: np.ndarray) -> float:
+    hits = 0
+    for got, want in zip(result_ids, truth):
+        hits += len(set(got) & {f"d{i}" for i in want})
+    return hits / float(truth.size)
+
+
+class _ChromaBackend:
+    """ChromaDBConnectionManager 위 임시 컬렉션 (VectorRepository.query와 같은 결과 모양)"""
+
+    def __init__(self, mode: str):
+        from app.core.db import ChromaDBConnectionManager
+
+        self._tmp = tempfile.mkdtemp(prefix="vec_bench_chroma_") if mode == "embedded" else None
+        self.manager = ChromaDBConnectionManager(mode=mode, persist_dir=self._tmp, max_retries=1)
+        self.name = f"bench_{uuid.uuid4().hex[:8]}"
+        self.collection = self.manager.get_collection(self.name)
+
+    def add_documents(self, documents, embeddings, metadatas, ids):
+        self.collection.add(documents=documents, embeddings=embeddings, metadatas=metadatas, ids=ids)
+
+    def query(self, query_embeddings, n_results=5, include=None):
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, include=include or ["distances"])
+
+    def close(self):
+        try:
+            self.manager.client.delete_collection(self.name)
+        except Exception:
+            pass
+        self.manager.close()
+        if self._tmp:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+def run_backend(name: str, args, X: np.ndarray, Q: np.ndarray, truth: np.ndarray) -> Dict[str, float]:
+    tmp_dir = None
+    if name.startswith("numpy"):
+        tmp_dir = tempfile.mkdtemp(prefix="vec_bench_np_")
+        repo = NumpyVectorRepository(tmp_dir, quantize="int8" if name.endswith("int8") else "float32")
+    else:
+        repo = _ChromaBackend(args.chroma_mode)
+
+    try:
+        n = len(X)
+        t0 = time.perf_counter()
+        for s in range(0, n, args.batch):
+            e = min(n, s + args.batch)
+            repo.add_documents(
+                documents=[f"doc {i}" for i in range(s, e)],
+                embeddings=X[s:e].tolist(),
+                metadatas=[{"bucket": i % 10} for i in range(s, e)],
+                ids=[f"d{i}" for i in range(s, e)],
+            )
+        load_s = time.perf_counter() - t0
+
+        repo.query(Q[:2].tolist(), n_results=args.top_k, include=["distances"])  # 워밍업
+
+        latencies, ids = [], []
+        for q in Q:
+            t = time.perf_counter()
+            res = repo.query([q.tolist()], n_results=args.top_k, include=["distances"])
+            latencies.append((time.perf_counter() - t) * 1000)
+            ids.append(res["ids"][0])
+
+        t0 = time.perf_counter()
+        repo.query(Q.tolist(), n_results=args.top_k, include=["distances"])
+        batch_qps = len(Q) / (time.perf_counter() - t0)
+
+        return {
+            "load_s": load_s,
+            "recall": _recall(ids, truth),
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": sorted(latencies)[int(0.95 * (len(latencies) - 1))],
+            "batch_qps": batch_qps,
+        }
+    finally:
+        if isinstance(repo, _ChromaBackend):
+            repo.close()
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="VectorRepository backend recall/latency benchmark")
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--backends", default="numpy-f32,numpy-int8,chroma")
+    parser.add_argument("--chroma-mode", default="embedded", choices=("embedded", "http"))
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    rng = np.random.default_rng(0)
+
+    rows = []
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        print(f"\n🧪 n={size}, dim={args.dim}, queries={args.queries}, k={args.top_k}")
+        X = rng.standard_normal((size, args.dim), dtype=np.float32)
+        Q = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+        truth = _ground_truth(X, Q, args.top_k)
+
+        for name in backends:
+            print(f"   ▶ {name} ...")
+            try:
+                r = run_backend(name, args, X, Q, truth)
+            except (ConnectionError, ImportError) as e:
+                print(f"     ⚠️ 건너뜀: {e}")
+                continue
+            rows.append((size, name, r))
+
+    print(f"\n{'n':>8}  {'backend':<12}{'load(s)':>9}{'recall':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'batch qps':>11}")
+    for size, name, r in rows:
+        print(f"{size:>8}  {name:<12}{r['load_s']:>9.2f}{r['recall']:>9.3f}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['batch_qps']:>11.1f}")
+    return 0 if rows else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,9 +6,11 @@ import json
 import re
 import os
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 BASE_URL = os.getenv("BACKEND_URL", "http://backend:8000")
+# 원고 분석 요청 시간 예산 (서버는 이 안에 검증된 이슈만 partial로 돌려줌)
+FEEDBACK_DEADLINE_MS = int(os.getenv("FEEDBACK_DEADLINE_MS", "240000"))
 
 
 def _project_root() -> Path:
@@ -51,6 +53,38 @@ def _pick_first_str(d: Dict[str, Any], keys: List[str]) -> str:
     return ""
 
 
+# ETag 조건부 요청 캐시: (url, params) -> (etag, json)
+# Streamlit은 rerun마다 같은 GET을 반복하므로, 바뀌지 않았으면 304만 받고 이전 본문을 재사용
+_ETAG_CACHE: Dict[Tuple[str, Tuple], Tuple[str, Any]] = {}
+
+
+def _get_json_cached(url: str, params: Optional[Dict[str, Any]] = None, timeout: int = 8) -> requests.Response:
+    """
+    If-None-Match를 붙여 GET. 304면 캐시된 JSON을 담은 200 응답처럼 돌려줍니다.
+    (호출 측 코드는 기존 status_code / .json() 처리 그대로 사용)
+    """
+    key = (url, tuple(sorted((params or {}).items())))
+    headers = {}
+    cached = _ETAG_CACHE.get(key)
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    res = requests.get(url, params=params, headers=headers, timeout=timeout)
+
+    if res.status_code == 304 and cached:
+        res.status_code = 200
+        res._content = json.dumps(cached[1], ensure_ascii=False).encode("utf-8")
+        return res
+
+    etag = res.headers.get("ETag")
+    if res.status_code == 200 and etag:
+        try:
+            _ETAG_CACHE[key] = (etag, res.json())
+        except ValueError:
+            pass
+    return res
+
+
 def _normalize_storykeeper_items(raw: Any) -> List[Dict[str, Any]]:
     if isinstance(raw, dict):
         if isinstance(raw.get("edits"), list):
@@ -87,10 +121,16 @@ def _normalize_storykeeper_items(raw: Any) -> List[Dict[str, Any]]:
     return out
 
 
-def get_story_history_api(timeout: int = 8) -> Tuple[Dict[str, Any], str]:
+def get_story_history_api(
+    timeout: int = 8,
+    fields: Optional[str] = None,
+    from_ep: Optional[int] = None,
+    to_ep: Optional[int] = None,
+) -> Tuple[Dict[str, Any], str]:
     url = f"{BASE_URL}/story/history"
+    params = {k: v for k, v in {"fields": fields, "from_ep": from_ep, "to_ep": to_ep}.items() if v is not None}
     try:
-        res = requests.get(url, timeout=timeout)
+        res = _get_json_cached(url, params=params, timeout=timeout)
         if res.status_code != 200:
             return {}, f"히스토리 요청 실패: {res.status_code} - {res.text}"
 
@@ -110,7 +150,7 @@ def get_story_history_api(timeout: int = 8) -> Tuple[Dict[str, Any], str]:
 def get_world_setting_api(timeout: int = 8) -> Tuple[Dict[str, Any], str]:
     url = f"{BASE_URL}/story/world_setting"
     try:
-        res = requests.get(url, timeout=timeout)
+        res = _get_json_cached(url, timeout=timeout)
         if res.status_code != 200:
             return {}, f"세계관 요청 실패: {res.status_code} - {res.text}"
 
@@ -124,17 +164,30 @@ def get_world_setting_api(timeout: int = 8) -> Tuple[Dict[str, Any], str]:
         return {}, f"세계관 API 통신 오류: {e}"
 
 
+def _feedback_timeout() -> float:
+    # 서버 마감 + 응답 정리/전송 여유
+    return FEEDBACK_DEADLINE_MS / 1000.0 + 30
+
+
 def analyze_text_api(doc_id: str, content: str, episode_no: int = 1, severity: str = "medium") -> List[Dict[str, Any]]:
     forwarding = _strip_html_to_text(content)
     url = f"{BASE_URL}/story/manuscript_feedback"
 
-    params = {"episode_no": episode_no, "debug_raw": False}
+    # doc_id: 같은 문서로 다시 분석하면 서버가 이전 분석을 취소
+    params = {"episode_no": episode_no, "debug_raw": False, "deadline_ms": FEEDBACK_DEADLINE_MS, "doc_id": doc_id}
     headers = {"Content-Type": "text/plain; charset=utf-8"}
 
     try:
-        response = requests.post(url, params=params, data=forwarding.encode("utf-8"), headers=headers)
+        response = requests.post(url, params=params, data=forwarding.encode("utf-8"), headers=headers,
+                                 timeout=_feedback_timeout())
+        if response.status_code == 409:
+            # 새로 누른 분석으로 대체된 이전 요청 → 결과 표시 안 함
+            return []
         if response.status_code == 200:
-            return _normalize_storykeeper_items(response.json())
+            data = response.json()
+            if isinstance(data, dict) and data.get("partial"):
+                st.warning("시간 안에 끝나지 않은 검사가 있어 검증을 마친 이슈만 표시합니다.")
+            return _normalize_storykeeper_items(data)
         st.error(f"분석 요청 실패: {response.status_code} - {response.text}")
         return []
     except Exception as e:
@@ -146,12 +199,16 @@ def save_story_history_api(episode_no: int, full_text: str) -> Tuple[bool, Dict[
     plain = _strip_html_to_text(full_text)
     url = f"{BASE_URL}/story/manuscript_feedback"
 
-    params = {"episode_no": episode_no, "debug_raw": False}
+    params = {"episode_no": episode_no, "debug_raw": False, "deadline_ms": FEEDBACK_DEADLINE_MS}
     headers = {"Content-Type": "text/plain; charset=utf-8"}
 
     try:
-        response = requests.post(url, params=params, data=plain.encode("utf-8"), headers=headers)
+        response = requests.post(url, params=params, data=plain.encode("utf-8"), headers=headers,
+                                 timeout=_feedback_timeout())
         if response.status_code == 200:
+            # 분석은 200이어도 요약 저장 단계는 실패/시간 초과일 수 있음
+            if not response.json().get("summary_saved"):
+                return False, {"status": "error", "message": "History was not saved (summary stage failed or timed out)"}
             return True, {"status": "success", "message": "History updated via API"}
         return False, {"status": "error", "message": response.text}
     except Exception as e:
@@ -271,7 +328,7 @@ def get_characters_api(timeout: int = 8) -> Dict[str, Any]:
     """
     url = f"{BASE_URL}/story/characters"
     try:
-        response = requests.get(url, timeout=timeout)
+        response = _get_json_cached(url, timeout=timeout)
         if response.status_code == 200:
             # 백엔드가 보내준 JSON(딕셔너리 형태)을 그대로 반환
             return response.json()
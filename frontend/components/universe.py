@@ -330,7 +330,8 @@ def _normalize_history_items(history: dict) -> list[tuple[int, dict]]:
 
 
 def _fetch_and_cache_history(show_toast: bool = True) -> bool:
-    raw, err = get_story_history_api()
+    # 요약 탭은 제목/요약만 쓰므로 story_flow 등은 받지 않음
+    raw, err = get_story_history_api(fields="episode_no,title,summary")
     if err:
         if show_toast:
             st.toast(f"불러오기 실패: {err}", icon="⚠️")
@@ -10,6 +10,7 @@ from contextlib import asynccontextmanager
 from app.service.clio_fact_checker_agent.router import router as manuscript_router
 from app.service.clio_fact_checker_agent.history_router import router as history_router
 from app.service.story_keeper_agent.api import router as story_keeper_router
+from app.api.route.agent_routers import router as agent_router
 
 # ✅ [추가됨] 파일 처리 서비스 Import
 from app.service.ingest_service import StoryIngestionService
@@ -17,9 +18,14 @@ from app.service.ingest_service import StoryIngestionService
 # 공용 모듈 Import
 from app.common.history import repo as history_repo
 from app.common.history.vector_store import vector_store
+from app.core.container import container
 from typing import List, Optional, Any, Dict
 from pydantic import BaseModel, Field
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi import Request, Response, Query
+from app.common.changelog import changelog
+from app.common.etag import not_modified
 import uuid
 
 # DB 파일 경로 (루트 기준이므로 app/... 으로 시작)
@@ -37,7 +43,16 @@ async def lifespan(app: FastAPI):
     current_entities = history_repo.list_entities(HISTORY_DB_PATH)
     vector_store.sync_from_json(current_entities)
 
+    # 3. 앱 전역 서비스(LLM/Chroma 클라이언트 등) 미리 생성 → 첫 요청 지연 제거
+    app.state.container = container
+    container.warm_up()
+
+    # 4. ChromaDB heartbeat는 백그라운드에서 (요청 경로에서 제외)
+    from app.core.db import get_connection_manager
+    get_connection_manager().start_health_monitor()
+
     yield
+    get_connection_manager().close()
     print("👋 [Shutdown] 서버 종료")
 
 
@@ -54,8 +69,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
+# 큰 JSON 응답(히스토리/설정/캐릭터)은 gzip 압축 (Accept-Encoding: gzip일 때만)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 
 # --------------------------------------------------------------------------
 # [Models] 데이터 모델
@@ -177,19 +196,66 @@ app.include_router(history_router)
 
 app.include_router(story_keeper_router)
 
+# 3. 지식베이스 RAG 에이전트 API (/agent: query, query/stream, knowledge/bulk, cache)
+app.include_router(agent_router)
+
+
+# ---------------------------------------------------------
+# 변경 피드 (클라이언트/복제본 증분 동기화)
+# ---------------------------------------------------------
+@app.get("/changes", tags=["Sync"])
+def get_changes(
+    since: int = Query(0, ge=0, description="마지막으로 반영한 버전 (처음이면 0)"),
+    limit: int = Query(1000, ge=1, le=5000),
+    stores: Optional[str] = Query(None, description="history,material,character,plot,episode 중 콤마 구분"),
+):
+    """
+    since 이후의 변경 목록을 버전 순으로 반환합니다.
+    - reset=true면 since가 압축으로 지워진 구간이므로 전체를 다시 받은 뒤 version부터 이어서 요청
+    - has_more=true면 next_since로 다시 요청
+    """
+    store_list = [x.strip() for x in stores.split(",") if x.strip()] if stores else None
+    return changelog.since(since, limit=limit, stores=store_list)
+
 
 @app.get("/health")
 def health_check():
-    return {"status": "ok", "version": "1.0.0"}
+    from app.core.db import chroma_status
+    from app.common.embedding import embedder_stats
+    from app.common.prompt_budget import prompt_usage_stats
+    from app.service.story_keeper_agent.rules.cascade import cascade
+    from app.common.llm_limiter import solar_limiter
+    from app.common.hedging import hedger
+    from app.service.story_keeper_agent.pipeline import STORY_KEEPER_GRAPH, feedback_flights
+    from app.common.deadline import deadline_stats
+    return {
+        "status": "ok",
+        "version": "1.0.0",
+        "chroma": chroma_status(),
+        "embedders": embedder_stats(),
+        "prompts": prompt_usage_stats(),
+        "rule_cascade": cascade.stats(),
+        "llm_limiter": solar_limiter.stats(),
+        "llm_hedging": hedger.stats(),
+        "story_pipeline": STORY_KEEPER_GRAPH.stats(),
+        "deadlines": deadline_stats(),
+        "feedback_cache": feedback_flights.stats(),
+    }
 
 # 실행 명령: uvicorn main:app --reload
 
 # backend/main.py 하단에 추가
 @app.get("/story/characters", tags=["Story Keeper"])
-def get_characters():
+def get_characters(request: Request, response: Response):
     import json, os
     # 백엔드 내부의 실제 데이터 경로
     path = "app/data/characters.json"
+
+    # 파일이 그대로면 304 (ETag = 파일 버전)
+    cached = not_modified(request, response, path)
+    if cached:
+        return cached
+
     if os.path.exists(path):
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)